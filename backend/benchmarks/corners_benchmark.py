@@ -0,0 +1,141 @@
+"""
+Benchmark of the board corner search on detected x-corners: quad extraction, quad scoring and
+the whole search with every quad or with RANSAC.
+
+Run from the backend folder with:
+
+    python -m benchmarks.corners_benchmark
+
+X-corners are synthesized as the 7x7 inner grid of a board seen in perspective, with pixel noise,
+a few missed corners and outliers spread over the frame.
+"""
+import time
+import numpy as np
+
+from scipy.spatial import Delaunay
+from logic.machine_learning.maths.quad_transformation import IDEAL_QUAD, get_quads, score_quads
+from logic.machine_learning.maths.homography import get_perspective_transform, perspective_transform
+from logic.machine_learning.detection.corners_detection import find_board_corners_from_xcorners
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, CORNER_FIT_EXHAUSTIVE, CORNER_FIT_RANSAC
+
+FRAMES = 20
+OUTLIERS = [0, 10, 30, 60]
+
+
+def synthesize_xcorners(outliers: int, rng: np.random.Generator) -> np.ndarray:
+    """ Returns the (N, 2) x-corners of a perspective board with noise, misses and outliers. """
+    grid = np.stack(np.meshgrid(np.arange(1, 8), np.arange(1, 8)), axis=-1).reshape(-1, 2).astype(np.float64)
+
+    # Board about 250 px wide, tilted away from the camera
+    angle = rng.uniform(-0.3, 0.3)
+    rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    points = (grid - 4) @ rotation.T
+    depth = 1 + 0.05 * points[:, 1]
+    points = points / depth[:, None] * 30 + [MODEL_WIDTH / 2, MODEL_HEIGHT / 2]
+
+    points += rng.normal(0, 0.8, points.shape)
+    points = points[rng.uniform(0, 1, len(points)) > 0.1]
+    noise = rng.uniform([0, 0], [MODEL_WIDTH, MODEL_HEIGHT], (outliers, 2))
+    return np.concatenate([points, noise])
+
+
+def legacy_get_quads(x_corners: np.ndarray) -> list:
+    """ The previous pairing of each triangle with the first triangle sharing one of its edges. """
+    triangles = Delaunay(x_corners).simplices
+    quads = []
+    for i in range(len(triangles)):
+        t1, t2, t3 = triangles[i]
+        quad = [t1, t2, t3, -1]
+        for j in range(len(triangles)):
+            if i == j:
+                continue
+            j_tri = triangles[j]
+            if (t1 in j_tri and t2 in j_tri) or (t2 in j_tri and t3 in j_tri) or (t3 in j_tri and t1 in j_tri):
+                other_point = next((point for point in j_tri if point not in quad), None)
+                if other_point is not None:
+                    quad[3] = other_point
+                    break
+        if quad[3] != -1:
+            quads.append([x_corners[x] for x in quad])
+    return quads
+
+
+def legacy_offset_score(warped_x_corners: list, shift: list) -> float:
+    """ The previous score of a grid shift, rebuilding the grid and the full cross-distance matrix. """
+    grid = np.array([[xx + shift[0], yy + shift[1]] for yy in range(7) for xx in range(7)])
+    dist = np.sqrt(np.sum((grid[:, np.newaxis, :] - np.array(warped_x_corners)[np.newaxis, :, :]) ** 2, axis=2))
+    return 1 / (1 + sum(min(dist[i]) for i in range(len(dist))))
+
+
+def legacy_find_offset(warped_x_corners: list) -> list:
+    """ The previous binary search for the grid offset, one dimension at a time. """
+    best_offset = [0, 0]
+    for i in range(2):
+        low, high = -7, 1
+        scores = {}
+        while (high - low) > 1:
+            mid = (high + low) // 2
+            for x in [mid, mid + 1]:
+                if x not in scores:
+                    shift = [0, 0]
+                    shift[i] = x
+                    scores[x] = legacy_offset_score(warped_x_corners, shift)
+            if scores[mid] > scores[mid + 1]:
+                high = mid
+            else:
+                low = mid
+        best_offset[i] = low + 1
+    return best_offset
+
+
+def legacy_best_quad(quads: np.ndarray, x_corners: np.ndarray) -> int:
+    """ The previous per-quad scoring loop, returning the index of the best quad. """
+    best_score, best = None, None
+    for i, quad in enumerate(quads):
+        warped = perspective_transform(x_corners, get_perspective_transform(IDEAL_QUAD, quad))
+        score = legacy_offset_score(warped, legacy_find_offset(warped))
+        if best_score is None or score > best_score:
+            best_score, best = score, i
+    return best
+
+
+def time_per_frame(function, frames: list) -> float:
+    """ Returns the mean latency of a call in milliseconds over all frames. """
+    start_time = time.perf_counter()
+    for x_corners in frames:
+        function(x_corners)
+    return (time.perf_counter() - start_time) * 1000 / len(frames)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    for outliers in OUTLIERS:
+        frames = [synthesize_xcorners(outliers, rng) for _ in range(FRAMES)]
+        legacy = time_per_frame(legacy_get_quads, frames)
+        vectorized = time_per_frame(get_quads, frames)
+
+        # Both scorers pick the same quad
+        scored = [(get_quads(x_corners), x_corners) for x_corners in frames]
+        legacy_best, batched_best = [], []
+        legacy_scoring = time_per_frame(lambda args: legacy_best.append(legacy_best_quad(*args)), scored)
+        batched_scoring = time_per_frame(lambda args: batched_best.append(np.argmax(score_quads(*args)[0])), scored)
+        assert legacy_best == batched_best
+
+        # The vertices of every legacy quad are those of a quad found now
+        quads = {frozenset(map(tuple, quad)) for quad in get_quads(frames[0])}
+        assert all(frozenset(map(tuple, quad)) in quads for quad in legacy_get_quads(frames[0]))
+
+        print(f"{len(frames[0]):3d} x-corners ({outliers:2d} outliers)")
+        print(f"  get_quads legacy:     {legacy:8.3f} ms")
+        print(f"  get_quads vectorized: {vectorized:8.3f} ms")
+        print(f"  {len(scored[0][0]):3d} quads, score_quad loop: {legacy_scoring:8.3f} ms")
+        print(f"  {len(scored[0][0]):3d} quads, score_quads:     {batched_scoring:8.3f} ms")
+
+        exhaustive = time_per_frame(lambda x_corners: find_board_corners_from_xcorners(x_corners, CORNER_FIT_EXHAUSTIVE), frames)
+        ransac = time_per_frame(lambda x_corners: find_board_corners_from_xcorners(x_corners, CORNER_FIT_RANSAC), frames)
+        print(f"  board corners, every quad: {exhaustive:8.3f} ms")
+        print(f"  board corners, RANSAC:     {ransac:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark of the backend import time, excluding the GUI.
+
+Run from the backend folder with:
+
+    python -m benchmarks.import_benchmark
+"""
+import subprocess
+import sys
+import time
+
+from benchmarks.reference import BACKEND_DIR, RUNTIME_MODULES
+
+RUNS = 5
+
+
+def time_import(modules: list) -> float:
+    """ Returns the wall time in seconds to start an interpreter and import the modules. """
+    code = "".join(f"import {module}\n" for module in modules)
+    start_time = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, check=True)
+    return time.perf_counter() - start_time
+
+
+def main() -> None:
+    baseline = min(time_import([]) for _ in range(RUNS))
+    runtime = min(time_import(RUNTIME_MODULES) for _ in range(RUNS))
+    print(f"interpreter start-up: {baseline * 1000:.0f} ms")
+    print(f"backend imports:      {(runtime - baseline) * 1000:.0f} ms")
+
+    try:
+        tensorflow = min(time_import(["tensorflow"]) for _ in range(RUNS))
+        print(f"tensorflow alone:     {(tensorflow - baseline) * 1000:.0f} ms")
+    except subprocess.CalledProcessError:
+        print("tensorflow alone:     not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark of non-max suppression on model predictions.
+
+Run from the backend folder with:
+
+    python -m benchmarks.nms_benchmark [predictions.npy]
+
+The optional file holds recorded raw model outputs of shape (frames, 1, C, N), e.g. saved from
+``run_pieces_model``. Without it, predictions with a realistic number of confident boxes are
+synthesized. When TensorFlow is installed, ``tf.image.non_max_suppression`` is timed as well.
+"""
+import sys
+import time
+import numpy as np
+
+from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, process_boxes_and_scores, get_detections
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+# Letterbox arguments of a 720p frame: width, height, video width, video height, padding, roi
+ARGS = (1280, 720, 1280, 720, [0, 0, 9, 9], [0, 0])
+
+
+def synthesize_predictions(frames: int, num_classes: int, rng: np.random.Generator) -> np.ndarray:
+    """ Returns raw outputs of shape (frames, 1, 4 + num_classes, 2835) with clustered confident boxes. """
+    num_boxes = 2835
+    preds = np.zeros((frames, 1, 4 + num_classes, num_boxes), dtype=np.float16)
+    for frame in preds:
+        frame[0, 0] = rng.uniform(0, MODEL_WIDTH, num_boxes)
+        frame[0, 1] = rng.uniform(0, MODEL_HEIGHT, num_boxes)
+        frame[0, 2:4] = rng.uniform(8, 40, (2, num_boxes))
+        confident = rng.choice(num_boxes, 300, replace=False)
+        frame[0, 4:, confident] = rng.uniform(0, 1, (300, num_classes))
+    return preds
+
+
+def tensorflow_nms(preds: np.ndarray) -> np.ndarray:
+    """ The previous TensorFlow post-processing: tensor conversion, reductions and NMS. """
+    boxes, scores = get_boxes_and_scores(preds, *ARGS)
+    boxes = tf.convert_to_tensor(boxes)
+    scores = tf.convert_to_tensor(scores)
+    nms = tf.image.non_max_suppression(boxes, tf.reduce_max(scores, axis=1), max_output_size=100, iou_threshold=0.3, score_threshold=0.1)
+    return tf.gather(boxes, nms).numpy()
+
+
+def time_per_frame(function, predictions: np.ndarray) -> float:
+    """ Returns the mean latency of a call in milliseconds over all frames. """
+    function(predictions[0])
+    start_time = time.perf_counter()
+    for preds in predictions:
+        function(preds)
+    return (time.perf_counter() - start_time) * 1000 / len(predictions)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    recorded = np.load(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    datasets = {"recorded": recorded} if recorded is not None else {
+        "pieces (12 classes)": synthesize_predictions(100, 12, rng),
+        "x-corners (1 class)": synthesize_predictions(100, 1, rng)
+    }
+
+    for name, predictions in datasets.items():
+        print(name)
+        if tf is not None:
+            print(f"  tensorflow:            {time_per_frame(tensorflow_nms, predictions):.3f} ms")
+        print(f"  boxes/scores + nms:    {time_per_frame(lambda p: process_boxes_and_scores(*get_boxes_and_scores(p, *ARGS)), predictions):.3f} ms")
+        print(f"  raw output:            {time_per_frame(lambda p: get_detections(p, *ARGS), predictions):.3f} ms")
+        print(f"  raw output, per class: {time_per_frame(lambda p: get_detections(p, *ARGS, per_class=True), predictions):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Micro-benchmark of the per-frame preprocessing latency.
+
+Run from the backend folder with:
+
+    python -m benchmarks.preprocess_benchmark
+"""
+import time
+import numpy as np
+
+from logic.machine_learning.utilities.preprocess import Letterbox, get_input
+from benchmarks.reference import HAS_TENSORFLOW, legacy_letterbox, tensorflow_letterbox
+
+FRAME_SIZES = [(480, 640), (720, 1280), (1080, 1920)]
+ITERATIONS = 200
+
+
+def time_per_call(function, *args) -> float:
+    """ Returns the mean latency of a call in milliseconds. """
+    function(*args)
+    start_time = time.perf_counter()
+    for _ in range(ITERATIONS):
+        function(*args)
+    return (time.perf_counter() - start_time) * 1000 / ITERATIONS
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    letterbox = Letterbox()
+    keypoints = [[120.0, 60.0], [360.0, 60.0], [360.0, 250.0], [120.0, 250.0]]
+
+    print(f"{'frame':>11} {'tensorflow':>10} {'legacy':>10} {'letterbox':>10} {'get_input+roi':>14}")
+    for height, width in FRAME_SIZES:
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        tensorflow = f"{time_per_call(tensorflow_letterbox, frame):>8.2f}ms" if HAS_TENSORFLOW else f"{'n/a':>10}"
+        legacy = time_per_call(legacy_letterbox, frame)
+        fused = time_per_call(letterbox, frame)
+        cropped = time_per_call(lambda: get_input(frame, keypoints, letterbox=letterbox))
+        print(f"{width:>5}x{height:<5} {tensorflow} {legacy:>8.2f}ms {fused:>8.2f}ms {cropped:>12.2f}ms")
+
+        # The tests only compare with the float cv2 reference, TensorFlow is compared here
+        if HAS_TENSORFLOW:
+            expected = tensorflow_letterbox(frame).astype(np.float32)
+            for name, tensor in (("legacy", legacy_letterbox(frame)), ("letterbox", letterbox(frame)[0])):
+                error = np.abs(tensor.astype(np.float32) - expected).max() * 255
+                print(f"{'':>11} {name} vs tensorflow: max {error:.2f} grey levels")
+
+
+if __name__ == "__main__":
+    main()
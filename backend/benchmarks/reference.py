@@ -0,0 +1,82 @@
+"""
+Reference implementations and module lists shared by the tests and the benchmarks.
+
+Nothing in the detection pipeline imports this module.
+"""
+import importlib.util
+import os
+import cv2
+import numpy as np
+
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, PAD_VALUE
+from logic.machine_learning.utilities.preprocess import preprocess_image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# TensorFlow is no longer a dependency, the comparisons with it only run where it is installed
+HAS_TENSORFLOW = importlib.util.find_spec("tensorflow") is not None
+
+# Everything main.py pulls in at startup, apart from the GUI
+RUNTIME_MODULES = [
+    "logic.machine_learning.run_video",
+    "logic.api.entity.board",
+    "logic.api.routes.admin_routes",
+    "logic.api.routes.video_routes",
+    "logic.api.routes.websocket_routes"
+]
+
+
+def legacy_letterbox(image: np.ndarray) -> np.ndarray:
+    """
+    The letterbox of the former get_input, with the TensorFlow resize swapped for cv2.
+
+    The layout, padding, normalization and cast are those of the TensorFlow version. The float
+    bilinear resize of cv2 stands in for tf.image.resize, within a fraction of a grey level, so
+    TensorFlow is not needed to run the tests.
+
+    Args:
+        image (np.ndarray): The uint8 BGR image.
+
+    Returns:
+        np.ndarray: The (1, 3, MODEL_HEIGHT, MODEL_WIDTH) float16 model input.
+    """
+    height, width, _ = image.shape
+    ratio = height / width
+    resize_height, resize_width = MODEL_HEIGHT, MODEL_WIDTH
+    if ratio > MODEL_HEIGHT / MODEL_WIDTH:
+        resize_width = int(MODEL_HEIGHT / ratio)
+    else:
+        resize_height = int(MODEL_WIDTH * ratio)
+
+    resized = cv2.resize(image.astype(np.float32), (resize_width, resize_height), interpolation=cv2.INTER_LINEAR)
+    dx, dy = MODEL_WIDTH - resize_width, MODEL_HEIGHT - resize_height
+    padded = np.pad(resized, [[dy - dy // 2, dy // 2], [dx - dx // 2, dx // 2], [0, 0]], constant_values=PAD_VALUE)
+    return preprocess_image(padded)
+
+
+def tensorflow_letterbox(image: np.ndarray) -> np.ndarray:
+    """
+    The original tf.image.resize + tf.pad preprocessing of get_input.
+
+    Args:
+        image (np.ndarray): The uint8 BGR image.
+
+    Returns:
+        np.ndarray: The (1, 3, MODEL_HEIGHT, MODEL_WIDTH) float16 model input.
+
+    Raises:
+        ImportError: If TensorFlow is not installed.
+    """
+    import tensorflow as tf
+
+    height, width, _ = image.shape
+    resize_height, resize_width = MODEL_HEIGHT, MODEL_WIDTH
+    if height / width > MODEL_HEIGHT / MODEL_WIDTH:
+        resize_width = int(MODEL_HEIGHT * width / height)
+    else:
+        resize_height = int(MODEL_WIDTH * height / width)
+
+    dx, dy = MODEL_WIDTH - resize_width, MODEL_HEIGHT - resize_height
+    resized = tf.image.resize(image, [resize_height, resize_width])
+    padded = tf.pad(resized, paddings=[[dy - dy // 2, dy // 2], [dx - dx // 2, dx // 2], [0, 0]], constant_values=114)
+    return (padded.numpy() / 255.0).transpose(2, 0, 1)[np.newaxis, ...].astype(np.float16)
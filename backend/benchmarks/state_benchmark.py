@@ -0,0 +1,107 @@
+"""
+Benchmark of the per-frame board state accumulation (get_update + update_state) and of the
+square lookup of the boxes (get_squares).
+
+Run from the backend folder with:
+
+    python -m benchmarks.state_benchmark [scores.npy squares.npy]
+
+The optional files hold recorded per-frame score tensors of shape (frames, N, 12) and the
+matching square indices of shape (frames, N). Without them, frames are synthesized.
+"""
+import sys
+import time
+import numpy as np
+
+from logic.machine_learning.board_state.map_pieces import get_squares, get_update, update_state
+from logic.machine_learning.detection.bbox_scores import get_bbox_centers
+from logic.machine_learning.maths.warp import get_inv_transform, transform_centers, transform_square_map
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+
+FRAMES = 200
+
+
+def legacy_get_update(scores: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    """ The previous dict-of-lists grouping with one np.max per square. """
+    update = np.zeros((64, 12))
+    grouped = {i: [] for i in range(64)}
+    for i, square in enumerate(squares):
+        square = int(square)
+        if square != -1:
+            grouped[square].append(scores[i])
+    for square, group in grouped.items():
+        if group:
+            update[square] = np.max(group, axis=0)
+    return update
+
+
+def legacy_update_state(state: np.ndarray, update: np.ndarray, decay: float = 0.5) -> np.ndarray:
+    """ The previous 64 x 12 Python loop. """
+    for i in range(64):
+        for j in range(12):
+            state[i][j] = decay * state[i][j] + (1 - decay) * update[i][j]
+    return state
+
+
+def legacy_get_squares(boxes: np.ndarray, centers3D: np.ndarray) -> np.ndarray:
+    """ The previous nearest square center of every box, without rejecting boxes off the board. """
+    box_centers_3D = np.expand_dims(get_bbox_centers(boxes), 1)
+    return np.argmin(np.sum(np.square(box_centers_3D - centers3D), axis=2), axis=1)
+
+
+def time_per_frame(get_update_function, update_state_function, scores: np.ndarray, squares: np.ndarray, state: np.ndarray) -> float:
+    """ Returns the mean cost of one frame in microseconds. """
+    start_time = time.perf_counter()
+    for frame_scores, frame_squares in zip(scores, squares):
+        update_state_function(state, get_update_function(frame_scores, frame_squares))
+    return (time.perf_counter() - start_time) * 1e6 / len(scores)
+
+
+def main() -> None:
+    if len(sys.argv) > 2:
+        scores, squares = np.load(sys.argv[1]), np.load(sys.argv[2])
+    else:
+        rng = np.random.default_rng(0)
+        scores = (rng.uniform(0, 1, (FRAMES, 2835, 12)) ** 8).astype(np.float32)
+        squares = rng.integers(-1, 64, (FRAMES, 2835))
+
+    legacy = time_per_frame(legacy_get_update, legacy_update_state, scores, squares, np.zeros((64, 12)))
+    vectorized = time_per_frame(get_update, update_state, scores, squares, np.zeros((64, 12), dtype=np.float32))
+
+    expected = legacy_update_state(np.zeros((64, 12)), legacy_get_update(scores[0], squares[0]))
+    actual = update_state(np.zeros((64, 12), dtype=np.float32), get_update(scores[0], squares[0]))
+    assert np.allclose(expected, actual, atol=1e-6)
+
+    print(f"legacy:     {legacy:10.1f} us/frame")
+    print(f"vectorized: {vectorized:10.1f} us/frame")
+
+
+    # Square lookup of boxes spread over the model input, for a board seen slightly from above
+    inv_transform = get_inv_transform([(340, 250), (120, 250), (140, 40), (320, 40)])
+    _, centers3D = transform_centers(inv_transform)
+    start_time = time.perf_counter()
+    square_map = transform_square_map(inv_transform)
+    build = (time.perf_counter() - start_time) * 1e3
+
+    rng = np.random.default_rng(1)
+    corners = rng.uniform([0, 0], [MODEL_WIDTH, MODEL_HEIGHT], (FRAMES, 2835, 2))
+    boxes = np.concatenate([corners, corners + rng.uniform(8, 40, (FRAMES, 2835, 2))], axis=2).astype(np.float32)
+
+    start_time = time.perf_counter()
+    legacy_squares = [legacy_get_squares(frame_boxes, centers3D) for frame_boxes in boxes]
+    legacy = (time.perf_counter() - start_time) * 1e6 / FRAMES
+    start_time = time.perf_counter()
+    squares = [get_squares(frame_boxes, square_map) for frame_boxes in boxes]
+    lookup = (time.perf_counter() - start_time) * 1e6 / FRAMES
+
+    legacy_squares, squares = np.concatenate(legacy_squares), np.concatenate(squares)
+    on_board = squares != -1
+    print(f"square map build:     {build:10.1f} ms once per geometry")
+    print(f"get_squares legacy:   {legacy:10.1f} us/frame")
+    print(f"get_squares lookup:   {lookup:10.1f} us/frame")
+    print(f"boxes off the board:  {1 - on_board.mean():10.1%}")
+    print(f"same square on board: {(legacy_squares[on_board] == squares[on_board]).mean():10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import chess
 from fastapi import WebSocket
 from typing import List, Literal
 from .camera import Camera
+from .broadcast_hub import BroadcastHub
 
 from logic.machine_learning.utilities.constants import DEFAULT_FEN
 
@@ -16,11 +17,16 @@ class Board:
     self.set_id(id)
     self.camera = Camera(id)
     self.move_history: List[str] = []
-    self.clients: List[WebSocket] = []
+    self.hub = BroadcastHub()
     self.chess_board = chess.Board(fen)
     self.first_fen = fen
     self.invalid_latched = False
     
+  @property
+  def clients(self) -> List[WebSocket]:
+    """ Websockets of the spectators connected to the board. """
+    return self.hub.clients
+
   def set_id(self, id: int) -> None:
     """ Set the ID of the chess board. 
     
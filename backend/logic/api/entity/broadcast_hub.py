@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from fastapi import WebSocket
+from typing import Dict, List, Optional
+
+from logic.machine_learning.utilities.constants import (
+  BROADCAST_QUEUE_SIZE, BROADCAST_SEND_TIMEOUT_S, BROADCAST_POLICY, BROADCAST_POLICY_DROP, BROADCAST_POLICY_DISCONNECT
+)
+
+class HubClient:
+  """ A websocket connected to a BroadcastHub, with its own bounded send queue and sender task. """
+
+  def __init__(self, websocket: WebSocket, loop: asyncio.AbstractEventLoop, max_queue: int):
+    """ Initialize the client.
+
+    Args:
+      websocket (WebSocket): The accepted websocket.
+      loop (asyncio.AbstractEventLoop): Event loop serving the websocket.
+      max_queue (int): Maximum number of messages waiting to be sent.
+    """
+    self.websocket = websocket
+    self.loop = loop
+    self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+    self.task: Optional[asyncio.Task] = None
+    self.messages_sent = 0
+    self.messages_dropped = 0
+    self.max_queue_depth = 0
+    self.total_latency = 0.0
+    self.max_latency = 0.0
+
+  def stats(self) -> dict:
+    """ Get the counters of the client.
+
+    Returns:
+      dict: Queue depth, messages sent and dropped, and the latency from publishing to sending in seconds.
+    """
+    return {
+      "queue_depth": self.queue.qsize(),
+      "max_queue_depth": self.max_queue_depth,
+      "sent": self.messages_sent,
+      "dropped": self.messages_dropped,
+      "mean_latency": self.total_latency / self.messages_sent if self.messages_sent else 0.0,
+      "max_latency": self.max_latency
+    }
+
+class BroadcastHub:
+  """ Per-board fan-out of text messages to websocket clients.
+
+  Publishing never waits for a client: every client has a bounded queue drained by its own
+  sender task, so a slow or dead spectator cannot stall the detector or the other spectators.
+  ``publish`` may be called from any thread; messages are handed to each client on the event
+  loop that serves its websocket.
+  """
+
+  def __init__(self, max_queue: int = BROADCAST_QUEUE_SIZE, policy: str = BROADCAST_POLICY, send_timeout: float = BROADCAST_SEND_TIMEOUT_S):
+    """ Initialize the hub.
+
+    Args:
+      max_queue (int): Maximum number of messages waiting per client.
+      policy (str): What to do when a client's queue is full, drop its oldest message or disconnect it.
+      send_timeout (float): Seconds a single send may take before the client is disconnected.
+    Raises:
+      ValueError: If the queue size or policy is invalid.
+    """
+    if max_queue < 1:
+      raise ValueError("Queue size must be positive.")
+    if policy not in (BROADCAST_POLICY_DROP, BROADCAST_POLICY_DISCONNECT):
+      raise ValueError(f"Unknown backpressure policy {policy}.")
+
+    self.max_queue = max_queue
+    self.policy = policy
+    self.send_timeout = send_timeout
+    self.disconnects = 0
+    self._clients: Dict[WebSocket, HubClient] = {}
+    self._lock = threading.Lock()
+
+  @property
+  def clients(self) -> List[WebSocket]:
+    """ Websockets currently connected to the hub. """
+    with self._lock:
+      return list(self._clients)
+
+  async def connect(self, websocket: WebSocket, *initial: str) -> HubClient:
+    """ Register an accepted websocket and start its sender task.
+
+    Args:
+      websocket (WebSocket): The accepted websocket.
+      *initial (str): Messages to send to this client before any later broadcast.
+    Returns:
+      HubClient: The registered client.
+    """
+    client = HubClient(websocket, asyncio.get_running_loop(), max(self.max_queue, len(initial)))
+    for message in initial:
+      client.queue.put_nowait((message, time.monotonic()))
+    client.task = asyncio.create_task(self._send_loop(client))
+    with self._lock:
+      self._clients[websocket] = client
+    return client
+
+  async def disconnect(self, websocket: WebSocket) -> None:
+    """ Unregister a websocket and stop its sender task.
+
+    Args:
+      websocket (WebSocket): The websocket to remove.
+    """
+    with self._lock:
+      client = self._clients.pop(websocket, None)
+    if client is not None and client.task is not None and client.task is not asyncio.current_task():
+      client.task.cancel()
+
+  def publish(self, message: str) -> None:
+    """ Queue a message for every connected client without waiting for any send.
+
+    Args:
+      message (str): The text message to broadcast.
+    """
+    published_at = time.monotonic()
+    with self._lock:
+      clients = list(self._clients.values())
+    for client in clients:
+      try:
+        client.loop.call_soon_threadsafe(self._offer, client, message, published_at)
+      except RuntimeError:
+        # The client's event loop is closed
+        self._forget(client)
+
+  def stats(self) -> dict:
+    """ Get the counters of the hub.
+
+    Returns:
+      dict: Clients disconnected by the hub, slow or failing, and the counters of each connected client.
+    """
+    with self._lock:
+      clients = list(self._clients.values())
+    return {"disconnects": self.disconnects, "clients": [client.stats() for client in clients]}
+
+  def _offer(self, client: HubClient, message: str, published_at: float) -> None:
+    """ Queue a message for a client, applying the backpressure policy. Runs on the client's loop. """
+    if client.queue.full():
+      if self.policy == BROADCAST_POLICY_DISCONNECT:
+        self._drop_client(client)
+        return
+      client.queue.get_nowait()
+      client.messages_dropped += 1
+    client.queue.put_nowait((message, published_at))
+    client.max_queue_depth = max(client.max_queue_depth, client.queue.qsize())
+
+  def _forget(self, client: HubClient) -> bool:
+    """ Remove a client from the hub. Returns whether it was still registered. """
+    with self._lock:
+      if self._clients.get(client.websocket) is client:
+        del self._clients[client.websocket]
+        return True
+    return False
+
+  def _drop_client(self, client: HubClient) -> None:
+    """ Disconnect a client that cannot keep up. Runs on the client's loop. """
+    if not self._forget(client):
+      return
+    self.disconnects += 1
+    if client.task is not None and client.task is not asyncio.current_task():
+      client.task.cancel()
+    client.loop.create_task(self._close(client.websocket))
+
+  @staticmethod
+  async def _close(websocket: WebSocket) -> None:
+    """ Close a websocket, ignoring errors from connections that are already gone. """
+    try:
+      await websocket.close()
+    except Exception:
+      pass
+
+  async def _send_loop(self, client: HubClient) -> None:
+    """ Send queued messages to a client until it disconnects. """
+    while True:
+      message, published_at = await client.queue.get()
+      try:
+        await asyncio.wait_for(client.websocket.send_text(message), self.send_timeout)
+      except asyncio.CancelledError:
+        raise
+      except Exception:
+        self._drop_client(client)
+        return
+
+      latency = time.monotonic() - published_at
+      client.messages_sent += 1
+      client.total_latency += latency
+      client.max_latency = max(client.max_latency, latency)
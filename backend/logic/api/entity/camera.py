@@ -1,5 +1,6 @@
-from typing import Generator
 from .detector import Detector
+from .frame_source import FrameSource
+from .mjpeg_broadcaster import MjpegBroadcaster
 import cv2
 
 class Camera:
@@ -13,7 +14,9 @@ class Camera:
     """
     self.set_cam_id(cam_id)
     self.set_camera(cv2.VideoCapture(self.cam_id, cv2.CAP_DSHOW))
-    self.detector = Detector(cam_id)
+    self.source = FrameSource(self.camera)
+    self.broadcaster = MjpegBroadcaster(self.source)
+    self.detector = Detector(cam_id, self.source)
     
   def set_cam_id(self, cam_id: int) -> None:
     """ Set the camera ID.
@@ -43,19 +46,6 @@ class Camera:
       raise CameraDoesNotExistError(f"Could not open Camera {self.cam_id}.")
     
     self.camera = camera
-    
-  def generate_frames(self) -> Generator[bytes, None, None]:
-    """ Generate frames from the laptop webcam.
-  
-    Yields:
-      Generator[bytes, None, None]: Image frames
-    """
-    while True:
-      success, frame = self.camera.read()
-      if not success:
-        break
-      _, buffer = cv2.imencode(".jpg", frame)
-      yield (b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n")
       
 class CameraDoesNotExistError(Exception):
   """ Custom error class for camera errors. """
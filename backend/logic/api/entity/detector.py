@@ -1,10 +1,27 @@
 from logic.machine_learning.run_video import prepare_to_run_video
-import cv2
+from logic.machine_learning.board_state.frame_sampler import AdaptiveSampler, SamplerConfig
+from logic.machine_learning.board_state.square_gate import SquareChangeGate
+from logic.machine_learning.board_state.board_tracker import BoardTracker
+from logic.machine_learning.board_state.drift_monitor import DriftMonitor
+from typing import Optional
+from .frame_source import FrameSource
 
 class Detector:
-  def __init__(self, id: int):
-    """Class to handle video processing for chessboard detection."""
+  def __init__(self, id: int, source: FrameSource, sampler_config: Optional[SamplerConfig] = None):
+    """Class to handle video processing for chessboard detection.
+
+    Args:
+      id (int): Detector ID
+      source (FrameSource): Capture source of the board the detector reads frames from.
+      sampler_config (Optional[SamplerConfig]): Frame sampling settings of the board.
+    """
     self.set_id(id)
+    self.source = source
+    self.sampler_config = sampler_config or SamplerConfig()
+    self.sampler = AdaptiveSampler(self.sampler_config)
+    self.gate = SquareChangeGate()
+    self.tracker = BoardTracker(id)
+    self.drift = DriftMonitor()
     
   def set_id(self, id: int) -> None:
     """ Set the ID of the detector. 
@@ -21,8 +38,17 @@ class Detector:
       raise ValueError("ID must be a positive integer.")
     
     self.id = id
-    
+
+  def reset(self) -> None:
+    """ Forget the evidence and timers of the previous game, e.g. after the game was reset. """
+    self.tracker.reset_state()
+    self.gate.reset()
+
   async def run(self) -> None:
-    detector_cap = cv2.VideoCapture(self.id, cv2.CAP_DSHOW)
-    await prepare_to_run_video(self.id, detector_cap)
+    """ Run the detection loop on frames shared by the board's capture source. """
+    subscription = self.source.subscribe("detector", self.sampler_config.active_fps)
+    try:
+      await prepare_to_run_video(self.id, subscription, self.sampler, self.gate, self.tracker, self.drift)
+    finally:
+      subscription.close()
     
\ No newline at end of file
@@ -0,0 +1,174 @@
+import threading
+import cv2
+import numpy as np
+from typing import List, Optional
+
+class GrabbedFrame:
+  """ A frame leased from a FrameGrabber slot. """
+
+  def __init__(self, seq: int, slot: int, image: np.ndarray):
+    """ Initialize the leased frame.
+
+    Args:
+      seq (int): Sequence number of the frame, increasing by one per frame read from the device.
+      slot (int): Ring buffer slot holding the frame.
+      image (np.ndarray): The frame, owned by the grabber until released.
+    """
+    self.seq = seq
+    self.slot = slot
+    self.image = image
+
+class FrameGrabber:
+  """ Continuously drains a capture device into a small ring buffer of preallocated frames.
+
+  A background thread reads every frame from the device as soon as it arrives, so frames never
+  queue up in the driver. Consumers lease the most recent frame without copying it; leased slots
+  are never overwritten, and when every slot is busy the grabber still drains the device with
+  ``grab()`` so there is no backlog.
+  """
+
+  def __init__(self, capture: cv2.VideoCapture, slots: int = 4):
+    """ Initialize the grabber.
+
+    Args:
+      capture (cv2.VideoCapture): An opened capture device.
+      slots (int): Number of preallocated frame slots, at least 3.
+    Raises:
+      ValueError: If fewer than 3 slots are requested.
+    """
+    if slots < 3:
+      raise ValueError("FrameGrabber needs at least 3 slots.")
+
+    self.capture = capture
+    self.frames: List[Optional[np.ndarray]] = [None] * slots
+    self.leases = [0] * slots
+    self.latest_slot: Optional[int] = None
+    self.latest_seq = -1
+    self.latest_read = True
+    self.running = False
+    self.failed = False
+
+    self.frames_grabbed = 0
+    self.frames_dropped = 0
+    self.frames_duplicated = 0
+
+    self._condition = threading.Condition()
+    self._thread: Optional[threading.Thread] = None
+
+  def start(self) -> None:
+    """ Start the capture thread if it is not running yet. """
+    with self._condition:
+      if self.running:
+        return
+      self.running = True
+    self._thread = threading.Thread(target=self._run, daemon=True)
+    self._thread.start()
+
+  def stop(self) -> None:
+    """ Stop the capture thread and wake up waiting consumers. """
+    with self._condition:
+      self.running = False
+      self._condition.notify_all()
+    if self._thread is not None and self._thread is not threading.current_thread():
+      self._thread.join()
+
+  def acquire(self, after_seq: int = -1, timeout: Optional[float] = None) -> Optional[GrabbedFrame]:
+    """ Lease the most recent frame, waiting for one newer than ``after_seq`` if needed.
+
+    Args:
+      after_seq (int): Only return a frame with a higher sequence number.
+      timeout (Optional[float]): Seconds to wait for such a frame, None to wait indefinitely.
+    Returns:
+      Optional[GrabbedFrame]: The leased frame, or None on timeout or when the device stopped.
+        Leased frames must be given back with ``release``.
+    """
+    with self._condition:
+      if not self._condition.wait_for(lambda: self.latest_seq > after_seq or not self.running, timeout):
+        return None
+      if self.latest_seq <= after_seq:
+        return None
+      return self._lease()
+
+  def acquire_latest(self, last_seq: int = -1) -> Optional[GrabbedFrame]:
+    """ Lease the most recent frame without waiting, even if it was already seen.
+
+    Args:
+      last_seq (int): Sequence number of the frame the consumer saw last, to count duplicates.
+    Returns:
+      Optional[GrabbedFrame]: The leased frame, or None if no frame was grabbed yet.
+    """
+    with self._condition:
+      if self.latest_slot is None:
+        return None
+      if self.latest_seq == last_seq:
+        self.frames_duplicated += 1
+      return self._lease()
+
+  def release(self, frame: GrabbedFrame) -> None:
+    """ Give a leased frame back so its slot can be reused.
+
+    Args:
+      frame (GrabbedFrame): A frame returned by ``acquire`` or ``acquire_latest``.
+    """
+    with self._condition:
+      self.leases[frame.slot] -= 1
+
+  def stats(self) -> dict:
+    """ Get the frame counters of the grabber.
+
+    Returns:
+      dict: Frames grabbed from the device, dropped before anyone read them, and handed out more than once.
+    """
+    with self._condition:
+      return {
+        "grabbed": self.frames_grabbed,
+        "dropped": self.frames_dropped,
+        "duplicated": self.frames_duplicated
+      }
+
+  def _lease(self) -> GrabbedFrame:
+    """ Lease the latest slot. Must be called with the condition held. """
+    self.leases[self.latest_slot] += 1
+    self.latest_read = True
+    return GrabbedFrame(self.latest_seq, self.latest_slot, self.frames[self.latest_slot])
+
+  def _free_slot(self) -> Optional[int]:
+    """ Find a slot that is neither leased nor the latest frame. Must be called with the condition held. """
+    for slot, leases in enumerate(self.leases):
+      if leases == 0 and slot != self.latest_slot:
+        return slot
+    return None
+
+  def _run(self) -> None:
+    """ Read frames from the device until stopped or the device fails. """
+    while self.running:
+      with self._condition:
+        slot = self._free_slot()
+
+      if slot is None:
+        # Every slot is in use, keep draining the device so frames do not pile up
+        if not self.capture.grab():
+          break
+        with self._condition:
+          self.frames_grabbed += 1
+          self.frames_dropped += 1
+        continue
+
+      ok, image = self.capture.read(self.frames[slot])
+      if not ok:
+        break
+
+      with self._condition:
+        self.frames[slot] = image
+        if not self.latest_read:
+          self.frames_dropped += 1
+        self.latest_slot = slot
+        self.latest_seq += 1
+        self.latest_read = False
+        self.frames_grabbed += 1
+        self._condition.notify_all()
+
+    with self._condition:
+      self.failed = self.running
+      self.running = False
+      self._condition.notify_all()
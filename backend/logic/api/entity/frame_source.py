@@ -0,0 +1,155 @@
+import threading
+import time
+import cv2
+from typing import Dict, Optional
+from .frame_grabber import FrameGrabber, GrabbedFrame
+
+from logic.machine_learning.utilities.constants import FRAME_GRABBER_SLOTS
+
+class FrameSubscription:
+  """ A consumer of a FrameSource, receiving shared frames at most at its own frame rate. """
+
+  def __init__(self, source: "FrameSource", name: str, max_fps: Optional[float] = None):
+    """ Initialize the subscription.
+
+    Args:
+      source (FrameSource): The source delivering the frames.
+      name (str): Name of the subscriber, unique per source.
+      max_fps (Optional[float]): Highest frame rate delivered to the subscriber, None for every frame.
+    Raises:
+      ValueError: If max_fps is not positive.
+    """
+    if max_fps is not None and max_fps <= 0:
+      raise ValueError("max_fps must be positive.")
+
+    self.source = source
+    self.name = name
+    self.min_interval = 0.0 if max_fps is None else 1.0 / max_fps
+    self.last_seq = -1
+    self.next_due = 0.0
+    self.frames_delivered = 0
+    self.frames_skipped = 0
+
+  @property
+  def active(self) -> bool:
+    """ Whether the source is still delivering frames. """
+    return self.source.grabber.running
+
+  def acquire(self, timeout: Optional[float] = None) -> Optional[GrabbedFrame]:
+    """ Lease the newest frame the subscriber has not seen yet, honouring its frame rate limit.
+
+    The frame is shared with every other subscriber and must not be modified.
+
+    Args:
+      timeout (Optional[float]): Seconds to wait for a frame, None to wait indefinitely.
+    Returns:
+      Optional[GrabbedFrame]: The leased frame, or None on timeout or when the source stopped.
+        Leased frames must be given back with ``release``.
+    """
+    now = time.monotonic()
+    deadline = None if timeout is None else now + timeout
+
+    wait = self.next_due - now
+    if wait > 0:
+      if deadline is not None and now + wait > deadline:
+        time.sleep(timeout)
+        return None
+      time.sleep(wait)
+
+    remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+    frame = self.source.grabber.acquire(self.last_seq, remaining)
+    if frame is None:
+      return None
+
+    if self.last_seq >= 0:
+      self.frames_skipped += frame.seq - self.last_seq - 1
+    self.last_seq = frame.seq
+    self.next_due = time.monotonic() + self.min_interval
+    self.frames_delivered += 1
+    return frame
+
+  def release(self, frame: GrabbedFrame) -> None:
+    """ Give a leased frame back to the source.
+
+    Args:
+      frame (GrabbedFrame): A frame returned by ``acquire``.
+    """
+    self.source.grabber.release(frame)
+
+  def close(self) -> None:
+    """ Stop receiving frames from the source. """
+    self.source.unsubscribe(self)
+
+  def stats(self) -> dict:
+    """ Get the frame counters of the subscription.
+
+    Returns:
+      dict: Frames delivered to the subscriber and frames it skipped because of its frame rate.
+    """
+    return {"delivered": self.frames_delivered, "skipped": self.frames_skipped}
+
+class FrameSource:
+  """ Single capture source of a board, fanning its frames out to any number of subscribers.
+
+  Frames are read once from the device by a FrameGrabber and shared by reference, so the
+  detector, the video stream and any recorder never open the device twice.
+  """
+
+  def __init__(self, capture: cv2.VideoCapture, slots: int = FRAME_GRABBER_SLOTS):
+    """ Initialize the frame source.
+
+    Args:
+      capture (cv2.VideoCapture): An opened capture device.
+      slots (int): Number of frame slots shared by the subscribers.
+    """
+    self.capture = capture
+    self.grabber = FrameGrabber(capture, slots)
+    self.subscriptions: Dict[str, FrameSubscription] = {}
+    self._lock = threading.Lock()
+
+  def subscribe(self, name: str, max_fps: Optional[float] = None) -> FrameSubscription:
+    """ Add a subscriber, starting the capture thread on first use.
+
+    Args:
+      name (str): Name of the subscriber, unique per source.
+      max_fps (Optional[float]): Highest frame rate delivered to the subscriber, None for every frame.
+    Returns:
+      FrameSubscription: The new subscription.
+    Raises:
+      ValueError: If a subscriber with this name already exists.
+    """
+    with self._lock:
+      if name in self.subscriptions:
+        raise ValueError(f"Subscriber {name} already exists.")
+      subscription = FrameSubscription(self, name, max_fps)
+      self.subscriptions[name] = subscription
+    self.grabber.start()
+    return subscription
+
+  def unsubscribe(self, subscription: FrameSubscription) -> None:
+    """ Remove a subscriber. The capture keeps running for the others.
+
+    Args:
+      subscription (FrameSubscription): The subscription to remove.
+    """
+    with self._lock:
+      if self.subscriptions.get(subscription.name) is subscription:
+        del self.subscriptions[subscription.name]
+
+  def close(self) -> None:
+    """ Stop the capture thread and release the device. """
+    self.grabber.stop()
+    self.capture.release()
+
+  def stats(self) -> dict:
+    """ Get the frame counters of the source and of each subscriber.
+
+    Returns:
+      dict: Grabber counters and the counters of every subscription by name.
+    """
+    with self._lock:
+      subscriptions = dict(self.subscriptions)
+    return {
+      **self.grabber.stats(),
+      "subscribers": {name: subscription.stats() for name, subscription in subscriptions.items()}
+    }
@@ -0,0 +1,153 @@
+import asyncio
+import itertools
+import threading
+import cv2
+from typing import AsyncGenerator, List, Optional
+from .frame_source import FrameSource
+
+from logic.machine_learning.utilities.constants import STREAM_JPEG_QUALITY, STREAM_TARGET_FPS, FRAME_WAIT_TIMEOUT_S
+
+class MjpegClient:
+  """ A viewer of the MJPEG stream, holding at most one pending frame. """
+
+  def __init__(self, loop: asyncio.AbstractEventLoop):
+    """ Initialize the client.
+
+    Args:
+      loop (asyncio.AbstractEventLoop): Event loop serving the client's HTTP response.
+    """
+    self.loop = loop
+    self.queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    self.frames_sent = 0
+    self.frames_dropped = 0
+
+class MjpegBroadcaster:
+  """ Per-board MJPEG broadcaster that encodes every frame once for all viewers.
+
+  An encoder thread subscribes to the board's frame source while at least one viewer is
+  connected, encodes each frame to JPEG and hands the same bytes to every viewer. Each viewer
+  keeps only the newest frame, so a slow client skips frames instead of delaying the others.
+  """
+
+  def __init__(self, source: FrameSource, quality: int = STREAM_JPEG_QUALITY, target_fps: float = STREAM_TARGET_FPS):
+    """ Initialize the broadcaster.
+
+    Args:
+      source (FrameSource): Capture source of the board.
+      quality (int): JPEG quality from 0 to 100.
+      target_fps (float): Highest frame rate of the stream.
+    Raises:
+      ValueError: If the quality or frame rate is out of range.
+    """
+    if not 0 <= quality <= 100:
+      raise ValueError("JPEG quality must be between 0 and 100.")
+    if target_fps <= 0:
+      raise ValueError("Target FPS must be positive.")
+
+    self.source = source
+    self.quality = quality
+    self.target_fps = target_fps
+    self.clients: List[MjpegClient] = []
+    self.frames_encoded = 0
+
+    self._lock = threading.Lock()
+    self._thread: Optional[threading.Thread] = None
+    self._runs = itertools.count(1)
+
+  async def stream(self) -> AsyncGenerator[bytes, None]:
+    """ Stream the board's video as multipart JPEG chunks until the client disconnects.
+
+    Yields:
+      AsyncGenerator[bytes, None]: Multipart chunks, each holding one JPEG frame.
+    """
+    client = MjpegClient(asyncio.get_running_loop())
+    self._add_client(client)
+    try:
+      while True:
+        chunk = await client.queue.get()
+        if chunk is None:
+          break
+        client.frames_sent += 1
+        yield chunk
+    finally:
+      self._remove_client(client)
+
+  def stats(self) -> dict:
+    """ Get the counters of the broadcaster.
+
+    Returns:
+      dict: Frames encoded, and frames sent and dropped for each connected client.
+    """
+    with self._lock:
+      clients = list(self.clients)
+    return {
+      "encoded": self.frames_encoded,
+      "clients": [{"sent": client.frames_sent, "dropped": client.frames_dropped} for client in clients]
+    }
+
+  def _add_client(self, client: MjpegClient) -> None:
+    """ Register a client, starting the encoder thread if it is not running. """
+    with self._lock:
+      self.clients.append(client)
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+  def _remove_client(self, client: MjpegClient) -> None:
+    """ Unregister a client. The encoder thread stops once no clients are left. """
+    with self._lock:
+      if client in self.clients:
+        self.clients.remove(client)
+
+  @staticmethod
+  def _offer(client: MjpegClient, chunk: Optional[bytes]) -> None:
+    """ Queue a chunk for a client, replacing a frame it has not picked up yet. Runs on the client's loop. """
+    if client.queue.full():
+      client.queue.get_nowait()
+      client.frames_dropped += 1
+    client.queue.put_nowait(chunk)
+
+  def _publish(self, clients: List[MjpegClient], chunk: Optional[bytes]) -> None:
+    """ Hand a chunk to every client on its own event loop. """
+    for client in clients:
+      try:
+        client.loop.call_soon_threadsafe(self._offer, client, chunk)
+      except RuntimeError:
+        # The client's event loop is closed, it is removed when its generator is finalized
+        pass
+
+  def _run(self) -> None:
+    """ Encode frames from the source while there are clients. """
+    subscription = self.source.subscribe(f"mjpeg-{next(self._runs)}", self.target_fps)
+    params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+    try:
+      while True:
+        with self._lock:
+          if not self.clients:
+            self._thread = None
+            return
+          if not subscription.active:
+            clients = list(self.clients)
+            self._thread = None
+            break
+
+        frame = subscription.acquire(FRAME_WAIT_TIMEOUT_S)
+        if frame is None:
+          continue
+        try:
+          ok, buffer = cv2.imencode(".jpg", frame.image, params)
+        finally:
+          subscription.release(frame)
+        if not ok:
+          continue
+
+        self.frames_encoded += 1
+        chunk = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + buffer.tobytes() + b"\r\n"
+        with self._lock:
+          clients = list(self.clients)
+        self._publish(clients, chunk)
+
+      # The camera stopped, end every open stream
+      self._publish(clients, None)
+    finally:
+      subscription.close()
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import unittest
+from logic.api.entity.broadcast_hub import BroadcastHub
+
+class FakeWebSocket:
+  """ Websocket recording sent messages, optionally blocking every send until released. """
+
+  def __init__(self, blocked: bool = False):
+    self.sent = []
+    self.closed = False
+    self.release = asyncio.Event()
+    if not blocked:
+      self.release.set()
+
+  async def send_text(self, message: str) -> None:
+    await self.release.wait()
+    self.sent.append(message)
+
+  async def close(self) -> None:
+    self.closed = True
+
+class TestBroadcastHub(unittest.IsolatedAsyncioTestCase):
+  """ Unit tests for the BroadcastHub class. """
+
+  def test_invalid_settings(self) -> None:
+    """ Test that the queue size and policy are validated. """
+    with self.assertRaises(ValueError):
+      BroadcastHub(max_queue=0)
+    with self.assertRaises(ValueError):
+      BroadcastHub(policy="INVALID")
+
+  async def test_initial_messages_come_first(self) -> None:
+    """ Test that messages given on connect are sent before later broadcasts. """
+    hub = BroadcastHub()
+    websocket = FakeWebSocket()
+    await hub.connect(websocket, "e4", "e5")
+    hub.publish("Nf3")
+    await asyncio.sleep(0.01)
+
+    self.assertEqual(websocket.sent, ["e4", "e5", "Nf3"])
+    self.assertEqual(hub.clients, [websocket])
+    await hub.disconnect(websocket)
+    self.assertEqual(hub.clients, [])
+
+  async def test_slow_client_does_not_block_others(self) -> None:
+    """ Test that a blocked client does not delay delivery to the other clients. """
+    hub = BroadcastHub()
+    slow, fast = FakeWebSocket(blocked=True), FakeWebSocket()
+    await hub.connect(slow)
+    await hub.connect(fast)
+
+    hub.publish("e4")
+    hub.publish("e5")
+    await asyncio.sleep(0.01)
+    self.assertEqual(fast.sent, ["e4", "e5"])
+    self.assertEqual(slow.sent, [])
+
+    slow.release.set()
+    await asyncio.sleep(0.01)
+    self.assertEqual(slow.sent, ["e4", "e5"])
+    self.assertEqual(hub.stats()["clients"][0]["sent"], 2)
+
+  async def test_drop_policy(self) -> None:
+    """ Test that the drop policy discards the oldest message of a full queue. """
+    hub = BroadcastHub(max_queue=2, policy="drop")
+    websocket = FakeWebSocket(blocked=True)
+    await hub.connect(websocket)
+    await asyncio.sleep(0)
+
+    for move in ["e4", "e5", "Nf3", "Nc6"]:
+      hub.publish(move)
+    await asyncio.sleep(0.01)
+    websocket.release.set()
+    await asyncio.sleep(0.01)
+
+    self.assertEqual(websocket.sent, ["Nf3", "Nc6"])
+    self.assertEqual(hub.stats()["clients"][0]["dropped"], 2)
+
+  async def test_disconnect_policy(self) -> None:
+    """ Test that the disconnect policy closes a client whose queue is full. """
+    hub = BroadcastHub(max_queue=1, policy="disconnect")
+    websocket = FakeWebSocket(blocked=True)
+    await hub.connect(websocket)
+    await asyncio.sleep(0)
+
+    for move in ["e4", "e5", "Nf3"]:
+      hub.publish(move)
+    await asyncio.sleep(0.01)
+
+    self.assertTrue(websocket.closed)
+    self.assertEqual(hub.clients, [])
+    self.assertEqual(hub.stats()["disconnects"], 1)
+
+  async def test_publish_from_other_thread(self) -> None:
+    """ Test that messages published from another thread reach the client on its own loop. """
+    hub = BroadcastHub()
+    websocket = FakeWebSocket()
+    await hub.connect(websocket)
+
+    thread = threading.Thread(target=hub.publish, args=("e4",))
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0.01)
+
+    self.assertEqual(websocket.sent, ["e4"])
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,112 @@
+import threading
+import unittest
+import numpy as np
+from logic.api.entity.frame_grabber import FrameGrabber
+
+class FakeCapture:
+  """ Capture device producing numbered frames, each frame holds its own index. """
+
+  def __init__(self, count: int, gate: threading.Semaphore = None):
+    self.count = count
+    self.index = 0
+    self.gate = gate
+    self.allocations = 0
+
+  def _next(self) -> bool:
+    if self.gate is not None:
+      self.gate.acquire()
+    if self.index >= self.count:
+      return False
+    self.index += 1
+    return True
+
+  def read(self, image=None):
+    if not self._next():
+      return False, None
+    if image is None:
+      self.allocations += 1
+      image = np.empty((4, 4, 3), dtype=np.uint8)
+    image[...] = self.index % 256
+    return True, image
+
+  def grab(self) -> bool:
+    return self._next()
+
+class TestFrameGrabber(unittest.TestCase):
+  """ Unit tests for the FrameGrabber class. """
+
+  def test_invalid_slots(self) -> None:
+    """ Test that the grabber needs at least three slots. """
+    with self.assertRaises(ValueError):
+      FrameGrabber(FakeCapture(1), slots=2)
+
+  def test_acquire_waits_for_newer_frame(self) -> None:
+    """ Test that acquire returns a frame newer than the given sequence number. """
+    gate = threading.Semaphore(0)
+    grabber = FrameGrabber(FakeCapture(10, gate))
+    grabber.start()
+
+    gate.release()
+    frame = grabber.acquire(-1, timeout=1.0)
+    self.assertEqual(frame.seq, 0)
+    self.assertEqual(frame.image[0, 0, 0], 1)
+    grabber.release(frame)
+
+    self.assertIsNone(grabber.acquire(frame.seq, timeout=0.05))
+
+    gate.release()
+    frame = grabber.acquire(frame.seq, timeout=1.0)
+    self.assertEqual(frame.seq, 1)
+    grabber.release(frame)
+
+    for _ in range(10):
+      gate.release()
+    grabber.stop()
+
+  def test_leased_frame_is_not_overwritten(self) -> None:
+    """ Test that frames keep their content while leased, even when the device keeps producing. """
+    gate = threading.Semaphore(0)
+    capture = FakeCapture(50, gate)
+    grabber = FrameGrabber(capture, slots=3)
+    grabber.start()
+
+    gate.release()
+    leased = grabber.acquire(-1, timeout=1.0)
+    value = leased.image.copy()
+
+    for _ in range(50):
+      gate.release()
+    grabber._thread.join(timeout=1.0)
+
+    np.testing.assert_array_equal(leased.image, value)
+    grabber.release(leased)
+
+    stats = grabber.stats()
+    self.assertEqual(stats["grabbed"], 50)
+    self.assertGreater(stats["dropped"], 0)
+    self.assertLessEqual(capture.allocations, 3)
+    self.assertFalse(grabber.running)
+    self.assertTrue(grabber.failed)
+
+  def test_acquire_latest_counts_duplicates(self) -> None:
+    """ Test that handing out the same frame twice is counted as a duplicate. """
+    gate = threading.Semaphore(0)
+    grabber = FrameGrabber(FakeCapture(5, gate))
+    self.assertIsNone(grabber.acquire_latest())
+    grabber.start()
+
+    gate.release()
+    first = grabber.acquire(-1, timeout=1.0)
+    grabber.release(first)
+    second = grabber.acquire_latest(first.seq)
+    grabber.release(second)
+
+    self.assertEqual(second.seq, first.seq)
+    self.assertEqual(grabber.stats()["duplicated"], 1)
+
+    for _ in range(5):
+      gate.release()
+    grabber.stop()
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,66 @@
+import threading
+import time
+import unittest
+from logic.api.entity.frame_source import FrameSource
+from logic.api.entity.test_frame_grabber import FakeCapture
+
+class TestFrameSource(unittest.TestCase):
+  """ Unit tests for the FrameSource class. """
+
+  def setUp(self) -> None:
+    self.gate = threading.Semaphore(0)
+    self.capture = FakeCapture(100, self.gate)
+    self.source = FrameSource(self.capture)
+
+  def tearDown(self) -> None:
+    for _ in range(100):
+      self.gate.release()
+    self.source.grabber.stop()
+
+  def test_subscribers_share_frames(self) -> None:
+    """ Test that every subscriber receives the same frame object. """
+    detector = self.source.subscribe("detector")
+    stream = self.source.subscribe("stream")
+    self.gate.release()
+
+    first = detector.acquire(timeout=1.0)
+    second = stream.acquire(timeout=1.0)
+    self.assertIs(first.image, second.image)
+    self.assertEqual(first.seq, second.seq)
+    detector.release(first)
+    stream.release(second)
+
+  def test_duplicate_subscriber(self) -> None:
+    """ Test that subscriber names are unique per source. """
+    self.source.subscribe("detector")
+    with self.assertRaises(ValueError):
+      self.source.subscribe("detector")
+
+  def test_unsubscribe(self) -> None:
+    """ Test that a closed subscription is removed from the source. """
+    subscription = self.source.subscribe("recorder")
+    subscription.close()
+    self.assertEqual(self.source.stats()["subscribers"], {})
+    self.source.subscribe("recorder")
+
+  def test_frame_rate_limit(self) -> None:
+    """ Test that a subscriber is not handed frames faster than its frame rate. """
+    with self.assertRaises(ValueError):
+      self.source.subscribe("invalid", max_fps=0)
+
+    subscription = self.source.subscribe("detector", max_fps=20)
+    self.gate.release()
+    frame = subscription.acquire(timeout=1.0)
+    subscription.release(frame)
+    start = time.monotonic()
+
+    self.gate.release()
+    self.gate.release()
+    frame = subscription.acquire(timeout=1.0)
+    subscription.release(frame)
+
+    self.assertGreaterEqual(time.monotonic() - start, 0.04)
+    self.assertEqual(subscription.stats()["delivered"], 2)
+
+if __name__ == "__main__":
+  unittest.main()
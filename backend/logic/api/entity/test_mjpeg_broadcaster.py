@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import unittest
+from logic.api.entity.frame_source import FrameSource
+from logic.api.entity.mjpeg_broadcaster import MjpegBroadcaster, MjpegClient
+from logic.api.entity.test_frame_grabber import FakeCapture
+
+class TestMjpegBroadcaster(unittest.IsolatedAsyncioTestCase):
+  """ Unit tests for the MjpegBroadcaster class. """
+
+  def setUp(self) -> None:
+    self.gate = threading.Semaphore(0)
+    self.source = FrameSource(FakeCapture(20, self.gate))
+
+  def tearDown(self) -> None:
+    for _ in range(20):
+      self.gate.release()
+    self.source.grabber.stop()
+
+  def test_invalid_settings(self) -> None:
+    """ Test that the JPEG quality and frame rate are validated. """
+    with self.assertRaises(ValueError):
+      MjpegBroadcaster(self.source, quality=101)
+    with self.assertRaises(ValueError):
+      MjpegBroadcaster(self.source, target_fps=0)
+
+  async def test_frames_are_encoded_once(self) -> None:
+    """ Test that all clients receive the same encoded bytes. """
+    broadcaster = MjpegBroadcaster(self.source, target_fps=1000)
+    first = broadcaster.stream()
+    second = broadcaster.stream()
+
+    pending = [asyncio.ensure_future(anext(first)), asyncio.ensure_future(anext(second))]
+    await asyncio.sleep(0.05)
+    self.gate.release()
+    chunks = await asyncio.wait_for(asyncio.gather(*pending), timeout=2.0)
+
+    self.assertIs(chunks[0], chunks[1])
+    self.assertTrue(chunks[0].startswith(b"--frame\r\nContent-Type: image/jpeg"))
+    self.assertEqual(broadcaster.frames_encoded, 1)
+
+    await first.aclose()
+    await second.aclose()
+    self.assertEqual(broadcaster.stats()["clients"], [])
+
+  async def test_slow_client_keeps_newest_frame(self) -> None:
+    """ Test that a client that does not keep up only holds the newest frame. """
+    client = MjpegClient(asyncio.get_running_loop())
+    MjpegBroadcaster._offer(client, b"old")
+    MjpegBroadcaster._offer(client, b"new")
+
+    self.assertEqual(client.frames_dropped, 1)
+    self.assertEqual(client.queue.get_nowait(), b"new")
+
+if __name__ == "__main__":
+  unittest.main()
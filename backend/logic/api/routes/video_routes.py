@@ -5,8 +5,8 @@ import logic.api.services.board_storage as storage
 router = APIRouter()
 
 @router.get("/video/{id}")
-def video_feed(id: int = Path(..., ge=1)) -> StreamingResponse:
-  """Dynamic video stream from multiple webcams. 
+async def video_feed(id: int = Path(..., ge=1)) -> StreamingResponse:
+  """Dynamic video stream from multiple webcams. Frames are encoded once per board and shared by all viewers.
   
   Args:
     id (int): Board ID
@@ -15,6 +15,6 @@ def video_feed(id: int = Path(..., ge=1)) -> StreamingResponse:
     raise HTTPException(404, f"Board {id} not found.")
   
   return StreamingResponse(
-    storage.boards[id].camera.generate_frames(),
+    storage.boards[id].camera.broadcaster.stream(),
     media_type="multipart/x-mixed-replace; boundary=frame"
   )
@@ -16,15 +16,16 @@ async def websocket_endpoint(websocket: WebSocket, board_id: int) -> None:
     await websocket.close()
     return
     
-  storage.boards[board_id].clients.append(websocket)
-  try:    
-    for move in storage.boards[board_id].move_history:
-      await websocket.send_text(move)
+  board = storage.boards[board_id]
+  # The history is queued ahead of any later move, so the client sees every move in order
+  await board.hub.connect(websocket, *board.move_history)
+  try:
     while True:
       await websocket.receive_text()
   except Exception:
-    if websocket in storage.boards[board_id].clients:
-      storage.boards[board_id].clients.remove(websocket)
+    pass
+  finally:
+    await board.hub.disconnect(websocket)
       
       
       
@@ -41,16 +42,16 @@ async def websocket_fen_only(websocket: WebSocket, board_id: int) -> None:
         await websocket.close()
         return
 
-    storage.boards[board_id].clients.append(websocket)
+    board = storage.boards[board_id]
+    # Send the initial FEN stored in the board, not the current chess_board position
+    initial_fen = board.first_fen
+    await board.hub.connect(websocket, f"FEN:{initial_fen}")
+    print(f"WebSocket connected for board {board_id}, sending initial FEN: {initial_fen}")
     try:
-        # Send the initial FEN stored in the board, not the current chess_board position
-        initial_fen = storage.boards[board_id].first_fen
-        await websocket.send_text(f"FEN:{initial_fen}")
-        print(f"WebSocket connected for board {board_id}, sending initial FEN: {initial_fen}")
-
         # Keep connection open waiting for messages (to keep alive)
         while True:
             await websocket.receive_text()
     except Exception:
-        if websocket in storage.boards[board_id].clients:
-            storage.boards[board_id].clients.remove(websocket)
+        pass
+    finally:
+        await board.hub.disconnect(websocket)
@@ -1,23 +1,29 @@
-import asyncio
-import threading
 import logic.api.services.board_storage as storage
+import logic.view.state as state
+from logic.machine_learning.utilities.model_registry import model_registry
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+from logic.machine_learning.utilities.constants import DETECTOR_BOARDS_PER_WORKER
+from logic.api.services.detector_worker_pool import worker_pool
 
 class BoardService:
   """ Service to manage chess boards and their operations. """
   
-  def start_detectors(self) -> None:
-    """ Start the chess detectors for all boards. """
+  def start_detectors(self, boards_per_worker: int = DETECTOR_BOARDS_PER_WORKER) -> None:
+    """ Start the chess detectors for all boards. Safe to call from any thread.
+
+    Args:
+      boards_per_worker (int): Boards per detector worker process, 0 to run every detector
+        as a coroutine on the application event loop.
+    """
+    detector_runtime.attach(state.event_loop)
+    if boards_per_worker > 0:
+      worker_pool.start(list(storage.boards), boards_per_worker)
+      return
+
+    model_registry.load_all()
+    print(model_registry.report())
     for board_id in storage.boards:
-      thread = threading.Thread(
-        target=self._run_detector_thread,
-        args=(board_id,),
-        daemon=True
-      )
-      thread.start()
-      
-  def _run_detector_thread(self, board_id: int) -> None:
-    """ Run the detector in a separate thread. """
-    asyncio.run(storage.boards[board_id].camera.detector.run())
+      detector_runtime.spawn(board_id, storage.boards[board_id].camera.detector.run())
 
   async def send_move(self, board_id: int, move: str) -> None:
     """ Send a chess move to all clients.
@@ -30,14 +36,15 @@ class BoardService:
 
     checked_move, valid = board.validate_move(move)
     if valid:
-      for client in board.clients:
-        await client.send_text(checked_move)
+      board.hub.publish(checked_move)
 
   async def reset_game(self, board_id: int) -> None:
     """ Reset the chess game of a board. """
     board = storage.boards[board_id]
-    for client in board.clients:
-      await client.send_text(board.reset_board())
+    board.hub.publish(board.reset_board())
+    # Evidence of the previous game must not play moves in the new one
+    board.camera.detector.reset()
+    worker_pool.reset(board_id, board.chess_board.fen())
 
   async def reset_all_games(self) -> None:
     """ Reset the chess game to all boards. """
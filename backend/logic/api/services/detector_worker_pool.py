@@ -0,0 +1,168 @@
+import asyncio
+import multiprocessing
+import threading
+from typing import Dict, List, Optional
+import logic.api.services.board_storage as storage
+
+from logic.machine_learning.detector_worker import run_worker
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+from logic.machine_learning.utilities.shared_frames import SharedFrameRing
+from logic.machine_learning.utilities.constants import FRAME_WAIT_TIMEOUT_S, SHARED_FRAME_SLOTS
+
+class DetectorWorkerPool:
+  """ Runs the detectors in worker processes, one process per group of boards.
+
+  The API process keeps the cameras. A pump thread per board copies the detector's frames into
+  a shared memory ring, the worker runs inference and move scoring on its own GIL, and only
+  compact move events come back to be broadcast on the application event loop.
+  """
+
+  def __init__(self):
+    """ Initialize an idle pool. """
+    self.processes: List[multiprocessing.Process] = []
+    self.commands: Dict[int, multiprocessing.Queue] = {}
+    self.rings: Dict[int, SharedFrameRing] = {}
+    self.events: Optional[multiprocessing.Queue] = None
+    # Bumped by every reset, so moves the worker detected in the previous game are dropped
+    self.generations: Dict[int, int] = {}
+    self.running = False
+    self._threads: List[threading.Thread] = []
+
+  def handles(self, board_id: int) -> bool:
+    """ Check whether a board is detected by a worker process.
+
+    Args:
+      board_id (int): Board ID
+    Returns:
+      bool: True if a worker runs the detector of the board.
+    """
+    return self.running and board_id in self.commands
+
+  def start(self, board_ids: List[int], boards_per_worker: int) -> None:
+    """ Spawn the worker processes and start feeding them frames.
+
+    Args:
+      board_ids (List[int]): Boards to detect.
+      boards_per_worker (int): Number of boards handled by one worker process.
+    Raises:
+      ValueError: If boards_per_worker is not positive.
+    """
+    if boards_per_worker < 1:
+      raise ValueError("boards_per_worker must be positive.")
+    if self.running:
+      return
+
+    context = multiprocessing.get_context("spawn")
+    self.events = context.Queue()
+    self.running = True
+
+    for start in range(0, len(board_ids), boards_per_worker):
+      group = board_ids[start:start + boards_per_worker]
+      commands = context.Queue()
+      fens = {board_id: storage.boards[board_id].chess_board.fen() for board_id in group}
+      configs = {board_id: storage.boards[board_id].camera.detector.sampler_config for board_id in group}
+      process = context.Process(target=run_worker, args=(fens, commands, self.events, configs), daemon=True)
+      process.start()
+      self.processes.append(process)
+      for board_id in group:
+        self.commands[board_id] = commands
+
+    for board_id in board_ids:
+      self._start_thread(self._pump, board_id)
+    self._start_thread(self._read_events)
+
+  def reset(self, board_id: int, fen: str) -> None:
+    """ Reset the worker's copy of a game.
+
+    Args:
+      board_id (int): Board ID
+      fen (str): Position the game was reset to.
+    """
+    if self.handles(board_id):
+      self.generations[board_id] = self.generations.get(board_id, 0) + 1
+      self.commands[board_id].put(("reset", board_id, fen, self.generations[board_id]))
+
+  def stop(self) -> None:
+    """ Stop the workers and pumps and free the shared memory. """
+    if not self.running:
+      return
+    self.running = False
+
+    for commands in {id(queue): queue for queue in self.commands.values()}.values():
+      commands.put(("stop",))
+    for process in self.processes:
+      process.join(timeout=10.0)
+    self.events.put(None)
+    for thread in self._threads:
+      thread.join()
+    for ring in self.rings.values():
+      ring.close()
+
+    self.processes, self.commands, self.rings, self._threads = [], {}, {}, []
+    self.generations = {}
+
+  def _start_thread(self, target, *args) -> None:
+    """ Start a daemon helper thread. """
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    self._threads.append(thread)
+
+  def _pump(self, board_id: int) -> None:
+    """ Copy the detector frames of a board into its shared memory ring. """
+    camera = storage.boards[board_id].camera
+    subscription = camera.source.subscribe("worker", camera.detector.sampler_config.active_fps)
+    try:
+      while self.running:
+        frame = subscription.acquire(FRAME_WAIT_TIMEOUT_S)
+        if frame is None:
+          if not subscription.active:
+            break
+          continue
+        try:
+          ring = self.rings.get(board_id)
+          if ring is None:
+            # The ring is sized by the first frame, then the worker is told where to find it
+            ring = SharedFrameRing.create(frame.image.shape, SHARED_FRAME_SLOTS)
+            self.rings[board_id] = ring
+            self.commands[board_id].put(("attach", board_id, ring.name, ring.shape, ring.slots))
+          ring.write(frame.image)
+        except ValueError as error:
+          print(f"Skipping frame of board {board_id}: {error}")
+        finally:
+          subscription.release(frame)
+    finally:
+      subscription.close()
+
+  def _read_events(self) -> None:
+    """ Hand the move events of the workers to the application event loop. """
+    while True:
+      event = self.events.get()
+      if event is None:
+        return
+      _, board_id, generation, move, fen_before, fen_after = event
+      detector_runtime.call_in_loop(self._deliver, board_id, generation, move, fen_before, fen_after)
+
+  def _deliver(self, board_id: int, generation: int, move: str, fen_before: str, fen_after: str) -> None:
+    """ Mirror a worker's move onto the board and broadcast it. Runs on the event loop.
+
+    Args:
+      board_id (int): Board ID
+      generation (int): Reset generation of the worker's game when the move was played.
+      move (str): Chess move in SAN format.
+      fen_before (str): Position the move was played from.
+      fen_after (str): Position after the move.
+    """
+    from logic.api.services.board_service import BoardService
+
+    board = storage.boards.get(board_id)
+    if board is None or generation != self.generations.get(board_id, 0):
+      return
+    if board.chess_board.fen() == fen_before:
+      board.chess_board.push_san(move)
+    else:
+      # The board and the worker disagree, follow the worker's game
+      board.chess_board.set_fen(fen_after)
+    asyncio.ensure_future(BoardService().send_move(board_id, move))
+
+# Shared by every board of the API process
+worker_pool = DetectorWorkerPool()
@@ -0,0 +1,52 @@
+import types
+import unittest
+import chess
+from unittest.mock import MagicMock, patch
+import logic.api.services.board_storage as storage
+from logic.api.entity.detector import Detector
+from logic.api.services.board_service import BoardService
+
+class TestBoardService(unittest.IsolatedAsyncioTestCase):
+  """ Unit tests for the BoardService class. """
+
+  def setUp(self) -> None:
+    self.detector = Detector(1, MagicMock())
+    self.board = types.SimpleNamespace(
+      chess_board=chess.Board(),
+      hub=MagicMock(),
+      camera=types.SimpleNamespace(detector=self.detector)
+    )
+
+    def reset_board() -> str:
+      self.board.chess_board.reset()
+      return "reset"
+
+    self.board.reset_board = reset_board
+    self.boards = patch.dict(storage.boards, {1: self.board}, clear=True)
+    self.boards.start()
+
+  def tearDown(self) -> None:
+    self.boards.stop()
+
+  async def test_reset_game_clears_detector(self) -> None:
+    """ Test that resetting a game drops the evidence and greedy timers of the previous game. """
+    tracker = self.detector.tracker
+    tracker.state[12, 0] = 0.9
+    tracker.possible_moves.add("e4")
+    tracker.greedy_move_to_time["e4"] = 0.0
+    tracker.move_pending = True
+    self.detector.gate._reference = MagicMock()
+
+    with patch("logic.api.services.board_service.worker_pool") as worker_pool:
+      await BoardService().reset_game(1)
+
+    self.assertFalse(tracker.state.any())
+    self.assertEqual(tracker.possible_moves, set())
+    self.assertEqual(tracker.greedy_move_to_time, {})
+    self.assertFalse(tracker.move_pending)
+    self.assertIsNone(self.detector.gate._reference)
+    self.board.hub.publish.assert_called_once_with("reset")
+    worker_pool.reset.assert_called_once_with(1, chess.STARTING_FEN)
+
+if __name__ == "__main__":
+  unittest.main()
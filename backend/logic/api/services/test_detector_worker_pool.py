@@ -0,0 +1,64 @@
+import asyncio
+import types
+import unittest
+import chess
+from unittest.mock import AsyncMock, patch
+import logic.api.services.board_storage as storage
+from logic.api.services.board_service import BoardService
+from logic.api.services.detector_worker_pool import DetectorWorkerPool
+
+class TestDeliver(unittest.IsolatedAsyncioTestCase):
+  """ Unit tests for the mirroring of worker moves onto the boards. """
+
+  def setUp(self) -> None:
+    self.board = types.SimpleNamespace(chess_board=chess.Board())
+    self.boards = patch.dict(storage.boards, {1: self.board}, clear=True)
+    self.boards.start()
+    self.send_move = patch.object(BoardService, "send_move", new_callable=AsyncMock)
+    self.sent = self.send_move.start()
+    self.pool = DetectorWorkerPool()
+
+  def tearDown(self) -> None:
+    self.send_move.stop()
+    self.boards.stop()
+
+  def played(self, *moves: str) -> list:
+    """ Return the FENs of the starting position and after each move. """
+    board = chess.Board()
+    fens = [board.fen()]
+    for move in moves:
+      board.push_san(move)
+      fens.append(board.fen())
+    return fens
+
+  async def test_pushes_move_from_matching_position(self) -> None:
+    """ Test that a move played from the board's position is pushed, keeping the move stack. """
+    start, after = self.played("e4")
+    self.pool._deliver(1, 0, "e4", start, after)
+    await asyncio.sleep(0)
+
+    self.assertEqual(self.board.chess_board.fen(), after)
+    self.assertEqual([move.uci() for move in self.board.chess_board.move_stack], ["e2e4"])
+    self.sent.assert_awaited_once_with(1, "e4")
+
+  async def test_drops_moves_from_before_reset(self) -> None:
+    """ Test that a move the worker detected before a reset does not reach the new game. """
+    start, after = self.played("e4")
+    self.pool.generations[1] = 1
+    self.pool._deliver(1, 0, "e4", start, after)
+    await asyncio.sleep(0)
+
+    self.assertEqual(self.board.chess_board.fen(), chess.STARTING_FEN)
+    self.sent.assert_not_awaited()
+
+  async def test_resyncs_on_position_mismatch(self) -> None:
+    """ Test that the board follows the worker when it missed one of its moves. """
+    _, after_e4, after_e5 = self.played("e4", "e5")
+    self.pool._deliver(1, 0, "e5", after_e4, after_e5)
+    await asyncio.sleep(0)
+
+    self.assertEqual(self.board.chess_board.fen(), after_e5)
+    self.sent.assert_awaited_once_with(1, "e5")
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,140 @@
+import numpy as np
+
+from typing import Callable, Dict, List, Optional, Tuple
+from logic.machine_learning.detection.corners_detection import extract_xy_from_labeled_corners
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+from logic.machine_learning.maths.warp import get_inv_transform, transform_centers, transform_boundary, transform_xcorners, transform_square_map
+
+
+class BoardGeometry:
+    """
+    Everything derived from the labeled board corners that stays fixed while the corners do.
+
+    Attributes:
+        corners (Dict[str, Dict[str, Tuple[int, int]]]): The labeled corners the geometry was built from.
+        frame_shape (Tuple[int, int]): (height, width) of the frames the corners were detected in.
+        keypoints (List[Tuple[float, float]]): The corners in model coordinates, in CORNER_KEYS order.
+        inv_transform (np.ndarray): The 3x3 matrix mapping the ideal board square to model coordinates.
+        centers (np.ndarray): The 64 square centers in model coordinates as a (64, 2) array.
+        centers_3d (np.ndarray): The square centers as a (1, 64, 2) array.
+        boundary (np.ndarray): The 4 corners of the padded board boundary as a (4, 2) array.
+        boundary_3d (np.ndarray): The boundary as a (1, 4, 2) float32 array.
+        xcorners (np.ndarray): The 49 inner grid corners in model coordinates as a (49, 2) float32 array.
+        square_map (np.ndarray): The square index of every model input pixel, -1 off the board, as a (288, 480) int8 array.
+        frame_roi (List[int]): Bounding box [xmin, ymin, xmax, ymax] of the boundary in frame pixels.
+        centers_px (np.ndarray): The square centers in frame pixels as a (64, 2) float32 array.
+    """
+
+    def __init__(self, corners: Dict[str, Dict[str, Tuple[int, int]]], frame: np.ndarray):
+        """
+        Args:
+            corners (Dict[str, Dict[str, Tuple[int, int]]]): The labeled corners from ``get_board_corners``.
+            frame (np.ndarray): A frame of the video the corners were detected in.
+        """
+        self.corners = corners
+        self.frame_shape: Tuple[int, int] = frame.shape[:2]
+        self.keypoints: List[Tuple[float, float]] = extract_xy_from_labeled_corners(corners, frame)
+        self.inv_transform: np.ndarray = get_inv_transform(self.keypoints)
+        self.centers, self.centers_3d = transform_centers(self.inv_transform)
+        self.boundary, self.boundary_3d = transform_boundary(self.inv_transform)
+        self.xcorners: np.ndarray = transform_xcorners(self.inv_transform)
+        self.square_map: np.ndarray = transform_square_map(self.inv_transform)
+        self.frame_roi: List[int] = get_frame_roi(self.boundary_3d[0], self.frame_shape)
+        scale = np.array([self.frame_shape[1] / MODEL_WIDTH, self.frame_shape[0] / MODEL_HEIGHT], dtype=np.float32)
+        self.centers_px: np.ndarray = self.centers_3d[0].astype(np.float32) * scale
+
+    def fits(self, frame: np.ndarray) -> bool:
+        """
+        Checks whether the geometry was computed for frames of this size.
+
+        Args:
+            frame (np.ndarray): The current video frame.
+
+        Returns:
+            bool: True if the frame has the same height and width as the frames the geometry was built from.
+        """
+        return frame.shape[:2] == self.frame_shape
+
+
+def get_frame_roi(points: np.ndarray, frame_shape: Tuple[int, int]) -> List[int]:
+    """
+    Computes the pixel bounding box of points given in model coordinates.
+
+    Args:
+        points (np.ndarray): (N, 2) points in model coordinates.
+        frame_shape (Tuple[int, int]): (height, width) of the frame.
+
+    Returns:
+        List[int]: [xmin, ymin, xmax, ymax] in frame pixels, clipped to the frame.
+    """
+    height, width = frame_shape
+    xs = points[:, 0] * (width / MODEL_WIDTH)
+    ys = points[:, 1] * (height / MODEL_HEIGHT)
+    return [
+        int(np.clip(np.floor(xs.min()), 0, width)),
+        int(np.clip(np.floor(ys.min()), 0, height)),
+        int(np.clip(np.ceil(xs.max()), 0, width)),
+        int(np.clip(np.ceil(ys.max()), 0, height))
+    ]
+
+
+class GeometryCache:
+    """
+    Holds the geometry of one board between frames and notifies listeners when it is invalidated.
+
+    The geometry is computed once when the corners are found and reused for every frame until
+    the corners are re-detected, the frame size changes, or ``invalidate`` is called.
+    """
+
+    def __init__(self):
+        self.geometry: Optional[BoardGeometry] = None
+        self.builds = 0
+        self._invalidation_hooks: List[Callable[[], None]] = []
+
+    def add_invalidation_hook(self, hook: Callable[[], None]) -> None:
+        """
+        Registers a callback run whenever the cached geometry is dropped or replaced.
+
+        Args:
+            hook (Callable[[], None]): The callback, e.g. to reset state that depends on the square layout.
+        """
+        self._invalidation_hooks.append(hook)
+
+    def set_corners(self, corners: Dict[str, Dict[str, Tuple[int, int]]], frame: np.ndarray) -> BoardGeometry:
+        """
+        Builds the geometry of newly detected corners, replacing the cached one.
+
+        Args:
+            corners (Dict[str, Dict[str, Tuple[int, int]]]): The labeled corners from ``get_board_corners``.
+            frame (np.ndarray): The frame the corners were detected in.
+
+        Returns:
+            BoardGeometry: The new geometry.
+        """
+        if self.geometry is not None:
+            self.invalidate()
+        self.geometry = BoardGeometry(corners, frame)
+        self.builds += 1
+        return self.geometry
+
+    def get(self, frame: np.ndarray) -> Optional[BoardGeometry]:
+        """
+        Returns the cached geometry, dropping it if the frame size changed.
+
+        The labeled corners are pixels of the old frame size, so the corners have to be detected again.
+
+        Args:
+            frame (np.ndarray): The current video frame.
+
+        Returns:
+            Optional[BoardGeometry]: The geometry, or None if no corners have been set or the frame size changed.
+        """
+        if self.geometry is not None and not self.geometry.fits(frame):
+            self.invalidate()
+        return self.geometry
+
+    def invalidate(self) -> None:
+        """ Drops the cached geometry and runs the invalidation hooks. """
+        self.geometry = None
+        for hook in self._invalidation_hooks:
+            hook()
@@ -0,0 +1,257 @@
+import time
+import chess.polyglot
+import numpy as np
+import onnxruntime as ort
+
+from typing import Dict, Optional, Tuple
+from logic.machine_learning.detection.piece_detection import detect
+from logic.machine_learning.utilities.move import san_to_lan
+from logic.machine_learning.utilities.move_index import MoveIndex, MoveIndexCache
+from logic.machine_learning.utilities.preprocess import Letterbox
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+from logic.machine_learning.game.game import make_update_payload
+from logic.machine_learning.view.render import draw_overlay
+from logic.machine_learning.board_state.board_geometry import BoardGeometry, GeometryCache
+from logic.machine_learning.board_state.map_pieces import get_squares, get_update, update_state, process_state
+from logic.machine_learning.utilities.constants import (
+    MODEL_WIDTH, MODEL_HEIGHT, ROI_MARGIN, ROI_UPDATE_TOLERANCE, ROI_PIECE_SCORE, ROI_MIN_PIECE_RATIO, ROI_LOST_INFERENCES
+)
+
+
+class BoardTracker:
+    """
+    Everything one board's detector remembers between frames.
+
+    The 64x12 state accumulates piece evidence across frames, so a move is recognised once it has
+    been seen consistently rather than from a single frame. Each board owns its tracker, so boards
+    never share timers or state and need no locks.
+
+    Attributes:
+        board_id (int): The board the tracker belongs to.
+        geometry_cache (GeometryCache): Geometry of the board's corners. A new geometry resets the state.
+        move_index_cache (MoveIndexCache): Legal moves and replies of the current position.
+        state (np.ndarray): The (64, 12) float32 piece evidence, updated in place.
+        possible_moves (set): Moves that have scored above zero since the last move was played.
+        greedy_move_to_time (Dict[str, float]): When each single-move candidate was first seen.
+        move_pending (bool): True if the last inference saw a new move that waits for the greedy delay.
+        roi_keypoints (Optional[np.ndarray]): Padded region of the board in model coordinates, as the
+            (4, 2) corners of its bounding box. Both models only look inside it while it is set.
+    """
+
+    def __init__(self, board_id: int, greedy_delay: float = 1.0):
+        """
+        Args:
+            board_id (int): The board the tracker belongs to.
+            greedy_delay (float): Seconds a single move must stay the best candidate before it is played.
+        """
+        self.board_id = board_id
+        self.greedy_delay = greedy_delay
+
+        self.geometry_cache = GeometryCache()
+        self.geometry_cache.add_invalidation_hook(self.reset_state)
+        self.move_index_cache = MoveIndexCache()
+
+        self.state = np.zeros((64, 12), dtype=np.float32)
+        self.possible_moves = set()
+        self.greedy_move_to_time: Dict[str, float] = {}
+        self.move_pending = False
+
+        self.roi_keypoints: Optional[np.ndarray] = None
+        self.low_confidence_inferences = 0
+
+        self.updates = 0
+        self.moves_played = 0
+        self.roi_detections = 0
+        self.full_frame_detections = 0
+        self.roi_losses = 0
+
+    def reset_state(self) -> None:
+        """ Forgets the accumulated evidence, e.g. when the squares moved or the game was reset. """
+        self.state.fill(0)
+        self.possible_moves.clear()
+        self.greedy_move_to_time = {}
+        self.move_pending = False
+
+    def set_corners(self, corners: Dict[str, Dict[str, Tuple[int, int]]], frame: np.ndarray) -> BoardGeometry:
+        """
+        Builds the geometry of newly detected corners and moves the tracked region onto them.
+
+        Args:
+            corners (Dict[str, Dict[str, Tuple[int, int]]]): The labeled corners from ``get_board_corners``.
+            frame (np.ndarray): The frame the corners were detected in.
+
+        Returns:
+            BoardGeometry: The new geometry.
+        """
+        if self.roi_keypoints is None:
+            self.full_frame_detections += 1
+        else:
+            self.roi_detections += 1
+
+        geometry = self.geometry_cache.set_corners(corners, frame)
+        self.update_roi(geometry.boundary_3d[0])
+        self.low_confidence_inferences = 0
+        return geometry
+
+    def update_roi(self, points: np.ndarray) -> None:
+        """
+        Moves the tracked region onto the padded bounding box of the points.
+
+        The region only moves when one of its edges is off by more than ROI_UPDATE_TOLERANCE, so the
+        crop fed to the models stays the same from frame to frame.
+
+        Args:
+            points (np.ndarray): (N, 2) points of the board in model coordinates.
+        """
+        xmin, ymin = points.min(axis=0)
+        xmax, ymax = points.max(axis=0)
+        pad_x = (xmax - xmin) * ROI_MARGIN
+        pad_y = (ymax - ymin) * ROI_MARGIN
+        xmin, xmax = max(xmin - pad_x, 0), min(xmax + pad_x, MODEL_WIDTH)
+        ymin, ymax = max(ymin - pad_y, 0), min(ymax + pad_y, MODEL_HEIGHT)
+
+        roi = np.array([[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax]], dtype=np.float32)
+        if self.roi_keypoints is None or np.abs(roi - self.roi_keypoints).max() > ROI_UPDATE_TOLERANCE:
+            self.roi_keypoints = roi
+
+    def lose_roi(self) -> None:
+        """ Forgets the tracked region, the next detection searches the whole frame. """
+        self.roi_keypoints = None
+        self.roi_losses += 1
+
+    def check_confidence(self, update: np.ndarray, board) -> None:
+        """
+        Drops the geometry when too few of the game's pieces have been seen for several inferences,
+        so the corners are detected again, first inside the tracked region.
+
+        Args:
+            update (np.ndarray): The (64, 12) piece scores of the last inference.
+            board (chess.Board): The game before the move of the inference, if any, was played.
+        """
+        expected = len(board.piece_map())
+        seen = int(np.count_nonzero(update.max(axis=1) >= ROI_PIECE_SCORE))
+        if expected == 0 or seen >= expected * ROI_MIN_PIECE_RATIO:
+            self.low_confidence_inferences = 0
+            return
+
+        self.low_confidence_inferences += 1
+        if self.low_confidence_inferences >= ROI_LOST_INFERENCES:
+            self.low_confidence_inferences = 0
+            self.geometry_cache.invalidate()
+
+    def add_evidence(self, boxes: np.ndarray, scores: np.ndarray, geometry: BoardGeometry) -> np.ndarray:
+        """
+        Maps the detections of a frame onto the squares and adds them to the state.
+
+        Args:
+            boxes (np.ndarray): The (N, 4) boxes of the pieces model.
+            scores (np.ndarray): The (N, 12) scores of the boxes.
+            geometry (BoardGeometry): Geometry of the frame.
+
+        Returns:
+            np.ndarray: The (64, 12) piece scores of the frame.
+        """
+        squares = get_squares(boxes, geometry.square_map)
+        update = get_update(scores, squares)
+        update_state(self.state, update)
+        self.updates += 1
+        return update
+
+    async def get_payload(
+        self,
+        piece_model_ref: ort.InferenceSession,
+        video_ref: np.ndarray,
+        game_ref,
+        letterbox: Optional[Letterbox] = None,
+        geometry: Optional[BoardGeometry] = None
+    ) -> Tuple[np.ndarray, Optional[tuple]]:
+        """
+        Runs the pieces model on a frame, updates the state and plays the move it shows, if any.
+
+        Args:
+            piece_model_ref (ort.InferenceSession): Session of the pieces model.
+            video_ref (np.ndarray): The current frame, shared and left untouched.
+            game_ref: The Board of the API process, or the shadow game of a detector worker process.
+            letterbox (Optional[Letterbox]): Input buffers of the board.
+            geometry (Optional[BoardGeometry]): Geometry of the frame, taken from the cache if omitted.
+
+        Returns:
+            Tuple[np.ndarray, Optional[tuple]]: The frame with the debug overlay, and the update payload
+                with the data of the move played, or None if no move was played.
+        """
+        geometry = geometry or self.geometry_cache.get(video_ref)
+
+        # Legal moves and replies are only re-enumerated when the position changes. The pool works
+        # on a copy, the game itself may be reset on the event loop in the meantime
+        move_index: MoveIndex = await detector_runtime.run_cpu(self.move_index_cache.get, game_ref.chess_board.copy(stack=False))
+        position = self.move_index_cache.key
+
+        # The stable region keeps the crop, and with it the input of the model, the same between frames
+        keypoints = self.roi_keypoints if self.roi_keypoints is not None else geometry.keypoints
+        boxes, scores = await detect(piece_model_ref, video_ref, keypoints, letterbox)
+        update = await detector_runtime.run_cpu(self.add_evidence, boxes, scores, geometry)
+        self.check_confidence(update, game_ref.chess_board)
+
+        best_score1, best_score2, best_joint_score, best_move, best_moves = await detector_runtime.run_cpu(
+            process_state, self.state, move_index, self.possible_moves
+        )
+
+        now = time.monotonic()
+        board = game_ref.chess_board
+        if chess.polyglot.zobrist_hash(board) != position:
+            # The game was reset or moved on during inference, the moves scored do not apply to it
+            best_moves = best_move = None
+        last_move = board.peek().uci() if board.move_stack else None
+        played = None
+
+        if best_moves is not None:
+            move_str = best_moves["sans"][0]
+            if best_score2 > 0 and best_joint_score > 0 and move_str in self.possible_moves:
+                board.push_san(move_str)
+                self.possible_moves.clear()
+                self.greedy_move_to_time = {}
+                played = best_moves
+
+        greedy = False
+        self.move_pending = False
+        if played is None and best_move is not None and best_score1 > 0:
+            move_str = best_move["sans"][0]
+            first_seen = self.greedy_move_to_time.setdefault(move_str, now)
+
+            elapsed = (now - first_seen) > self.greedy_delay
+            is_new = san_to_lan(board, move_str) != last_move
+
+            if elapsed and is_new:
+                board.push_san(move_str)
+                # Keep the time of the move just played, so it is not played again right away
+                self.greedy_move_to_time = {move_str: first_seen}
+                played = best_move
+                greedy = True
+            else:
+                self.move_pending = is_new
+
+        payload = None
+        if played is not None:
+            self.moves_played += 1
+            payload = make_update_payload(board, greedy), played
+
+        # The frame is shared with the other subscribers of the camera, draw on a copy
+        overlay = await detector_runtime.run_cpu(draw_overlay, video_ref, geometry.centers, geometry.boundary, boxes, scores)
+
+        return overlay, payload
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: State updates, moves played, geometry builds, corner detections inside the tracked region
+                and on the whole frame, lost regions and move index rebuilds of the board.
+        """
+        return {
+            "updates": self.updates,
+            "moves": self.moves_played,
+            "roi_detections": self.roi_detections,
+            "full_frame_detections": self.full_frame_detections,
+            "roi_losses": self.roi_losses,
+            "geometry_builds": self.geometry_cache.builds,
+            "move_index_builds": self.move_index_cache.rebuilds
+        }
@@ -0,0 +1,136 @@
+import time
+import numpy as np
+
+from typing import List, Optional
+from logic.machine_learning.board_state.board_geometry import BoardGeometry
+from logic.machine_learning.utilities.constants import (
+    DRIFT_CHECK_INTERVAL_S, DRIFT_THRESHOLD, DRIFT_MIN_XCORNERS, DRIFT_CONFIRMATIONS
+)
+
+
+def measure_drift(expected: np.ndarray, detected: np.ndarray) -> float:
+    """
+    Measures how far detected x-corners lie from the grid the geometry expects.
+
+    Each detected x-corner is matched with the nearest expected one. The median distance ignores
+    the few false detections, and is divided by the spacing of the grid so the same threshold
+    holds for near and far boards.
+
+    Args:
+        expected (np.ndarray): (49, 2) x-corners of the cached geometry in model coordinates.
+        detected (np.ndarray): (N, 2) x-corners found in the current frame, N > 0.
+
+    Returns:
+        float: Median distance to the expected grid, in squares.
+    """
+    distances = np.linalg.norm(detected[:, None, :] - expected[None, :, :], axis=2)
+
+    # Spacing of the grid, the median distance from each expected x-corner to its nearest neighbour
+    spacing = np.linalg.norm(expected[:, None, :] - expected[None, :, :], axis=2)
+    np.fill_diagonal(spacing, np.inf)
+
+    return float(np.median(distances.min(axis=1)) / max(np.median(spacing.min(axis=1)), 1e-6))
+
+
+class DriftMonitor:
+    """
+    Notices when the camera or the board has moved since the corners were detected.
+
+    Every ``interval`` seconds the x-corners model is run inside the tracked region and its
+    detections are compared with the x-corners of the cached geometry. This costs one light
+    inference instead of a full corner detection. The geometry is only dropped after
+    ``confirmations`` checks in a row found it off by more than ``threshold`` squares, so a single
+    bad detection does not trigger a re-detection. Checks with too few x-corners, e.g. while a
+    hand covers the board, are inconclusive.
+    """
+
+    def __init__(
+        self,
+        interval: float = DRIFT_CHECK_INTERVAL_S,
+        threshold: float = DRIFT_THRESHOLD,
+        min_xcorners: int = DRIFT_MIN_XCORNERS,
+        confirmations: int = DRIFT_CONFIRMATIONS
+    ):
+        """
+        Args:
+            interval (float): Seconds between checks.
+            threshold (float): Median distance, in squares, above which the geometry counts as moved.
+            min_xcorners (int): Detected x-corners needed for a conclusive check.
+            confirmations (int): Checks in a row that must find drift before a re-detection.
+        """
+        self.interval = interval
+        self.threshold = threshold
+        self.min_xcorners = min_xcorners
+        self.confirmations = confirmations
+
+        self.last_check: Optional[float] = None
+        self.pending = 0
+        self.last_drift: Optional[float] = None
+
+        self.checks = 0
+        self.inconclusive = 0
+        self.redetections = 0
+
+    def reset(self) -> None:
+        """ Restarts the interval, e.g. when a new geometry was built. """
+        self.last_check = None
+        self.pending = 0
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """
+        Args:
+            now (Optional[float]): Monotonic time of the frame, the current time if None.
+
+        Returns:
+            bool: True if a check should run on this frame. Checks follow each other right away
+                while drift waits for confirmation.
+        """
+        now = time.monotonic() if now is None else now
+        if self.last_check is None:
+            self.last_check = now
+            return False
+        return self.pending > 0 or now - self.last_check >= self.interval
+
+    def check(self, geometry: BoardGeometry, xcorners: List[List[float]], now: Optional[float] = None) -> bool:
+        """
+        Compares the x-corners of a frame with the geometry.
+
+        Args:
+            geometry (BoardGeometry): The cached geometry of the board.
+            xcorners (List[List[float]]): X-corners detected in the frame, in model coordinates.
+            now (Optional[float]): Monotonic time of the frame, the current time if None.
+
+        Returns:
+            bool: True if the board has moved and its corners must be detected again.
+        """
+        self.last_check = time.monotonic() if now is None else now
+        self.checks += 1
+
+        if len(xcorners) < self.min_xcorners:
+            self.inconclusive += 1
+            return False
+
+        self.last_drift = measure_drift(geometry.xcorners, np.asarray(xcorners, dtype=np.float32))
+        if self.last_drift <= self.threshold:
+            self.pending = 0
+            return False
+
+        self.pending += 1
+        if self.pending < self.confirmations:
+            return False
+
+        self.pending = 0
+        self.redetections += 1
+        return True
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Checks run, inconclusive checks, re-detections triggered and the last drift measured.
+        """
+        return {
+            "checks": self.checks,
+            "inconclusive": self.inconclusive,
+            "redetections": self.redetections,
+            "last_drift": self.last_drift
+        }
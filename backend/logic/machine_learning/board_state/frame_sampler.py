@@ -0,0 +1,158 @@
+import time
+import cv2
+import numpy as np
+
+from typing import Optional, Sequence, Tuple
+from logic.machine_learning.utilities.constants import (
+    DETECTOR_MAX_FPS, SAMPLER_IDLE_FPS, SAMPLER_MOTION_THRESHOLD, SAMPLER_ACTIVE_HOLD_S, SAMPLER_MOTION_SIZE
+)
+
+
+class SamplerConfig:
+    """
+    Per-board settings of the adaptive frame sampler.
+
+    Attributes:
+        active_fps (float): Frames processed per second while the board is moving. Also the rate the detector subscribes at.
+        idle_fps (float): Frames processed per second while the board is static.
+        motion_threshold (float): Mean absolute grey-level difference (0-255) between frames that counts as motion.
+        active_hold (float): Seconds the sampler stays active after the last motion.
+        motion_size (Tuple[int, int]): (width, height) the board region is shrunk to before differencing.
+    """
+
+    def __init__(
+        self,
+        active_fps: float = DETECTOR_MAX_FPS,
+        idle_fps: float = SAMPLER_IDLE_FPS,
+        motion_threshold: float = SAMPLER_MOTION_THRESHOLD,
+        active_hold: float = SAMPLER_ACTIVE_HOLD_S,
+        motion_size: Tuple[int, int] = SAMPLER_MOTION_SIZE
+    ):
+        """
+        Raises:
+            ValueError: If a frame rate is not positive or the idle rate is above the active rate.
+        """
+        if active_fps <= 0 or idle_fps <= 0:
+            raise ValueError("Frame rates must be positive.")
+        if idle_fps > active_fps:
+            raise ValueError("The idle frame rate cannot be above the active frame rate.")
+
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.motion_threshold = motion_threshold
+        self.active_hold = active_hold
+        self.motion_size = tuple(motion_size)
+
+
+class AdaptiveSampler:
+    """
+    Decides which frames of a board are worth running the detector on.
+
+    Every frame is shrunk to a small grey thumbnail of the board region and compared with the
+    previous one. While the board moves, frames are processed at the active rate; once it has
+    been still for ``active_hold`` seconds, the sampler drops to the idle rate.
+    """
+
+    def __init__(self, config: Optional[SamplerConfig] = None):
+        """
+        Args:
+            config (Optional[SamplerConfig]): Settings of the board, defaults from the constants if omitted.
+        """
+        self.config = config or SamplerConfig()
+
+        width, height = self.config.motion_size
+        self._small = np.empty((height, width, 3), dtype=np.uint8)
+        self._grey = np.empty((height, width), dtype=np.uint8)
+        self._previous = np.empty((height, width), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._has_previous = False
+
+        self.last_motion = float("-inf")
+        self.last_processed = float("-inf")
+        self.last_motion_level = 0.0
+
+        self.frames_seen = 0
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.motion_frames = 0
+
+    @property
+    def active(self) -> bool:
+        """ Whether the board moved within the last ``active_hold`` seconds. """
+        return time.monotonic() - self.last_motion <= self.config.active_hold
+
+    def measure_motion(self, frame: np.ndarray, roi: Optional[Sequence[int]] = None) -> float:
+        """
+        Measures how much the board region changed since the previous frame.
+
+        Args:
+            frame (np.ndarray): The current BGR frame.
+            roi (Optional[Sequence[int]]): Board region [xmin, ymin, xmax, ymax] in pixels, the whole frame if None.
+
+        Returns:
+            float: Mean absolute grey-level difference, infinite for the first frame.
+        """
+        if roi is not None and roi[2] > roi[0] and roi[3] > roi[1]:
+            frame = frame[roi[1]:roi[3], roi[0]:roi[2]]
+
+        cv2.resize(frame, self.config.motion_size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._grey)
+
+        if not self._has_previous:
+            level = float("inf")
+        else:
+            cv2.absdiff(self._grey, self._previous, dst=self._diff)
+            level = cv2.mean(self._diff)[0]
+
+        self._grey, self._previous = self._previous, self._grey
+        self._has_previous = True
+        return level
+
+    def should_process(self, frame: np.ndarray, roi: Optional[Sequence[int]] = None, now: Optional[float] = None) -> bool:
+        """
+        Records a frame and decides whether the detector should run on it.
+
+        Args:
+            frame (np.ndarray): The current BGR frame.
+            roi (Optional[Sequence[int]]): Board region [xmin, ymin, xmax, ymax] in pixels, the whole frame if None.
+            now (Optional[float]): Monotonic time of the frame, the current time if None.
+
+        Returns:
+            bool: True if the frame should be processed.
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_seen += 1
+
+        self.last_motion_level = self.measure_motion(frame, roi)
+        if self.last_motion_level >= self.config.motion_threshold:
+            self.last_motion = now
+            self.motion_frames += 1
+
+        active = now - self.last_motion <= self.config.active_hold
+        interval = 1.0 / (self.config.active_fps if active else self.config.idle_fps)
+
+        # Half an active frame of slack, so jitter in frame delivery does not skip every other frame
+        if now - self.last_processed >= interval - 0.5 / self.config.active_fps:
+            self.last_processed = now
+            self.frames_processed += 1
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def reset(self) -> None:
+        """ Forgets the previous frame, e.g. when the board region changes. """
+        self._has_previous = False
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Frames seen, processed and skipped, frames with motion, and whether the board is active.
+        """
+        return {
+            "seen": self.frames_seen,
+            "processed": self.frames_processed,
+            "skipped": self.frames_skipped,
+            "motion": self.motion_frames,
+            "active": self.active
+        }
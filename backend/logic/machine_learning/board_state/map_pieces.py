@@ -1,121 +1,23 @@
 import numpy as np
-import tensorflow as tf
-import time
-import onnxruntime as ort
 
-
-from logic.machine_learning.detection.piece_detection import detect
 from logic.machine_learning.detection.bbox_scores import get_bbox_centers
-from logic.machine_learning.detection.corners_detection import extract_xy_from_labeled_corners
-from logic.machine_learning.utilities.move import san_to_lan, calculate_move_score, get_moves_pairs
-from logic.machine_learning.game.game import make_update_payload
-from logic.machine_learning.view.render import draw_points, draw_polygon, draw_boxes_with_scores
-from logic.machine_learning.detection.run_detections import find_centers_and_boundary
-import logic.api.services.board_storage as storage
-
-import time
-
-last_update_time = 0
-greedy_move_to_time = {}
- 
-async def get_payload(piece_model_ref: ort.InferenceSession,
-                      video_ref: np.ndarray,
-                      corners_ref: np.ndarray,
-                      board_id: int):
-    global greedy_move_to_time
-    global last_update_time
-
-    # Get the correct board instance
-    game_ref = storage.boards[board_id]    
-    moves_pairs_ref: list = get_moves_pairs(game_ref.chess_board)
-
-    # Internal state variables
-    centers = None
-    boundary = None
-    centers_3d = None
-    boundary_3d = None
-    state = None
-    payload = None
-    keypoints = None
-    possible_moves = set()
-    
-    last_move = game_ref.move_history[-1] if game_ref.move_history else None
-    
-    if centers is None:
-        keypoints = extract_xy_from_labeled_corners(corners_ref, video_ref)
-        centers, boundary, centers_3d, boundary_3d = find_centers_and_boundary(corners_ref, video_ref)
-        state = np.zeros((64, 12))
-        possible_moves = set()
-
-    boxes, scores = await detect(piece_model_ref, video_ref, keypoints)
-    del piece_model_ref  # Free memory
-    
-
-    squares = get_squares(boxes, centers_3d, boundary_3d)
-    
-    update = np.zeros((64, 12))  # Default update
-    if time.time() - last_update_time >= 0.5:
-        update = get_update(scores, squares)
-        last_update_time = time.time()
-
-    # Update state
-    state = update_state(state, update)
-
-    # Get best moves
-    best_score1, best_score2, best_joint_score, best_move, best_moves = process_state(
-        state, moves_pairs_ref, possible_moves
-    )
-
-    end_time = time.time()
-
-    has_move = False
-    if best_moves is not None:
-        move_str = best_moves["sans"][0]
-        has_move = (best_score2 > 0 and best_joint_score > 0 and move_str in possible_moves)
-        if has_move:
-            game_ref.chess_board.push_san(move_str)
-            last_move = game_ref.chess_board.peek().uci()
-            possible_moves.clear()
-            greedy_move_to_time = {}  # Reset for greedy moves
-
-    has_greedy_move = False
-    if best_move is not None and not has_move and best_score1 > 0:
-        move_str = best_move["sans"][0]
-
-        if move_str not in greedy_move_to_time:
-            greedy_move_to_time[move_str] = end_time
-
-        elapsed = (end_time - greedy_move_to_time[move_str]) > 1.0
-        is_new = san_to_lan(game_ref.chess_board, move_str) != last_move
-
-        has_greedy_move = elapsed and is_new
-
-        if has_greedy_move:
-            game_ref.chess_board.push_san(move_str)
-            last_move = game_ref.chess_board.peek().uci()
-            greedy_move_to_time = {move_str: greedy_move_to_time[move_str]}  # Preserve last move time
-
-    if has_move or has_greedy_move:
-        greedy = has_greedy_move
-        payload = make_update_payload(game_ref.chess_board, greedy), best_move
-
-    draw_points(video_ref, centers)
-    draw_polygon(video_ref, boundary)
-    draw_boxes_with_scores(video_ref, boxes, scores)
-    
-
-    return video_ref, payload
-
-
-
-def process_state(state: np.ndarray, moves_pairs: list, possible_moves: set) -> tuple:
+from logic.machine_learning.utilities.move_index import MoveIndex
+
+
+def process_state(state: np.ndarray, move_index: MoveIndex, possible_moves: set, from_thr: float = 0.6, to_thr: float = 0.6) -> tuple:
     """
     Processes the game state and determines the best possible moves.
 
+    Every single move, reply and move pair of the index is scored at once with one gather
+    and sum over the 64x12 state. Ties are resolved in move order, so the result is the
+    same as scoring the moves one by one with ``calculate_move_score``.
+
     Args:
         state (np.ndarray): The current game state (64x12 array).
-        moves_pairs (list): List of possible move pairs.
-        possible_moves (set): A set of possible moves.
+        move_index (MoveIndex): Index of the legal moves and move pairs of the position.
+        possible_moves (set): A set of possible moves, extended with every move scoring above 0.
+        from_thr (float): Threshold for scoring the 'from' squares. Default is 0.6.
+        to_thr (float): Threshold for scoring the 'to' squares. Default is 0.6.
 
     Returns:
         tuple: A tuple containing the best scores and moves.
@@ -125,152 +27,123 @@ def process_state(state: np.ndarray, moves_pairs: list, possible_moves: set) ->
     best_joint_score = float('-inf')
     best_move = None
     best_moves = None
-    seen = set()
-    
-    for move_pair in moves_pairs:
-        move1_san = move_pair['move1']['sans'][0]
-
-        if move1_san not in seen:
-            seen.add(move1_san)
-            score = calculate_move_score(state, move_pair['move1'])
-
-            if score > 0:
-                possible_moves.add(move1_san)
-
-            if score > best_score1:
-                best_move = move_pair['move1']
-                best_score1 = score
-        if (
-            move_pair['move2'] is None 
-            or move_pair['moves'] is None 
-            or move1_san not in possible_moves
-        ):
-            continue
-
-        score2 = calculate_move_score(state, move_pair['move2'])
-        if score2 < 0:
-            continue
-        if score2 > best_score2:
-            best_score2 = score2
-
-        joint_score = calculate_move_score(state, move_pair['moves'])
-        if joint_score > best_joint_score:
-            best_joint_score = joint_score
-            best_moves = move_pair['moves']
-    
+
+    if len(move_index) == 0:
+        return best_score1, best_score2, best_joint_score, best_move, best_moves
+
+    from_terms, to_terms = get_square_terms(state, from_thr, to_thr)
+
+    single_scores = from_terms[move_index.single_from].sum(axis=1) + to_terms[move_index.single_state_idx].sum(axis=1)
+
+    possible_moves.update(san for san, score in zip(move_index.single_sans, single_scores) if score > 0)
+    best = int(np.argmax(single_scores))
+    best_score1 = float(single_scores[best])
+    best_move = move_index.single_data(best)
+
+    is_possible = np.array([san in possible_moves for san in move_index.single_sans])
+    candidates = np.flatnonzero(is_possible[move_index.pair_move1])
+
+    reply_scores = from_terms[move_index.reply_from[candidates]].sum(axis=1) + to_terms[move_index.reply_state_idx[candidates]].sum(axis=1)
+    candidates = candidates[reply_scores >= 0]
+    if candidates.size == 0:
+        return best_score1, best_score2, best_joint_score, best_move, best_moves
+
+    best_score2 = float(np.max(reply_scores[reply_scores >= 0]))
+
+    joint_scores = from_terms[move_index.pair_from[candidates]].sum(axis=1) + to_terms[move_index.pair_state_idx[candidates]].sum(axis=1)
+    best = int(np.argmax(joint_scores))
+    best_joint_score = float(joint_scores[best])
+    best_moves = move_index.pair_data(int(candidates[best]))
+
     return best_score1, best_score2, best_joint_score, best_move, best_moves
 
 
-def get_squares(boxes: tf.Tensor, centers3D: tf.Tensor, boundary3D: tf.Tensor) -> tf.Tensor:
-    #Not working as intended
+def get_square_terms(state: np.ndarray, from_thr: float, to_thr: float) -> tuple:
     """
-    Given the boxes, centers, and boundary, computes the square for each box by 
-    determining the index of the minimum distance between box centers and the provided centers.
+    Precomputes the per-square score terms of ``calculate_move_score``, with a trailing 0 for padded slots.
+
+    Indexing with NO_SQUARE (-1) picks the trailing 0, so padded from/to slots add nothing to a sum.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 6) representing N 3D boxes. Each box is 
-                            represented by its (xmin, ymin, zmin, xmax, ymax, zmax).
-        centers3D (tf.Tensor): A tensor of shape (M, 3) representing M 3D centers.
-        boundary3D (tf.Tensor): A tensor of shape (1, 4, 2) representing boundary coordinates for the boxes.
+        state (np.ndarray): The current game state (64x12 array).
+        from_thr (float): Threshold for scoring the 'from' squares.
+        to_thr (float): Threshold for scoring the 'to' squares.
 
     Returns:
-        tf.Tensor: A tensor of shape (N,) representing the square (index) for each box based on the distance to centers3D.
+        tuple: The (65,) 'from' terms per square and the (64 * 12 + 1,) 'to' terms per square and label.
     """
-    with tf.device('/CPU:0'):
-        # Get the box centers
-        box_centers_3D = tf.expand_dims(get_bbox_centers(boxes), 1)
-
-        # Calculate distances
-        dist = tf.reduce_sum(tf.square(box_centers_3D - centers3D), axis=2)
-
-        # Get squares by finding the index of minimum distances
-        squares = tf.argmin(dist, axis=1)
-
-        # Shift the boundary3D tensor
-        shifted_boundary_3D = tf.concat([
-            tf.slice(boundary3D, [0, 1, 0], [1, 3, 2]),
-            tf.slice(boundary3D, [0, 0, 0], [1, 1, 2]),
-        ], axis=1)
-
-        n_boxes = tf.shape(box_centers_3D)[0]
-
-        # Calculate a, b, c, and d tensors
-        a = tf.squeeze(tf.subtract(
-            tf.slice(boundary3D, [0, 0, 0], [1, 4, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 0], [1, 4, 1])
-        ), axis=2)
-
-        b = tf.squeeze(tf.subtract(
-            tf.slice(boundary3D, [0, 0, 1], [1, 4, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 1], [1, 4, 1])
-        ), axis=2)
-
-        c = tf.squeeze(tf.subtract(
-            tf.slice(box_centers_3D, [0, 0, 0], [n_boxes, 1, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 0], [1, 4, 1])
-        ), axis=2)
-
-        d = tf.squeeze(tf.subtract(
-            tf.slice(box_centers_3D, [0, 0, 1], [n_boxes, 1, 1]),
-            tf.slice(shifted_boundary_3D, [0, 0, 1], [1, 4, 1])
-        ), axis=2)
-
-        # Calculate determinant
-        det = tf.subtract(tf.multiply(a, d), tf.multiply(b, c))
-
-        # Apply tf.where condition for negative det values
-        # Determinant is negative for all values so new_squares isn't used
-        new_squares = tf.where(
-            tf.reduce_any(tf.less(det, 0), axis=1),  # Check if any det < 0 along axis 1
-            tf.constant(-1, dtype=squares.dtype),    # Replace with -1
-            squares                                   # Otherwise, keep original squares
-        )
-
-        return squares
-
-def get_update(scores_tensor: tf.Tensor, squares: tf.Tensor) -> np.ndarray:
+    from_terms = np.append(1 - np.max(state, axis=1) - from_thr, 0)
+    to_terms = np.append(state.ravel() - to_thr, 0)
+    return from_terms, to_terms
+
+
+def get_squares(boxes: np.ndarray, square_map: np.ndarray) -> np.ndarray:
     """
-    Given a tensor of scores and squares, this function groups the scores based on the square indices,
-    and computes the maximum value for each group to update the state.
+    Given the boxes and the square map of the board, looks up the square each box stands on.
+
+    The point a piece stands on, near the bottom of its box, indexes the rasterized map, so
+    boxes off the board and outside the model input get -1.
 
     Args:
-        scores_tensor (tf.Tensor): A tensor of shape (N, 12) containing scores for each box.
-        squares (tf.Tensor): A tensor of shape (N,) containing square indices for each box.
+        boxes (np.ndarray): An array of shape (N, 4) representing N boxes as (left, top, right, bottom).
+        square_map (np.ndarray): The (MODEL_HEIGHT, MODEL_WIDTH) square index of every pixel, -1 off the board.
 
     Returns:
-        np.ndarray: An array of shape (64, 12) where each row corresponds to the maximum score for that square.
+        np.ndarray: An array of shape (N,) representing the square (index) for each box, -1 for boxes off the board.
     """
-    scores = scores_tensor.numpy()
-    update = np.zeros((64, 12))
+    box_centers = np.floor(get_bbox_centers(boxes)).astype(np.intp)
+    x, y = box_centers[:, 0], box_centers[:, 1]
+    height, width = square_map.shape
+
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    squares = np.full(len(boxes), -1, dtype=np.intp)
+    squares[inside] = square_map[y[inside], x[inside]]
 
-    grouped = {i: [] for i in range(64)}
+    return squares
 
-    for i, square in enumerate(squares):
-        square = int(square)
-        if square != -1:
-            grouped[square].append(scores[i])
+def get_update(scores_tensor: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    """
+    Given an array of scores and squares, this function groups the scores based on the square indices,
+    and computes the maximum value for each group to update the state.
 
-    for square, group in grouped.items():
-        if group:  # skip empty
-            update[square] = np.max(group, axis=0)
+    The grouping is a single sorted scatter-max; squares without boxes stay at 0, which is the
+    lower bound of the (sigmoid) class scores.
+
+    Args:
+        scores_tensor (np.ndarray): An array of shape (N, 12) containing scores for each box.
+        squares (np.ndarray): An array of shape (N,) containing square indices for each box, -1 for boxes off the board.
+
+    Returns:
+        np.ndarray: A float32 array of shape (64, 12) where each row corresponds to the maximum score for that square.
+    """
+    scores = np.asarray(scores_tensor, dtype=np.float32)
+    squares = np.asarray(squares)
+    update = np.zeros((64, 12), dtype=np.float32)
+
+    # Sort the boxes by square so every group is one contiguous run for a scatter-max
+    on_board = np.flatnonzero(squares != -1)
+    order = on_board[np.argsort(squares[on_board], kind="stable")]
+    sorted_squares = squares[order]
+    if sorted_squares.size == 0:
+        return update
+
+    starts = np.flatnonzero(np.r_[True, sorted_squares[1:] != sorted_squares[:-1]])
+    update[sorted_squares[starts]] = np.maximum.reduceat(scores[order], starts, axis=0)
 
     return update
 
 def update_state(state: np.ndarray, update: np.ndarray, decay: float = 0.5) -> np.ndarray:
     """
-    Update the state by applying a weighted decay with the given update values.
+    Update the state in place by applying a weighted decay with the given update values.
 
     Args:
-        state (np.ndarray): A 2D array of shape (64, 12) representing the current state.
+        state (np.ndarray): A float32 array of shape (64, 12) representing the current state.
         update (np.ndarray): A 2D array of shape (64, 12) representing the updates to apply.
         decay (float): The decay factor to apply to the old state (default is 0.5).
 
     Returns:
-        np.ndarray: The updated state.
+        np.ndarray: The updated state (the same buffer that was passed in).
     """
-    for i in range(64):
-        for j in range(12):
-            state[i][j] = decay * state[i][j] + (1 - decay) * update[i][j]
+    state *= decay
+    state += (1 - decay) * update
     return state
-
-
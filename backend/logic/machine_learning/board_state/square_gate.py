@@ -0,0 +1,201 @@
+import time
+import numpy as np
+
+from typing import Optional
+from logic.machine_learning.board_state.board_geometry import BoardGeometry
+from logic.machine_learning.utilities.constants import (
+    SQUARE_CHANGE_THRESHOLD, SQUARE_SETTLE_S, SQUARE_ACTIVE_INFERENCES, SQUARE_PENDING_HOLD_S, SQUARE_REFRESH_S,
+    SQUARE_SAMPLES
+)
+
+
+def get_sample_indices(geometry: BoardGeometry, samples: int = SQUARE_SAMPLES, extent: float = 0.3) -> np.ndarray:
+    """
+    Computes the flat pixel indices of a small grid of sample points inside every square.
+
+    The grid of each square follows the local direction and spacing of the board, so far squares
+    are sampled as densely as near ones.
+
+    Args:
+        geometry (BoardGeometry): Geometry of the board.
+        samples (int): Sample points per side of a square.
+        extent (float): Half-width of the sample grid as a fraction of the square size.
+
+    Returns:
+        np.ndarray: (64, samples * samples) indices into the flattened (H * W) frame.
+    """
+    height, width = geometry.frame_shape
+    grid = geometry.centers_px.reshape(8, 8, 2)
+
+    # Vectors from one square center to the next along a rank and along a file
+    along_rank = np.gradient(grid, axis=1).reshape(64, 1, 2)
+    along_file = np.gradient(grid, axis=0).reshape(64, 1, 2)
+
+    steps = np.linspace(-extent, extent, samples, dtype=np.float32)
+    a, b = np.meshgrid(steps, steps)
+    a = a.reshape(1, -1, 1)
+    b = b.reshape(1, -1, 1)
+
+    points = geometry.centers_px.reshape(64, 1, 2) + a * along_rank + b * along_file
+    xs = np.clip(np.rint(points[..., 0]), 0, width - 1).astype(np.intp)
+    ys = np.clip(np.rint(points[..., 1]), 0, height - 1).astype(np.intp)
+    return ys * width + xs
+
+
+class SquareChangeGate:
+    """
+    Decides whether the pieces model has to run on a frame by looking at the squares themselves.
+
+    A few pixels are sampled inside each square. Squares that keep changing between frames mean
+    something, usually a hand, is moving over the board, so inference waits until the board has
+    been still for ``settle`` seconds. Once settled, the model runs if any square differs from how
+    it looked at the last inference, and keeps running for ``active_inferences`` frames so the
+    state can accumulate evidence of the move. While the tracker reports a move waiting to be
+    confirmed, the model keeps running until the move is played or dropped, for at most
+    ``pending_hold`` seconds, since a single move is only played once it was seen over a delay.
+    A refresh every ``refresh`` seconds catches changes too small to cross the threshold.
+    """
+
+    def __init__(
+        self,
+        threshold: float = SQUARE_CHANGE_THRESHOLD,
+        settle: float = SQUARE_SETTLE_S,
+        active_inferences: int = SQUARE_ACTIVE_INFERENCES,
+        pending_hold: float = SQUARE_PENDING_HOLD_S,
+        refresh: float = SQUARE_REFRESH_S,
+        samples: int = SQUARE_SAMPLES
+    ):
+        """
+        Args:
+            threshold (float): Mean absolute grey-level difference (0-255) of a square that counts as a change.
+            settle (float): Seconds without motion before a change is inferred.
+            active_inferences (int): Inferences run after a change was detected.
+            pending_hold (float): Longest time, in seconds, a pending move keeps the model running.
+            refresh (float): Seconds after which the model runs even without changes.
+            samples (int): Sample points per side of a square.
+        """
+        self.threshold = threshold
+        self.settle = settle
+        self.active_inferences = active_inferences
+        self.pending_hold = pending_hold
+        self.refresh = refresh
+        self.samples = samples
+
+        self._geometry: Optional[BoardGeometry] = None
+        self._indices: Optional[np.ndarray] = None
+        self._previous: Optional[np.ndarray] = None
+        self._reference: Optional[np.ndarray] = None
+
+        self.last_motion = float("-inf")
+        self.last_inference = float("-inf")
+        self.remaining_inferences = 0
+        self.pending = False
+        self.pending_since = float("-inf")
+        self.changed_squares = np.zeros(64, dtype=bool)
+
+        self.frames_checked = 0
+        self.inferences = 0
+        self.change_triggers = 0
+        self.refresh_triggers = 0
+
+    def reset(self) -> None:
+        """ Forgets how the squares looked at the last inference, so the next frame is inferred. """
+        self._reference = None
+        self.remaining_inferences = 0
+        self.pending = False
+
+    def sample(self, frame: np.ndarray, geometry: BoardGeometry) -> np.ndarray:
+        """
+        Samples the grey level of the points inside every square.
+
+        Args:
+            frame (np.ndarray): The current BGR frame.
+            geometry (BoardGeometry): Geometry of the board in this frame.
+
+        Returns:
+            np.ndarray: (64, samples * samples) float32 grey levels.
+        """
+        if geometry is not self._geometry:
+            self._geometry = geometry
+            self._indices = get_sample_indices(geometry, self.samples)
+            self._previous = None
+            self._reference = None
+            self.pending = False
+
+        pixels = frame.reshape(-1, 3)[self._indices]
+        return pixels.mean(axis=2, dtype=np.float32)
+
+    def should_infer(self, frame: np.ndarray, geometry: BoardGeometry, now: Optional[float] = None) -> bool:
+        """
+        Records a frame and decides whether the pieces model should run on it.
+
+        Args:
+            frame (np.ndarray): The current BGR frame.
+            geometry (BoardGeometry): Geometry of the board in this frame.
+            now (Optional[float]): Monotonic time of the frame, the current time if None.
+
+        Returns:
+            bool: True if the model should run.
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+        current = self.sample(frame, geometry)
+
+        if self._previous is not None:
+            motion = np.abs(current - self._previous).mean(axis=1)
+            if (motion > self.threshold).any():
+                self.last_motion = now
+        self._previous = current
+
+        if self._reference is None:
+            trigger = True
+        elif now - self.last_motion < self.settle:
+            # A hand is still over the board, wait for it to leave
+            trigger = False
+        else:
+            self.changed_squares = np.abs(current - self._reference).mean(axis=1) > self.threshold
+            if self.changed_squares.any():
+                self.change_triggers += 1
+                self.remaining_inferences = self.active_inferences
+                trigger = True
+            elif self.remaining_inferences > 0:
+                trigger = True
+            elif self.pending and now - self.pending_since <= self.pending_hold:
+                # The move seen last has to be seen again after the greedy delay to be played
+                trigger = True
+            elif now - self.last_inference >= self.refresh:
+                self.refresh_triggers += 1
+                trigger = True
+            else:
+                trigger = False
+
+        if trigger:
+            self.remaining_inferences = max(self.remaining_inferences - 1, 0)
+            self._reference = current
+            self.last_inference = now
+            self.inferences += 1
+        return trigger
+
+    def set_pending(self, pending: bool) -> None:
+        """
+        Tells the gate whether the last inference left a move waiting to be confirmed.
+
+        Args:
+            pending (bool): True while the tracker has a candidate move it has not played yet.
+        """
+        if pending and not self.pending:
+            self.pending_since = self.last_inference
+        self.pending = pending
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Frames checked, inferences run, and how many were triggered by changes and by refreshes.
+        """
+        return {
+            "checked": self.frames_checked,
+            "inferences": self.inferences,
+            "skipped": self.frames_checked - self.inferences,
+            "change_triggers": self.change_triggers,
+            "refresh_triggers": self.refresh_triggers
+        }
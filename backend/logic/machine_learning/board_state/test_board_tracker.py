@@ -0,0 +1,211 @@
+import types
+import unittest
+import chess
+import numpy as np
+from unittest.mock import patch
+from logic.machine_learning.utilities.constants import CORNER_KEYS, LABEL_MAP, ROI_LOST_INFERENCES
+from logic.machine_learning.detection.corners_detection import scale_xy_board_corners
+from logic.machine_learning.board_state.board_geometry import BoardGeometry
+from logic.machine_learning.board_state.board_tracker import BoardTracker
+from logic.machine_learning.board_state.square_gate import SquareChangeGate
+
+
+FRAME = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+
+def make_geometry() -> BoardGeometry:
+    """ Geometry of a board seen slightly from above, in model coordinates. """
+    points = {"h1": (340, 250), "a1": (120, 250), "a8": (140, 40), "h8": (320, 40)}
+    corners = {key: {"xy": scale_xy_board_corners(points[key], *FRAME.shape[:2]), "key": key} for key in CORNER_KEYS}
+    return BoardGeometry(corners, FRAME)
+
+
+def make_detections(geometry: BoardGeometry, board: chess.Board):
+    """ One confident box per piece of the position, standing on its square center. """
+    boxes, scores = [], []
+    for square, piece in board.piece_map().items():
+        cx, cy = geometry.centers_3d[0, square]
+        boxes.append([cx - 6, cy - 20, cx + 6, cy + 4])
+        score = np.zeros(12, dtype=np.float32)
+        score[LABEL_MAP[piece.symbol()]] = 1.0
+        scores.append(score)
+    return np.array(boxes, dtype=np.float32).reshape(-1, 4), np.array(scores, dtype=np.float32).reshape(-1, 12)
+
+
+class TestBoardTracker(unittest.IsolatedAsyncioTestCase):
+    """ Unit tests for the BoardTracker class. """
+
+    def setUp(self) -> None:
+        self.geometry = make_geometry()
+
+    async def feed(self, tracker: BoardTracker, game, shown: chess.Board):
+        """ Runs the tracker on a frame whose detections show the given position. """
+        detections = make_detections(self.geometry, shown)
+
+        async def fake_detect(*args):
+            return detections
+
+        with patch("logic.machine_learning.board_state.board_tracker.detect", fake_detect):
+            return await tracker.get_payload(None, FRAME, game, geometry=self.geometry)
+
+    async def test_state_accumulates(self) -> None:
+        """ Test that the state keeps its evidence between frames. """
+        tracker = BoardTracker(1)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+
+        await self.feed(tracker, game, chess.Board())
+        self.assertAlmostEqual(tracker.state[chess.E2, LABEL_MAP["P"]], 0.5)
+        await self.feed(tracker, game, chess.Board())
+        self.assertAlmostEqual(tracker.state[chess.E2, LABEL_MAP["P"]], 0.75)
+        self.assertEqual(tracker.stats()["updates"], 2)
+
+    async def test_plays_move_once(self) -> None:
+        """ Test that a move seen on the board is played once and reported in the payload. """
+        tracker = BoardTracker(1, greedy_delay=0.0)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+        shown = chess.Board()
+        shown.push_san("e4")
+
+        payloads = [(await self.feed(tracker, game, shown))[1] for _ in range(4)]
+        played = [payload for payload in payloads if payload is not None]
+
+        self.assertEqual(len(played), 1)
+        self.assertEqual(played[0][1]["sans"][0], "e4")
+        self.assertEqual(played[0][0]["fen"], shown.fen())
+        self.assertEqual(game.chess_board.fen(), shown.fen())
+
+    async def test_boards_are_independent(self) -> None:
+        """ Test that evidence on one board does not leak into another board's tracker. """
+        first, second = BoardTracker(1), BoardTracker(2)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+
+        await self.feed(first, game, chess.Board())
+        self.assertFalse(second.state.any())
+        self.assertTrue(first.state.any())
+
+    async def test_new_geometry_resets_state(self) -> None:
+        """ Test that re-detected corners clear the accumulated evidence. """
+        tracker = BoardTracker(1)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+        tracker.geometry_cache.set_corners(self.geometry.corners, FRAME)
+        await self.feed(tracker, game, chess.Board())
+
+        tracker.geometry_cache.set_corners(self.geometry.corners, FRAME)
+        self.assertFalse(tracker.state.any())
+
+    async def test_new_frame_size_drops_geometry(self) -> None:
+        """ Test that a new frame size drops the geometry, as its corners are pixels of the old size. """
+        tracker = BoardTracker(1)
+        tracker.set_corners(self.geometry.corners, FRAME)
+        self.assertIsNotNone(tracker.geometry_cache.get(FRAME))
+
+        self.assertIsNone(tracker.geometry_cache.get(np.zeros((480, 640, 3), dtype=np.uint8)))
+        self.assertEqual(tracker.geometry_cache.builds, 1)
+
+    async def test_roi_is_stable(self) -> None:
+        """ Test that the tracked region only moves when the board moved beyond the tolerance. """
+        tracker = BoardTracker(1)
+        tracker.set_corners(self.geometry.corners, FRAME)
+        roi = tracker.roi_keypoints.copy()
+
+        tracker.update_roi(self.geometry.boundary_3d[0] + 1.0)
+        np.testing.assert_array_equal(tracker.roi_keypoints, roi)
+        tracker.update_roi(self.geometry.boundary_3d[0] + 20.0)
+        self.assertGreater(tracker.roi_keypoints[0, 0], roi[0, 0])
+
+        # The region holds the whole board
+        boundary = self.geometry.boundary_3d[0]
+        self.assertTrue((roi.min(axis=0) <= boundary.min(axis=0)).all())
+        self.assertTrue((roi.max(axis=0) >= boundary.max(axis=0)).all())
+        self.assertEqual(tracker.stats()["full_frame_detections"], 1)
+
+        tracker.set_corners(self.geometry.corners, FRAME)
+        self.assertEqual(tracker.stats()["roi_detections"], 1)
+
+    async def test_low_confidence_drops_geometry(self) -> None:
+        """ Test that the geometry is dropped after repeated inferences that miss most pieces. """
+        tracker = BoardTracker(1)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+        tracker.set_corners(self.geometry.corners, FRAME)
+
+        for _ in range(ROI_LOST_INFERENCES - 1):
+            await self.feed(tracker, game, chess.Board(None))
+        self.assertIsNotNone(tracker.geometry_cache.geometry)
+
+        # A good inference resets the count
+        await self.feed(tracker, game, chess.Board())
+        await self.feed(tracker, game, chess.Board(None))
+        self.assertIsNotNone(tracker.geometry_cache.geometry)
+
+        for _ in range(ROI_LOST_INFERENCES - 1):
+            await self.feed(tracker, game, chess.Board(None))
+        self.assertIsNone(tracker.geometry_cache.geometry)
+        # The region is kept, so the corners are searched there first
+        self.assertIsNotNone(tracker.roi_keypoints)
+
+    async def test_position_change_during_inference_plays_nothing(self) -> None:
+        """ Test that a move scored for a position the game left during inference is dropped. """
+        tracker = BoardTracker(1, greedy_delay=0.0)
+        game = types.SimpleNamespace(chess_board=chess.Board())
+        shown = chess.Board()
+        shown.push_san("e4")
+        await self.feed(tracker, game, shown)
+        self.assertEqual(game.chess_board.fen(), chess.STARTING_FEN)
+
+        # The game is reset to another position while the pieces model runs
+        moved_on = chess.Board()
+        moved_on.push_san("d4")
+        detections = make_detections(self.geometry, shown)
+
+        async def fake_detect(*args):
+            game.chess_board.set_fen(moved_on.fen())
+            return detections
+
+        with patch("logic.machine_learning.board_state.board_tracker.detect", fake_detect):
+            _, payload = await tracker.get_payload(None, FRAME, game, geometry=self.geometry)
+
+        self.assertIsNone(payload)
+        self.assertEqual(game.chess_board.fen(), moved_on.fen())
+        self.assertFalse(tracker.move_pending)
+
+    async def test_gate_waits_for_greedy_move(self) -> None:
+        """ Test that the change gate keeps the model running until a single move is played after its delay. """
+        tracker = BoardTracker(1, greedy_delay=1.0)
+        gate = SquareChangeGate()
+        game = types.SimpleNamespace(chess_board=chess.Board())
+        shown = chess.Board()
+        clock = types.SimpleNamespace(now=0.0)
+
+        async def fake_detect(*args):
+            return make_detections(self.geometry, shown)
+
+        moved = FRAME.copy()
+        for square in (chess.E2, chess.E4):
+            x, y = self.geometry.centers_px[square].astype(int)
+            moved[y - 15:y + 15, x - 15:x + 15] = 255
+
+        played_at = None
+        fake_time = types.SimpleNamespace(monotonic=lambda: clock.now)
+        with patch("logic.machine_learning.board_state.board_tracker.detect", fake_detect), \
+                patch("logic.machine_learning.board_state.board_tracker.time", fake_time):
+            # Frames at 6 fps, e4 is played on the board after 3 s
+            for i in range(90):
+                clock.now = i / 6
+                if i == 18:
+                    shown.push_san("e4")
+                frame = moved if i >= 18 else FRAME
+                if gate.should_infer(frame, self.geometry, now=clock.now):
+                    _, payload = await tracker.get_payload(None, frame, game, geometry=self.geometry)
+                    gate.set_pending(tracker.move_pending)
+                    if payload is not None:
+                        played_at = clock.now
+
+        # The change is inferred once the board settled, then again after the delay
+        self.assertIsNotNone(played_at)
+        self.assertLess(played_at, 3.0 + gate.settle + tracker.greedy_delay + 0.5)
+        self.assertEqual(game.chess_board.fen(), shown.fen())
+        self.assertFalse(tracker.move_pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
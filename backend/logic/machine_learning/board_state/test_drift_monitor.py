@@ -0,0 +1,63 @@
+import unittest
+import numpy as np
+from logic.machine_learning.board_state.drift_monitor import DriftMonitor, measure_drift
+from logic.machine_learning.board_state.test_board_tracker import make_geometry
+
+
+class TestDriftMonitor(unittest.TestCase):
+    """ Unit tests for the DriftMonitor class. """
+
+    def setUp(self) -> None:
+        self.geometry = make_geometry()
+        self.spacing = np.linalg.norm(self.geometry.xcorners[1] - self.geometry.xcorners[0])
+
+    def test_xcorners_lie_between_centers(self) -> None:
+        """ Test that the x-corners of the geometry sit where four square centers meet. """
+        centers = self.geometry.centers_3d[0].reshape(8, 8, 2)
+        between = (centers[:-1, :-1] + centers[1:, 1:] + centers[:-1, 1:] + centers[1:, :-1]) / 4
+        np.testing.assert_allclose(np.sort(self.geometry.xcorners, axis=0), np.sort(between.reshape(49, 2), axis=0), atol=1.0)
+
+    def test_measure_drift(self) -> None:
+        """ Test that drift is measured in squares and ignores a few false detections. """
+        detected = self.geometry.xcorners.copy()
+        self.assertAlmostEqual(measure_drift(self.geometry.xcorners, detected), 0.0)
+
+        detected[:5] += 100
+        self.assertAlmostEqual(measure_drift(self.geometry.xcorners, detected), 0.0)
+
+        shifted = self.geometry.xcorners + [self.spacing * 0.4, 0]
+        self.assertGreater(measure_drift(self.geometry.xcorners, shifted), 0.3)
+
+    def test_interval(self) -> None:
+        """ Test that checks run once per interval, not on the first frame. """
+        drift = DriftMonitor(interval=5.0)
+        self.assertFalse(drift.due(now=0.0))
+        self.assertFalse(drift.due(now=4.0))
+        self.assertTrue(drift.due(now=5.0))
+        drift.check(self.geometry, self.geometry.xcorners.tolist(), now=5.0)
+        self.assertFalse(drift.due(now=6.0))
+
+    def test_redetects_after_confirmation(self) -> None:
+        """ Test that a moved board triggers one re-detection after the drift is confirmed. """
+        drift = DriftMonitor(interval=5.0, confirmations=2)
+        moved = (self.geometry.xcorners + [self.spacing * 0.5, self.spacing * 0.3]).tolist()
+
+        self.assertFalse(drift.check(self.geometry, moved, now=5.0))
+        # The confirmation is checked right away
+        self.assertTrue(drift.due(now=5.1))
+        self.assertTrue(drift.check(self.geometry, moved, now=5.1))
+        self.assertEqual(drift.stats()["redetections"], 1)
+
+    def test_still_board(self) -> None:
+        """ Test that small jitter and hidden x-corners do not trigger a re-detection. """
+        drift = DriftMonitor(confirmations=1)
+        jitter = self.geometry.xcorners + np.random.default_rng(0).normal(0, 0.5, self.geometry.xcorners.shape)
+
+        self.assertFalse(drift.check(self.geometry, jitter.tolist(), now=1.0))
+        self.assertFalse(drift.check(self.geometry, [[0, 0], [10, 10]], now=2.0))
+        self.assertEqual(drift.stats()["inconclusive"], 1)
+        self.assertEqual(drift.stats()["redetections"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from logic.machine_learning.board_state.frame_sampler import AdaptiveSampler, SamplerConfig
+
+
+class TestAdaptiveSampler(unittest.TestCase):
+    """ Unit tests for the AdaptiveSampler class. """
+
+    def setUp(self) -> None:
+        self.config = SamplerConfig(active_fps=10.0, idle_fps=1.0, motion_threshold=3.0, active_hold=1.0)
+        self.sampler = AdaptiveSampler(self.config)
+        self.static = np.full((120, 160, 3), 100, dtype=np.uint8)
+
+    def run_frames(self, frames, start: float = 0.0) -> list:
+        """ Feeds frames at the active frame rate and returns the decisions. """
+        return [
+            self.sampler.should_process(frame, now=start + i / self.config.active_fps)
+            for i, frame in enumerate(frames)
+        ]
+
+    def test_invalid_config(self) -> None:
+        """ Test that frame rates are validated. """
+        with self.assertRaises(ValueError):
+            SamplerConfig(active_fps=0)
+        with self.assertRaises(ValueError):
+            SamplerConfig(active_fps=2.0, idle_fps=5.0)
+
+    def test_static_board_idles(self) -> None:
+        """ Test that a static board is processed at the idle rate once the hold period is over. """
+        decisions = self.run_frames([self.static] * 50)
+
+        # The first frame counts as motion, so the first second is processed at the active rate
+        self.assertTrue(all(decisions[:11]))
+        self.assertEqual(sum(decisions[11:]), 3)
+        self.assertFalse(self.sampler.stats()["active"])
+
+    def test_motion_wakes_sampler(self) -> None:
+        """ Test that motion switches the sampler back to the active rate. """
+        self.run_frames([self.static] * 30)
+        moving = [np.full_like(self.static, 100 + 20 * ((i + 1) % 2)) for i in range(10)]
+        decisions = self.run_frames(moving, start=3.0)
+
+        self.assertTrue(all(decisions))
+        self.assertEqual(self.sampler.motion_frames, 11)
+
+    def test_motion_outside_roi_is_ignored(self) -> None:
+        """ Test that only the board region is compared. """
+        roi = [0, 0, 80, 60]
+        self.sampler.should_process(self.static, roi, now=0.0)
+        changed = self.static.copy()
+        changed[60:, 80:] = 255
+
+        self.assertEqual(self.sampler.measure_motion(changed, roi), 0.0)
+        self.assertGreater(self.sampler.measure_motion(changed, None), 0.0)
+
+    def test_stats(self) -> None:
+        """ Test that every frame is counted as processed or skipped. """
+        self.run_frames([self.static] * 40)
+        stats = self.sampler.stats()
+        self.assertEqual(stats["seen"], 40)
+        self.assertEqual(stats["processed"] + stats["skipped"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
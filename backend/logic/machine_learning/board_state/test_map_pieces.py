@@ -0,0 +1,156 @@
+import random
+import unittest
+import chess
+import numpy as np
+from logic.machine_learning.board_state.map_pieces import process_state, get_squares
+from logic.machine_learning.utilities.move import get_moves_pairs, calculate_move_score
+from logic.machine_learning.utilities.move_index import MoveIndex
+from logic.machine_learning.utilities.constants import LABEL_MAP, SQUARE_SIZE
+from logic.machine_learning.maths.homography import perspective_transform
+from logic.machine_learning.maths.warp import get_inv_transform, transform_centers, transform_square_map
+
+# Positions covering castling, en passant, promotions, checks, mate and stalemate
+CORPUS_FENS = [
+    chess.STARTING_FEN,
+    "r3k2r/pppq1ppp/2npbn2/4p3/4P3/2NPBN2/PPPQ1PPP/R3K2R w KQkq - 4 8",
+    "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+    "8/P5k1/8/8/8/8/5Kp1/8 w - - 0 1",
+    "4k3/8/8/8/8/8/8/R3K2R b KQ - 0 1",
+    "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+    "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1"
+]
+
+def legacy_process_state(state: np.ndarray, moves_pairs: list, possible_moves: set) -> tuple:
+    """ The move-pair dictionary loop process_state replaced. """
+    best_score1 = best_score2 = best_joint_score = float('-inf')
+    best_move = best_moves = None
+    seen = set()
+    for move_pair in moves_pairs:
+        move1_san = move_pair['move1']['sans'][0]
+        if move1_san not in seen:
+            seen.add(move1_san)
+            score = calculate_move_score(state, move_pair['move1'])
+            if score > 0:
+                possible_moves.add(move1_san)
+            if score > best_score1:
+                best_move = move_pair['move1']
+                best_score1 = score
+        if move_pair['move2'] is None or move_pair['moves'] is None or move1_san not in possible_moves:
+            continue
+        score2 = calculate_move_score(state, move_pair['move2'])
+        if score2 < 0:
+            continue
+        if score2 > best_score2:
+            best_score2 = score2
+        joint_score = calculate_move_score(state, move_pair['moves'])
+        if joint_score > best_joint_score:
+            best_joint_score = joint_score
+            best_moves = move_pair['moves']
+    return best_score1, best_score2, best_joint_score, best_move, best_moves
+
+def make_corpus(seed: int = 0, playouts: int = 20) -> list:
+    """ The fixed positions plus positions from seeded random playouts. """
+    rng = random.Random(seed)
+    boards = [chess.Board(fen) for fen in CORPUS_FENS]
+    for _ in range(playouts):
+        board = chess.Board()
+        for _ in range(rng.randint(1, 80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards
+
+def make_states(board: chess.Board, rng: np.random.Generator) -> list:
+    """ Noisy states plus states that show a legal move and a legal reply on top of the position. """
+    states = [(rng.uniform(0, 1, (64, 12)) ** power).astype(np.float32) for power in (1, 4, 12)]
+
+    for move in list(board.legal_moves)[:4]:
+        state = np.zeros((64, 12), dtype=np.float32)
+        for square, piece in board.piece_map().items():
+            state[square, LABEL_MAP[piece.symbol()]] = 0.9
+
+        piece = board.piece_at(move.from_square)
+        symbol = chess.Piece(move.promotion, piece.color).symbol() if move.promotion else piece.symbol()
+        state[move.from_square] = 0
+        state[move.to_square] = 0
+        state[move.to_square, LABEL_MAP[symbol]] = 0.95
+        states.append(state)
+
+    return states
+
+class TestProcessState(unittest.TestCase):
+    """ Unit tests for the vectorized move scoring. """
+
+    def test_matches_move_pair_loop(self) -> None:
+        """ Test the vectorized scores and moves match the move-pair loop on a corpus of positions. """
+        rng = np.random.default_rng(0)
+
+        for board in make_corpus():
+            move_index = MoveIndex(board)
+            moves_pairs = get_moves_pairs(board)
+
+            for state in make_states(board, rng):
+                expected_possible, actual_possible = set(), set()
+                expected = legacy_process_state(state, moves_pairs, expected_possible)
+                actual = process_state(state, move_index, actual_possible)
+
+                with self.subTest(fen=board.fen()):
+                    np.testing.assert_allclose(actual[:3], expected[:3], atol=1e-5)
+                    self.assertEqual(actual[3], expected[3])
+                    self.assertEqual(actual[4], expected[4])
+                    self.assertEqual(actual_possible, expected_possible)
+
+    def test_index_leaves_board_unchanged(self) -> None:
+        """ Test building the index does not modify the board. """
+        board = chess.Board(CORPUS_FENS[1])
+        MoveIndex(board)
+
+        self.assertEqual(board.fen(), CORPUS_FENS[1])
+        self.assertEqual(len(board.move_stack), 0)
+
+
+def foot_boxes(points: np.ndarray) -> np.ndarray:
+    """ Boxes 12 px wide whose pieces stand on the given points. """
+    x, y = points[:, 0], points[:, 1]
+    return np.stack([x - 6, y - 20, x + 6, y + 4], axis=1).astype(np.float32)
+
+class TestGetSquares(unittest.TestCase):
+    """ Unit tests for the square lookup of the boxes. """
+
+    def setUp(self) -> None:
+        # h1, a1, a8, h8 of a board seen slightly from above, in model coordinates
+        self.inv_transform = get_inv_transform([(340, 250), (120, 250), (140, 40), (320, 40)])
+        self.square_map = transform_square_map(self.inv_transform)
+
+    def test_square_centers(self) -> None:
+        """ Test that a piece on a square center is on that square, in the order of the centers. """
+        centers, _ = transform_centers(self.inv_transform)
+        np.testing.assert_array_equal(get_squares(foot_boxes(centers), self.square_map), np.arange(64))
+
+    def test_anywhere_in_square(self) -> None:
+        """ Test that a piece anywhere inside a square is on it, even where another center is closer. """
+        rng = np.random.default_rng(0)
+        cols, rows = rng.integers(0, 8, 500), rng.integers(0, 8, 500)
+        perfect_square = np.stack([cols, 7 - rows], axis=1) + rng.uniform(0.05, 0.95, (500, 2))
+        points = perspective_transform(perfect_square * SQUARE_SIZE, self.inv_transform)
+        np.testing.assert_array_equal(get_squares(foot_boxes(points), self.square_map), rows * 8 + cols)
+
+    def test_off_board(self) -> None:
+        """ Test that pieces past the padding of the board, or outside the model input, are on no square. """
+        points = np.array([[20, 140], [460, 140], [230, 5], [-40, 140], [230, 400]], dtype=np.float32)
+        np.testing.assert_array_equal(get_squares(foot_boxes(points), self.square_map), [-1] * 5)
+
+    def test_padding(self) -> None:
+        """ Test that a piece in the padding around the board is on the nearest edge square. """
+        perfect_square = np.array([[-0.3, 7.5], [8.3, 0.5], [3.5, 8.3]]) * SQUARE_SIZE
+        points = perspective_transform(perfect_square, self.inv_transform)
+        np.testing.assert_array_equal(get_squares(foot_boxes(points), self.square_map), [0, 63, 3])
+
+    def test_horizon(self) -> None:
+        """ Test that pixels beyond the horizon of a steep board are not mirrored onto it. """
+        # The sides of the board meet just above a8 and h8, at y = 149
+        square_map = transform_square_map(get_inv_transform([(470, 200), (10, 200), (235, 150), (245, 150)]))
+        self.assertTrue((square_map[:148] == -1).all())
+        self.assertNotEqual(square_map[190, 240], -1)
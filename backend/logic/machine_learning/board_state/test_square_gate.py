@@ -0,0 +1,93 @@
+import types
+import unittest
+import numpy as np
+from logic.machine_learning.board_state.square_gate import SquareChangeGate, get_sample_indices
+
+
+def make_geometry(square: int = 20, offset: int = 10) -> types.SimpleNamespace:
+    """ Geometry of an axis-aligned board whose a8 square is in the top left corner of the frame. """
+    xs = offset + square * (np.arange(8) + 0.5)
+    centers = np.array([[x, y] for y in xs for x in xs], dtype=np.float32)
+    size = 2 * offset + 8 * square
+    return types.SimpleNamespace(frame_shape=(size, size), centers_px=centers)
+
+
+class TestSquareChangeGate(unittest.TestCase):
+    """ Unit tests for the SquareChangeGate class. """
+
+    def setUp(self) -> None:
+        self.geometry = make_geometry()
+        self.gate = SquareChangeGate(threshold=10.0, settle=0.5, active_inferences=2, refresh=10.0, samples=4)
+        self.board = np.full((*self.geometry.frame_shape, 3), 80, dtype=np.uint8)
+
+    def with_square(self, index: int, value: int) -> np.ndarray:
+        """ Returns the board with one square painted. """
+        frame = self.board.copy()
+        row, col = divmod(index, 8)
+        frame[10 + row * 20:10 + (row + 1) * 20, 10 + col * 20:10 + (col + 1) * 20] = value
+        return frame
+
+    def test_samples_stay_inside_squares(self) -> None:
+        """ Test that every sample point of a square lies inside that square. """
+        indices = get_sample_indices(self.geometry, samples=4)
+        ys, xs = np.divmod(indices, self.geometry.frame_shape[1])
+        rows, cols = (ys - 10) // 20, (xs - 10) // 20
+
+        self.assertEqual(indices.shape, (64, 16))
+        np.testing.assert_array_equal(rows * 8 + cols, np.repeat(np.arange(64)[:, None], 16, axis=1))
+
+    def test_static_board_skips_until_refresh(self) -> None:
+        """ Test that an unchanged board only triggers the first inference and the refresh. """
+        decisions = [self.gate.should_infer(self.board, self.geometry, now=t * 0.5) for t in range(30)]
+
+        self.assertEqual([i for i, decision in enumerate(decisions) if decision], [0, 20])
+        self.assertEqual(self.gate.stats()["refresh_triggers"], 1)
+
+    def test_change_waits_for_settle(self) -> None:
+        """ Test that a change is inferred once the board has been still for the settle period. """
+        self.gate.should_infer(self.board, self.geometry, now=0.0)
+
+        moved = self.with_square(12, 200)
+        # The square changes between frames, so the board is not settled yet
+        self.assertFalse(self.gate.should_infer(moved, self.geometry, now=1.0))
+        self.assertFalse(self.gate.should_infer(moved, self.geometry, now=1.2))
+        self.assertTrue(self.gate.should_infer(moved, self.geometry, now=1.6))
+        self.assertEqual(np.flatnonzero(self.gate.changed_squares).tolist(), [12])
+
+        # The active window keeps the model running for the configured number of inferences
+        self.assertTrue(self.gate.should_infer(moved, self.geometry, now=1.8))
+        self.assertFalse(self.gate.should_infer(moved, self.geometry, now=2.0))
+        self.assertEqual(self.gate.stats()["change_triggers"], 1)
+
+    def test_pending_move_keeps_running(self) -> None:
+        """ Test that a pending move keeps the model running until it is played, for at most the hold time. """
+        self.gate.pending_hold = 2.0
+        self.gate.should_infer(self.board, self.geometry, now=0.0)
+        self.gate.set_pending(True)
+        self.assertTrue(self.gate.should_infer(self.board, self.geometry, now=1.0))
+        self.assertTrue(self.gate.should_infer(self.board, self.geometry, now=2.0))
+        self.assertFalse(self.gate.should_infer(self.board, self.geometry, now=2.5))
+
+        # A move seen again right after the last inference is held anew, until it is played
+        self.gate.set_pending(False)
+        self.gate.set_pending(True)
+        self.assertTrue(self.gate.should_infer(self.board, self.geometry, now=3.0))
+        self.gate.set_pending(False)
+        self.assertFalse(self.gate.should_infer(self.board, self.geometry, now=3.2))
+
+    def test_reset_infers(self) -> None:
+        """ Test that a reset gate runs the model on the next frame, e.g. after the game was reset. """
+        self.gate.should_infer(self.board, self.geometry, now=0.0)
+        self.assertFalse(self.gate.should_infer(self.board, self.geometry, now=1.0))
+        self.gate.reset()
+        self.assertTrue(self.gate.should_infer(self.board, self.geometry, now=1.5))
+
+    def test_new_geometry_infers(self) -> None:
+        """ Test that the gate starts over when the board geometry changes. """
+        self.gate.should_infer(self.board, self.geometry, now=0.0)
+        self.assertFalse(self.gate.should_infer(self.board, self.geometry, now=0.5))
+        self.assertTrue(self.gate.should_infer(self.board, make_geometry(), now=1.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,49 +1,242 @@
-
 import numpy as np
-import tensorflow as tf
 
-from typing import Tuple, List, Dict
-from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, MARKER_DIAMETER
+from typing import Tuple, List, Dict, Optional
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, MARKER_DIAMETER, NMS_IOU_THRESHOLD, NMS_SCORE_THRESHOLD, NMS_MAX_OUTPUT_SIZE, NMS_MAX_CANDIDATES
+
+def non_max_suppression(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    max_output_size: int = NMS_MAX_OUTPUT_SIZE,
+    iou_threshold: float = NMS_IOU_THRESHOLD,
+    score_threshold: float = NMS_SCORE_THRESHOLD,
+    class_ids: Optional[np.ndarray] = None,
+    max_candidates: int = NMS_MAX_CANDIDATES
+) -> np.ndarray:
+    """
+    Greedily selects boxes in descending score order, pruning boxes that overlap a selected box.
+
+    Mirrors ``tf.image.non_max_suppression``: boxes scoring at or below ``score_threshold`` are
+    discarded and a box is suppressed when its IoU with an already selected box exceeds ``iou_threshold``.
+    The score filter runs first, so the pairwise IoU matrix is only built for the surviving
+    candidates in a single vectorized step. Beyond ``max_candidates`` candidates the (N, N) matrix
+    would grow too large, and the overlaps of each selected box are computed on their own instead.
+    Every candidate is considered either way, so the selection is the same.
+
+    Args:
+        boxes (np.ndarray): An array of shape (num_boxes, 4) with coordinates [x_min, y_min, x_max, y_max].
+        scores (np.ndarray): An array of shape (num_boxes,) with the score of each box.
+        max_output_size (int): The maximum number of boxes to select.
+        iou_threshold (float): Overlap above which a box is suppressed.
+        score_threshold (float): Score at or below which a box is discarded.
+        class_ids (Optional[np.ndarray]): Class of each box. When given, boxes only suppress boxes of the same class.
+        max_candidates (int): The most candidates for which the pairwise IoU matrix is built.
+
+    Returns:
+        np.ndarray: The indices of the selected boxes, in descending score order.
+    """
+    candidates = np.flatnonzero(scores > score_threshold)
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    if candidates.size == 0:
+        return candidates.astype(np.int64)
+    if candidates.size > max_candidates:
+        candidate_classes = None if class_ids is None else class_ids[candidates]
+        return candidates[sweep_overlaps(boxes[candidates], max_output_size, iou_threshold, candidate_classes)]
+
+    overlaps = get_pairwise_iou(boxes[candidates]) > iou_threshold
+    if class_ids is not None:
+        candidate_classes = class_ids[candidates]
+        overlaps &= candidate_classes[:, np.newaxis] == candidate_classes[np.newaxis, :]
+
+    # Greedy sweep over the precomputed overlaps, highest score first
+    suppressed = np.zeros(candidates.size, dtype=bool)
+    selected: List[int] = []
+    for i in range(candidates.size):
+        if suppressed[i]:
+            continue
+        selected.append(i)
+        if len(selected) == max_output_size:
+            break
+        suppressed |= overlaps[i]
+
+    return candidates[selected]
+
+
+def sweep_overlaps(boxes: np.ndarray, max_output_size: int, iou_threshold: float, class_ids: Optional[np.ndarray] = None) -> List[int]:
+    """
+    Greedy sweep of ``non_max_suppression`` that computes the overlaps of one selected box at a time.
+
+    Args:
+        boxes (np.ndarray): An array of shape (num_boxes, 4) of candidates, in descending score order.
+        max_output_size (int): The maximum number of boxes to select.
+        iou_threshold (float): Overlap above which a box is suppressed.
+        class_ids (Optional[np.ndarray]): Class of each candidate. When given, boxes only suppress boxes of the same class.
+
+    Returns:
+        List[int]: The positions of the selected candidates.
+    """
+    x_min = np.minimum(boxes[:, 0], boxes[:, 2])
+    y_min = np.minimum(boxes[:, 1], boxes[:, 3])
+    x_max = np.maximum(boxes[:, 0], boxes[:, 2])
+    y_max = np.maximum(boxes[:, 1], boxes[:, 3])
+    areas = (x_max - x_min) * (y_max - y_min)
+
+    remaining = np.ones(len(boxes), dtype=bool)
+    selected: List[int] = []
+    for i in range(len(boxes)):
+        if not remaining[i]:
+            continue
+        selected.append(i)
+        if len(selected) == max_output_size:
+            break
+
+        # Only the lower scoring candidates still in the running can be suppressed
+        later = np.flatnonzero(remaining[i + 1:]) + i + 1
+        inter_w = np.maximum(np.minimum(x_max[i], x_max[later]) - np.maximum(x_min[i], x_min[later]), 0)
+        inter_h = np.maximum(np.minimum(y_max[i], y_max[later]) - np.maximum(y_min[i], y_min[later]), 0)
+        intersection = inter_w * inter_h
+        with np.errstate(divide="ignore", invalid="ignore"):
+            overlaps = intersection / (areas[i] + areas[later] - intersection) > iou_threshold
+        if class_ids is not None:
+            overlaps &= class_ids[later] == class_ids[i]
+        remaining[later[overlaps]] = False
+
+    return selected
+
+
+def get_pairwise_iou(boxes: np.ndarray) -> np.ndarray:
+    """
+    Computes the intersection over union of every pair of boxes.
+
+    Args:
+        boxes (np.ndarray): An array of shape (num_boxes, 4) with coordinates [x_min, y_min, x_max, y_max].
+
+    Returns:
+        np.ndarray: An array of shape (num_boxes, num_boxes) with the IoU of each pair, NaN for pairs of empty boxes.
+    """
+    x_min = np.minimum(boxes[:, 0], boxes[:, 2])
+    y_min = np.minimum(boxes[:, 1], boxes[:, 3])
+    x_max = np.maximum(boxes[:, 0], boxes[:, 2])
+    y_max = np.maximum(boxes[:, 1], boxes[:, 3])
+    areas = (x_max - x_min) * (y_max - y_min)
+
+    # Outer products written in place keep the number of (N, N) temporaries low
+    intersection = np.minimum.outer(x_max, x_max)
+    intersection -= np.maximum.outer(x_min, x_min)
+    np.maximum(intersection, 0, out=intersection)
+
+    inter_h = np.minimum.outer(y_max, y_max)
+    inter_h -= np.maximum.outer(y_min, y_min)
+    np.maximum(inter_h, 0, out=inter_h)
+    intersection *= inter_h
+
+    union = np.add.outer(areas, areas)
+    union -= intersection
+
+    # Pairs of empty boxes give 0 / 0 = NaN, which never exceeds a threshold
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intersection /= union
+    return intersection
 
-def process_boxes_and_scores(boxes: tf.Tensor, scores: tf.Tensor) -> np.ndarray:
+
+def get_centers_and_classes(boxes: np.ndarray, class_indices: np.ndarray) -> np.ndarray:
+    """
+    Concatenates the centers of the boxes with their class indices.
+
+    Args:
+        boxes (np.ndarray): An array of shape (N, 4) of selected boxes [left, top, right, bottom].
+        class_indices (np.ndarray): An array of shape (N,) with the class index of each box.
+
+    Returns:
+        np.ndarray: A float16 array of shape (N, 3) in the format [cx, cy, class_index].
+    """
+    # Use get_centers function to get the centers from the selected boxes
+    centers_bbox: np.ndarray = get_centers_of_bbox(boxes)
+
+    # Cast the class indices to float16 (compatible with centers)
+    class_indices = class_indices[:, np.newaxis].astype(np.float16)
+
+    return np.concatenate([centers_bbox, class_indices], axis=1)
+
+
+def process_boxes_and_scores(boxes: np.ndarray, scores: np.ndarray, per_class: bool = False) -> np.ndarray:
     """
     Processes bounding boxes and scores to apply non-max suppression (NMS),
     extract centers of selected boxes, and concatenate them with their class indices.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (num_boxes, 4), representing bounding box coordinates [x_min, y_min, x_max, y_max].
-        scores (tf.Tensor): A tensor of shape (num_boxes, num_classes), representing the classification scores for each box.
+        boxes (np.ndarray): An array of shape (num_boxes, 4), representing bounding box coordinates [x_min, y_min, x_max, y_max].
+        scores (np.ndarray): An array of shape (num_boxes, num_classes), representing the classification scores for each box.
+        per_class (bool): Only suppress overlapping boxes of the same class. Defaults to False.
 
     Returns:
         np.ndarray: A NumPy array containing the centers of the selected bounding boxes and their corresponding class indices.
     """
-    max_scores: tf.Tensor = tf.reduce_max(scores, axis=1)
-    argmax_scores: tf.Tensor = tf.argmax(scores, axis=1)
-    nms: tf.Tensor = tf.image.non_max_suppression(boxes, max_scores, max_output_size=100, iou_threshold=0.3, score_threshold=0.1)
-    
-    # Use get_centers function to get the centers from the selected boxes
-    centers_bbox: tf.Tensor = get_centers_of_bbox(tf.gather(boxes, nms, axis=0))
+    max_scores: np.ndarray = np.max(scores, axis=1)
+    argmax_scores: np.ndarray = np.argmax(scores, axis=1)
+    nms: np.ndarray = non_max_suppression(boxes, max_scores, class_ids=argmax_scores if per_class else None)
+
+    return get_centers_and_classes(boxes[nms], argmax_scores[nms])
+
+
+def get_detections(
+    preds: np.ndarray,
+    width: int,
+    height: int,
+    video_width: int,
+    video_height: int,
+    padding: Tuple[int, int, int, int],
+    roi: Tuple[int, int],
+    per_class: bool = False
+) -> np.ndarray:
+    """
+    Applies non-max suppression straight on the raw model output.
 
-    # Gather the class indices of the selected boxes and expand dimensions
-    class_indices: tf.Tensor = tf.expand_dims(tf.gather(argmax_scores, nms, axis=0), axis=1)
+    Only the columns whose best class score passes the score threshold are decoded into boxes,
+    so the full (1, C, N) output is never transposed or converted.
 
-    # Cast cls to float16 (ensure it's compatible with centers)
-    class_indices: tf.Tensor = tf.cast(class_indices, dtype=tf.float16)
+    Args:
+        preds: The raw model output of shape (1, 4 + num_classes, num_boxes).
+        width: The width to scale the bounding box coordinates to.
+        height: The height to scale the bounding box coordinates to.
+        video_width: The width of the video for further scaling.
+        video_height: The height of the video for further scaling.
+        padding: The padding to adjust the bounding boxes.
+        roi: The region of interest, which is added to the bounding box coordinates.
+        per_class: Only suppress overlapping boxes of the same class. Defaults to False.
 
-    # Concatenate the centers with the class indices
-    res: tf.Tensor = tf.concat([centers_bbox, class_indices], axis=1)
+    Returns:
+        np.ndarray: A float16 array of shape (N, 3) in the format [cx, cy, class_index].
+    """
+    class_scores = preds[0, 4:]
+    max_scores = np.max(class_scores, axis=0)
+    candidates = np.flatnonzero(max_scores > NMS_SCORE_THRESHOLD)
 
-    res_array: np.ndarray = res.numpy()
-    
-    return res_array
+    boxes = decode_boxes(preds, candidates, width, height, video_width, video_height, padding, roi)
+    candidate_scores = max_scores[candidates].astype(np.float32)
+    candidate_classes = np.argmax(class_scores[:, candidates], axis=0)
 
-def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width: int, video_height: int, padding: Tuple[int, int, int, int], roi: Tuple[int, int]
-) -> Tuple[tf.Tensor, tf.Tensor]:
+    nms = non_max_suppression(boxes, candidate_scores, class_ids=candidate_classes if per_class else None)
+
+    return get_centers_and_classes(boxes[nms], candidate_classes[nms])
+
+
+def decode_boxes(
+    preds: np.ndarray,
+    columns: Optional[np.ndarray],
+    width: int,
+    height: int,
+    video_width: int,
+    video_height: int,
+    padding: Tuple[int, int, int, int],
+    roi: Tuple[int, int]
+) -> np.ndarray:
     """
-    This function processes predictions to extract bounding boxes and their associated scores.
+    Converts raw (xc, yc, w, h) predictions into [left, top, right, bottom] boxes in model coordinates.
 
     Args:
-        preds: The predictions array with shape (batch_size, num_boxes, num_predictions).
+        preds: The raw model output of shape (1, 4 + num_classes, num_boxes).
+        columns: Indices of the boxes to decode, or None to decode all of them.
         width: The width to scale the bounding box coordinates to.
         height: The height to scale the bounding box coordinates to.
         video_width: The width of the video for further scaling.
@@ -52,19 +245,17 @@ def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width
         roi: The region of interest, which is added to the bounding box coordinates.
 
     Returns:
-        A tuple containing the bounding boxes and scores as Tensor2D tensors.
+        np.ndarray: A float32 array of shape (num_boxes, 4).
     """
-    
-    # Transpose preds to match the desired shape
-    preds_t = np.transpose(preds, (0, 2, 1))  # Shape: (batch_size, num_predictions, num_boxes)
-    
+    xywh = preds[0, :4] if columns is None else preds[0][:4, columns]
+
     # Extract width (w) and height (h) of the boxes
-    w = preds_t[:, :, 2:3]  
-    h = preds_t[:, :, 3:4]  
-    
+    w = xywh[2]
+    h = xywh[3]
+
     # Convert xc, yc, w, h to l, t, r, b (left, top, right, bottom)
-    l = preds_t[:, :, 0:1] - (w / 2)  # Left
-    t = preds_t[:, :, 1:2] - (h / 2)  # Top
+    l = xywh[0] - (w / 2)  # Left
+    t = xywh[1] - (h / 2)  # Top
     r = l + w  # Right
     b = t + h  # Bottom
 
@@ -91,22 +282,31 @@ def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width
     r *= (MODEL_WIDTH / video_width)
     t *= (MODEL_HEIGHT / video_height)
     b *= (MODEL_HEIGHT / video_height)
-    
-    # Concatenate the left, top, right, and bottom coordinates to form the bounding boxes
-    boxes = np.concatenate([l, t, r, b], axis=2) 
 
-    # Extract the scores (assuming score is in the 5th element onward)
-    scores = preds_t[:, :, 4:] 
+    return np.stack([l, t, r, b], axis=1).astype(np.float32)
 
-    # Squeeze to remove unnecessary dimensions (if any)
-    boxes = np.squeeze(boxes, axis=0)
-    scores = np.squeeze(scores, axis=0)
 
-    # Convert to TensorFlow tensors
-    boxes_tf = tf.convert_to_tensor(boxes, dtype=tf.float32)
-    scores_tf = tf.convert_to_tensor(scores, dtype=tf.float32)
+def get_boxes_and_scores(preds: np.ndarray, width: int, height: int, video_width: int, video_height: int, padding: Tuple[int, int, int, int], roi: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    This function processes predictions to extract bounding boxes and their associated scores.
+
+    Args:
+        preds: The predictions array with shape (batch_size, num_predictions, num_boxes).
+        width: The width to scale the bounding box coordinates to.
+        height: The height to scale the bounding box coordinates to.
+        video_width: The width of the video for further scaling.
+        video_height: The height of the video for further scaling.
+        padding: The padding to adjust the bounding boxes.
+        roi: The region of interest, which is added to the bounding box coordinates.
+
+    Returns:
+        A tuple containing the bounding boxes of shape (num_boxes, 4) and scores of shape (num_boxes, num_classes) as float32 arrays.
+    """
+    boxes = decode_boxes(preds, None, width, height, video_width, video_height, padding, roi)
+    scores = preds[0, 4:].T.astype(np.float32)
 
-    return boxes_tf, scores_tf
+    return boxes, scores
 
 
 def get_bbox(points: List[Tuple[float, float]]) -> Dict[str, float]:
@@ -148,7 +348,7 @@ def get_bbox(points: List[Tuple[float, float]]) -> Dict[str, float]:
     return bbox
 
 
-def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
+def get_centers_of_bbox(boxes: np.ndarray) -> np.ndarray:
     """
     Calculates the center coordinates of bounding boxes.
 
@@ -158,14 +358,14 @@ def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
     for consistency with the model's data type.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 4), where each row represents 
+        boxes (np.ndarray): An array of shape (N, 4), where each row represents 
                             a bounding box with the format [left, top, right, bottom].
 
     Returns:
-        tf.Tensor: A tensor of shape (N, 2), where each row contains the center 
-                   coordinates [cx, cy] of the corresponding bounding box.
+        np.ndarray: An array of shape (N, 2), where each row contains the center 
+                    coordinates [cx, cy] of the corresponding bounding box.
     """
-    boxes = tf.cast(boxes, dtype=tf.float16)
+    boxes = boxes.astype(np.float16)
 
     # Extract left, top, right, and bottom coordinates
     l = boxes[:, 0:1]
@@ -174,37 +374,37 @@ def get_centers_of_bbox(boxes: tf.Tensor) -> tf.Tensor:
     b = boxes[:, 3:4]
 
     # Calculate center coordinates (cx, cy)
-    cx = (l + r) / 2
-    cy = (t + b) / 2
+    cx = (l + r) / np.float16(2)
+    cy = (t + b) / np.float16(2)
 
-    centers = tf.concat([cx, cy], axis=1)
+    centers = np.concatenate([cx, cy], axis=1)
     
     return centers
 
 
-def get_bbox_centers(boxes: tf.Tensor) -> tf.Tensor:
+def get_bbox_centers(boxes: np.ndarray) -> np.ndarray:
     """
     Calculates the center coordinates (cx, cy) of bounding boxes.
 
     Args:
-        boxes (tf.Tensor): A tensor of shape (N, 4), where each row represents 
-                           a bounding box in the format [left, top, right, bottom].
+        boxes (np.ndarray): An array of shape (N, 4), where each row represents 
+                            a bounding box in the format [left, top, right, bottom].
 
     Returns:
-        tf.Tensor: A tensor of shape (N, 2), where each row contains the center 
-                   coordinates [cx, cy] of the corresponding bounding box.
+        np.ndarray: An array of shape (N, 2), where each row contains the center 
+                    coordinates [cx, cy] of the corresponding bounding box.
     """
-    # Slice the boxes tensor to get l, r, and b
-    l = tf.cast(boxes[:, 0:1], tf.float32)  # Ensure l is float32
-    r = tf.cast(boxes[:, 2:3], tf.float32)  # Ensure r is float32
-    b = tf.cast(boxes[:, 3:4], tf.float32)  # Ensure b is float32
+    # Slice the boxes array to get l, r, and b
+    l = boxes[:, 0:1].astype(np.float32)  # Ensure l is float32
+    r = boxes[:, 2:3].astype(np.float32)  # Ensure r is float32
+    b = boxes[:, 3:4].astype(np.float32)  # Ensure b is float32
 
     # Calculate the center coordinates
     cx = (l + r) / 2
     cy = b - (r - l) / 3
 
     # Concatenate cx and cy to get the box centers
-    box_centers = tf.concat([cx, cy], axis=1)
+    box_centers = np.concatenate([cx, cy], axis=1)
 
     return box_centers
 
@@ -2,13 +2,17 @@ import numpy as np
 import onnxruntime as ort
 
 from typing import Tuple, List, Dict, Optional
-from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, MARKER_DIAMETER, CORNER_KEYS
-from logic.machine_learning.maths.quad_transformation import get_quads, score_quad, perspective_transform, clamp, euclidean_distance
-from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, get_center_of_set_of_points, process_boxes_and_scores, get_xy
-from logic.machine_learning.utilities.preprocess import get_input
+from logic.machine_learning.utilities.constants import (
+    MODEL_WIDTH, MODEL_HEIGHT, MARKER_DIAMETER, CORNER_KEYS, CORNER_FIT_METHOD, CORNER_FIT_EXHAUSTIVE, CORNER_FIT_RANSAC
+)
+from logic.machine_learning.maths.quad_transformation import get_quads, score_quads, fit_lattice_ransac, euclidean_distance
+from logic.machine_learning.maths.homography import perspective_transform, invert_transform
+from logic.machine_learning.detection.bbox_scores import get_detections, get_center_of_set_of_points, get_xy
+from logic.machine_learning.utilities.preprocess import Letterbox, get_input
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
 
 
-async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.InferenceSession, pieces: List[dict]) -> List[List[float]]:
+async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.InferenceSession, pieces: List[dict], letterbox: Optional[Letterbox] = None, keypoints: Optional[np.ndarray] = None) -> List[List[float]]:
     """
     Processes a video reference using a corners detection model to predict x_corners pieces in the video.
 
@@ -16,6 +20,8 @@ async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.Inference
     - frame: A reference to the video data.
     - corners_model_ref: A reference to the corner detection model used to predict the corners of the pieces.
     - pieces: A list of detected chess pieces, each containing information about their bounding box and class.
+    - letterbox: Input buffers of the board, a new Letterbox is used if omitted.
+    - keypoints: Points in model coordinates bounding the region to search, the bounds of the pieces if omitted.
 
     Returns:
     - preds: A list of predicted x_corner positions
@@ -23,27 +29,29 @@ async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.Inference
     video_height, video_width, _ = frame.shape
 
     # Extract the keypoints (coordinates of the chess pieces) from the pieces list.
-    keypoints: List[List[float]] = [[x[0], x[1]] for x in pieces]
+    if keypoints is None:
+        keypoints = [[x[0], x[1]] for x in pieces]
 
     # Prepare the input image for the x_corner detection model
-    image4d, width, height, padding, roi = get_input(frame, keypoints)
+    letterbox = letterbox or Letterbox()
+    image4d, width, height, padding, roi = await detector_runtime.run_cpu(get_input, frame, keypoints, 12, letterbox)
 
-    # Run the ONNX model directly, skipping the predict_xcorners wrapper
+    # Run the ONNX model directly on the CPU pool, skipping the predict_xcorners wrapper
     model_inputs = corners_model_ref.get_inputs()
     
-    x_corner_predictions = corners_model_ref.run(
+    x_corner_predictions = (await detector_runtime.run_cpu(
+        corners_model_ref.run,
         output_names=None,
-        input_feed={model_inputs[0].name: image4d})[0]
+        input_feed={model_inputs[0].name: image4d}))[0]
 
-    # Extract boxes and scores from predictions
-    boxes, scores = get_boxes_and_scores(x_corner_predictions, width, height, video_width, video_height, padding, roi)
+    # Non-max suppression straight on the raw (1, C, N) prediction
+    x_corners_optimized = await detector_runtime.run_cpu(
+        get_detections, x_corner_predictions, width, height, video_width, video_height, padding, roi
+    )
 
     del x_corner_predictions 
     del image4d 
 
-    # Post-process predictions (e.g., non-max suppression)
-    x_corners_optimized = process_boxes_and_scores(boxes, scores)
-
     # Extract (x, y) coordinates
     x_corners = [[x[0], x[1]] for x in x_corners_optimized]
 
@@ -51,56 +59,56 @@ async def run_xcorners_model(frame: np.ndarray, corners_model_ref: ort.Inference
 
 
 
-def find_board_corners_from_xcorners(x_corners: np.ndarray) -> Optional[List[List[float]]]:
+def find_board_corners_from_xcorners(x_corners: np.ndarray, method: str = CORNER_FIT_METHOD) -> Optional[np.ndarray]:
     """
     Given the detected x_corners, find the corners of a quadrilateral using perspective transformation.
     
     Parameters:
     - x_corners: A NumPy array representing the optimized x_corner predictions (should be of shape (N, 2)).
+    - method: CORNER_FIT_EXHAUSTIVE scores every quad, CORNER_FIT_RANSAC samples quads until one fits
+      the lattice with enough confidence, which bounds the latency when there are many false x_corners.
     
     Returns:
-    - A list of four corners (each represented as [x, y] coordinates) if a valid quadrilateral is found.
+    - A (4, 2) array of the four corners if a valid quadrilateral is found.
     - None if no valid quadrilateral could be determined.
+
+    Raises:
+    - ValueError: If the method is unknown.
     """
-    quads: List[np.ndarray] = get_quads(x_corners)
+    if method not in (CORNER_FIT_EXHAUSTIVE, CORNER_FIT_RANSAC):
+        raise ValueError(f"Unknown corner fitting method {method}.")
+
+    quads: np.ndarray = get_quads(x_corners)
     
     if len(quads) == 0:
         return None
     
-    best_score: float = None
-    best_m: np.ndarray = None
-    best_offset: np.ndarray = None
-    
-    # Assume score_quad returns score, M, offset
-    best_score, best_m, best_offset = score_quad(quads[0], x_corners)
-    
-    for quad in quads[1:]:
-        score, m, offset = score_quad(quad, x_corners)
-        if score > best_score:
-            best_score = score
-            best_m = m
-            best_offset = offset
+    if method == CORNER_FIT_RANSAC:
+        fit = fit_lattice_ransac(quads, x_corners)
+        if fit is None:
+            return None
+        best_m, best_offset, _, _ = fit
+    else:
+        # Score all quads in one batch, the first of equally good quads wins
+        scores, transforms, offsets = score_quads(quads, x_corners)
+        best: int = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            return None
+        
+        best_m: np.ndarray = transforms[best]
+        best_offset: np.ndarray = offsets[best]
     
     # Inverse matrix calculation
-    inv_m: np.ndarray = np.linalg.inv(best_m)
+    inv_m: np.ndarray = invert_transform(best_m)
     
     # Define warped corners based on offset
-    warped_corners: List[List[float]] = [
-        [best_offset[0] - 1, best_offset[1] - 1],
-        [best_offset[0] - 1, best_offset[1] + 7],
-        [best_offset[0] + 7, best_offset[1] + 7],
-        [best_offset[0] + 7, best_offset[1] - 1]
-    ]
+    warped_corners: np.ndarray = best_offset + np.array([[-1, -1], [-1, 7], [7, 7], [7, -1]])
     
     # Apply perspective transform
-    corners: List[List[float]] = perspective_transform(warped_corners, inv_m)
+    corners: np.ndarray = perspective_transform(warped_corners, inv_m)
     
     # Clip corners
-    for i in range(4):
-        corners[i][0] = clamp(corners[i][0], 0, MODEL_WIDTH)
-        corners[i][1] = clamp(corners[i][1], 0, MODEL_HEIGHT)
-    
-    return corners
+    return np.clip(corners, 0, [MODEL_WIDTH, MODEL_HEIGHT])
 
 
 
@@ -0,0 +1,212 @@
+"""
+Cross-board batching of the pieces model.
+
+Batching only takes effect with a dynamic-batch export. The bundled ONNX models take a static
+[1, 3, 288, 480] input, so with them every frame runs on its own, straight on the CPU pool.
+"""
+import asyncio
+import threading
+import time
+import numpy as np
+import onnxruntime as ort
+
+from concurrent.futures import Future
+from queue import Queue, Empty
+from typing import Callable, Dict, List, Optional, Tuple
+from logic.machine_learning.utilities.constants import INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_S
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+import logic.api.services.board_storage as storage
+
+
+def count_boards() -> int:
+    """ Returns the number of boards that can submit frames at the same time, in this process. """
+    return max(len(storage.boards), len(detector_runtime.detectors), 1)
+
+
+class InferenceScheduler:
+    """
+    Collects single-frame inference requests from every board and runs them as one batch.
+
+    Each detector submits its preprocessed (1, 3, H, W) tensor and awaits the result. A single
+    worker thread waits for the first request, keeps collecting until either every board has
+    submitted a frame, the batch is full, or the max-wait deadline has passed, then stacks the
+    frames into one NCHW batch, runs the model once and scatters the predictions back.
+
+    Models exported with a static batch dimension larger than 1 are run in chunks of that size.
+    Batch-1 exports gain nothing from waiting for other boards, so their frames skip the worker
+    and run straight on the CPU pool, like the x-corners model.
+
+    Requests whose caller was cancelled before the worker picked them up are dropped, and a
+    failing batch only fails its own requests, so the worker thread keeps serving every board.
+    """
+
+    def __init__(
+        self,
+        session: ort.InferenceSession,
+        max_batch_size: int = INFERENCE_MAX_BATCH_SIZE,
+        max_wait: float = INFERENCE_MAX_WAIT_S,
+        expected_requests: Callable[[], int] = count_boards
+    ):
+        """
+        Args:
+            session (ort.InferenceSession): The shared session to run.
+            max_batch_size (int): Maximum number of frames collected into one batch.
+            max_wait (float): Seconds to wait for more frames after the first one arrives.
+            expected_requests (Callable[[], int]): Number of frames that can be pending at once,
+                a batch is flushed early when it is reached.
+        """
+        model_input = session.get_inputs()[0]
+
+        self.session = session
+        self.input_name = model_input.name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.expected_requests = expected_requests
+
+        # Static batch dimensions (e.g. batch=1 exports) limit how many frames one run can take
+        batch_dim = model_input.shape[0]
+        self.model_batch_size: Optional[int] = batch_dim if isinstance(batch_dim, int) and batch_dim > 0 else None
+
+        self.batches_run = 0
+        self.frames_run = 0
+
+        self._requests: Queue[Tuple[np.ndarray, Future]] = Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, image4d: np.ndarray) -> Future:
+        """
+        Queues a single frame for inference.
+
+        Args:
+            image4d (np.ndarray): The preprocessed input of shape (1, 3, H, W).
+
+        Returns:
+            Future: Resolves to the model output for this frame, of shape (1, C, N).
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._requests.put((image4d, future))
+        return future
+
+    async def run(self, image4d: np.ndarray) -> np.ndarray:
+        """
+        Runs a single frame through the batched model from an async detector.
+
+        Args:
+            image4d (np.ndarray): The preprocessed input of shape (1, 3, H, W).
+
+        Returns:
+            np.ndarray: The model output for this frame, of shape (1, C, N).
+        """
+        if self.model_batch_size == 1:
+            predictions = await detector_runtime.run_cpu(self.session.run, None, {self.input_name: image4d})
+            self.batches_run += 1
+            self.frames_run += 1
+            return predictions[0]
+
+        return await asyncio.wrap_future(self.submit(image4d))
+
+    def mean_batch_size(self) -> float:
+        """ Returns the average number of frames per batch run so far. """
+        return self.frames_run / self.batches_run if self.batches_run else 0.0
+
+    def _ensure_started(self) -> None:
+        """ Starts the worker thread on first use. """
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        """
+        Blocks for the first request, then gathers more until the batch is complete or the deadline passes.
+
+        Every request is claimed with ``set_running_or_notify_cancel``, so a caller can no longer
+        cancel it once it is in a batch, and requests cancelled before that are dropped.
+
+        Returns:
+            List[Tuple[np.ndarray, Future]]: The requests of the next batch.
+        """
+        batch: List[Tuple[np.ndarray, Future]] = []
+        while not batch:
+            request = self._requests.get()
+            if request[1].set_running_or_notify_cancel():
+                batch.append(request)
+
+        target = min(self.max_batch_size, self.expected_requests())
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < target:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=remaining)
+            except Empty:
+                break
+            if request[1].set_running_or_notify_cancel():
+                batch.append(request)
+
+        return batch
+
+    def _worker(self) -> None:
+        """ Runs collected batches forever. """
+        while True:
+            try:
+                batch = self._collect()
+                chunk_size = self.model_batch_size or len(batch)
+
+                for start in range(0, len(batch), chunk_size):
+                    self._run_chunk(batch[start:start + chunk_size])
+            except Exception as e:
+                print(f"Inference batch failed: {e!r}")
+
+    def _run_chunk(self, chunk: List[Tuple[np.ndarray, Future]]) -> None:
+        """
+        Runs one model call and scatters the predictions to the waiting futures.
+
+        Args:
+            chunk (List[Tuple[np.ndarray, Future]]): Requests that fit into a single model call.
+        """
+        images = [image for image, _ in chunk]
+        batch = images[0] if len(images) == 1 else np.concatenate(images, axis=0)
+
+        try:
+            predictions = self.session.run(None, {self.input_name: batch})[0]
+        except Exception as e:
+            for _, future in chunk:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.frames_run += len(chunk)
+
+        for i, (_, future) in enumerate(chunk):
+            if not future.done():
+                future.set_result(predictions[i:i + 1])
+
+
+_schedulers: Dict[int, InferenceScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_inference_scheduler(session: ort.InferenceSession) -> InferenceScheduler:
+    """
+    Returns the process-wide scheduler of a session, creating it on first use.
+
+    Args:
+        session (ort.InferenceSession): A session from the model registry.
+
+    Returns:
+        InferenceScheduler: The scheduler shared by every board using this session.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(id(session))
+        if scheduler is None:
+            scheduler = InferenceScheduler(session)
+            _schedulers[id(session)] = scheduler
+        return scheduler
@@ -1,18 +1,22 @@
 import numpy as np
 import onnxruntime as ort
-from typing import Tuple
+from typing import Optional, Tuple
 
-from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, process_boxes_and_scores
-from logic.machine_learning.utilities.preprocess import get_input
+from logic.machine_learning.detection.bbox_scores import get_boxes_and_scores, get_detections
+from logic.machine_learning.detection.inference_scheduler import get_inference_scheduler
+from logic.machine_learning.utilities.preprocess import Letterbox, get_input
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
 
 
-async def run_pieces_model(frame, pieces_model_ref):
+async def run_pieces_model(frame, pieces_model_ref, letterbox: Optional[Letterbox] = None, keypoints: Optional[np.ndarray] = None):
     """
     Processes a video frame using the given pieces detection model to predict chess pieces.
 
     Parameters:
     - frame: A single video frame (image).
     - pieces_model_ref: ONNX InferenceSession for piece detection.
+    - letterbox: Input buffers of the board, a new Letterbox is used if omitted.
+    - keypoints: Points in model coordinates bounding the region to search, the whole frame if omitted.
 
     Returns:
     - pieces: A list of detected chess pieces as (x, y, pieceTypeIndex).
@@ -20,25 +24,21 @@ async def run_pieces_model(frame, pieces_model_ref):
     
     frame_height, frame_width, _ = frame.shape
 
-    # Prepare the input tensor
-    image4d, width, height, padding, roi = get_input(frame)
+    # Prepare the input tensor on the CPU pool
+    letterbox = letterbox or Letterbox()
+    image4d, width, height, padding, roi = await detector_runtime.run_cpu(get_input, frame, keypoints, 12, letterbox)
 
-    # Prepare input dict for inference
-    inputs = {pieces_model_ref.get_inputs()[0].name: image4d}
+    # Run model, batched with the frames of the other boards when the export allows it
+    pieces_prediction = await get_inference_scheduler(pieces_model_ref).run(image4d)
 
-    # Run model
-    pieces_prediction = pieces_model_ref.run(None, inputs)
-
-    # Process prediction
-    boxes, scores = get_boxes_and_scores(pieces_prediction[0], width, height, frame_width, frame_height, padding, roi)
-
-    # Final filtering/postprocessing
-    pieces = process_boxes_and_scores(boxes, scores)
+    # Non-max suppression straight on the raw (1, C, N) prediction
+    pieces = await detector_runtime.run_cpu(
+        get_detections, pieces_prediction, width, height, frame_width, frame_height, padding, roi
+    )
 
     # Clean up
     del pieces_prediction
     del image4d  
-    del boxes  
 
     return pieces
 
@@ -114,13 +114,17 @@ def predict_pieces(frame, ort_session):
     return pieces_predictions
 
 
-async def detect(pieces_model_ref, video_ref, keypoints):
+async def detect(pieces_model_ref, video_ref, keypoints, letterbox: Optional[Letterbox] = None):
     frame_height, frame_width, _ = video_ref.shape
 
-    image4d, width, height, padding, roi = get_input(video_ref, keypoints)
+    letterbox = letterbox or Letterbox()
+    image4d, width, height, padding, roi = await detector_runtime.run_cpu(get_input, video_ref, keypoints, 12, letterbox)
 
-    pieces_prediction = predict_pieces(image4d, pieces_model_ref)
-    boxes, scores = get_boxes_and_scores(pieces_prediction, width, height, frame_width, frame_height, padding, roi)
+    # Frames from every board are stacked into one batch by the shared scheduler, if the export batches
+    pieces_prediction = await get_inference_scheduler(pieces_model_ref).run(image4d)
+    boxes, scores = await detector_runtime.run_cpu(
+        get_boxes_and_scores, pieces_prediction, width, height, frame_width, frame_height, padding, roi
+    )
     
 
     del pieces_prediction
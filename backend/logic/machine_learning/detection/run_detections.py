@@ -5,9 +5,11 @@ from typing import List, Dict, Tuple, Optional
 from logic.machine_learning.utilities.constants import CORNER_KEYS
 from logic.machine_learning.detection.corners_detection import run_xcorners_model, find_board_corners_from_xcorners, assign_labels_to_board_corners, scale_xy_board_corners, extract_xy_from_labeled_corners
 from logic.machine_learning.detection.piece_detection import run_pieces_model
+from logic.machine_learning.utilities.preprocess import Letterbox
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
 from logic.machine_learning.maths.warp import get_inv_transform, transform_centers, transform_boundary
 
-async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.InferenceSession, xcorners_model_ref: ort.InferenceSession) -> Optional[np.ndarray]: 
+async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.InferenceSession, xcorners_model_ref: ort.InferenceSession, letterbox: Optional[Letterbox] = None, roi_keypoints: Optional[np.ndarray] = None) -> Optional[np.ndarray]: 
     """
     Detects corners on a chessboard using ONNX models.
 
@@ -15,6 +17,9 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
         video_ref (np.ndarray): The input video frame.
         pieces_model_ref (ort.InferenceSession): ONNX model for detecting chess pieces.
         xcorners_model_ref (ort.InferenceSession): ONNX model for detecting x_corners.
+        letterbox (Optional[Letterbox]): Input buffers of the board, a new Letterbox is used if omitted.
+        roi_keypoints (Optional[np.ndarray]): Tracked region of the board in model coordinates, both models
+            only look inside it. The whole frame is searched if omitted.
 
     Returns:
         Optional[np.ndarray]: Processed frame with centers visualized, or None if detection fails.
@@ -24,7 +29,8 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
     # We extract the top 16 predicted pieces for both black and white players
     # Pieces is on the format [x, y, pieceTypeIndex]
     
-    pieces: List[List[int]] = await run_pieces_model(video_ref, pieces_model_ref)
+    letterbox = letterbox or Letterbox()
+    pieces: List[List[int]] = await run_pieces_model(video_ref, pieces_model_ref, letterbox, roi_keypoints)
 
     # Metadata of model tells us white pieces index range from 0-5 
     # while black pieces index from 6-11
@@ -36,7 +42,7 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
         return None
 
     # Extracts the top 49 predicted x_corners for the chess board (inner 7x7 grid)
-    x_corners: List[List[int]] = await run_xcorners_model(video_ref, xcorners_model_ref, pieces)
+    x_corners: List[List[int]] = await run_xcorners_model(video_ref, xcorners_model_ref, pieces, letterbox, roi_keypoints)
 
     if len(x_corners) < 5:
         print("Not enough x_corners")
@@ -44,7 +50,10 @@ async def get_board_corners(video_ref: np.ndarray, pieces_model_ref: ort.Inferen
 
     # Extracts the 4 outer corners of the chess board
     # Important to note that these board_corners ARE NOT labeled (a1,a8,h1,h8)
-    board_corners: List[Tuple[int, int]] = find_board_corners_from_xcorners(x_corners)
+    board_corners: Optional[np.ndarray] = await detector_runtime.run_cpu(find_board_corners_from_xcorners, x_corners)
+    if board_corners is None:
+        print("No board found in the x_corners")
+        return None
 
     # Assigns the labels (a1,a8,h1,h8) to the board_corners based on the 
     # placement of the white and black pieces
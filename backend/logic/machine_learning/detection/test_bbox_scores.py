@@ -0,0 +1,87 @@
+import unittest
+import numpy as np
+from logic.machine_learning.detection.bbox_scores import non_max_suppression, get_boxes_and_scores, process_boxes_and_scores, get_detections
+from benchmarks.reference import HAS_TENSORFLOW
+
+class TestNonMaxSuppression(unittest.TestCase):
+    """ Unit tests for the NumPy non-max suppression. """
+
+    def setUp(self) -> None:
+        self.boxes = np.array([
+            [0, 0, 10, 10],
+            [1, 1, 11, 11],    # IoU 0.68 with the first box
+            [20, 20, 30, 30],
+            [21, 20, 31, 30],  # IoU 0.82 with the third box
+            [50, 50, 60, 60]
+        ], dtype=np.float32)
+        self.scores = np.array([0.9, 0.95, 0.5, 0.4, 0.05], dtype=np.float32)
+
+    def test_greedy_selection(self) -> None:
+        """ Test boxes are selected by score and overlapping lower scores are suppressed. """
+        selected = non_max_suppression(self.boxes, self.scores, max_output_size=10, iou_threshold=0.3, score_threshold=0.1)
+
+        self.assertEqual(selected.tolist(), [1, 2])
+
+    def test_max_output_size(self) -> None:
+        """ Test no more than max_output_size boxes are returned. """
+        selected = non_max_suppression(self.boxes, self.scores, max_output_size=1, iou_threshold=0.3, score_threshold=0.1)
+
+        self.assertEqual(selected.tolist(), [1])
+
+    def test_per_class(self) -> None:
+        """ Test boxes of different classes do not suppress each other. """
+        class_ids = np.array([0, 1, 2, 2, 3])
+        selected = non_max_suppression(self.boxes, self.scores, max_output_size=10, iou_threshold=0.3, score_threshold=0.1, class_ids=class_ids)
+
+        self.assertEqual(selected.tolist(), [1, 0, 2])
+
+    def test_no_candidates(self) -> None:
+        """ Test an empty selection when every score is below the threshold. """
+        selected = non_max_suppression(self.boxes, self.scores * 0, max_output_size=10, iou_threshold=0.3, score_threshold=0.1)
+
+        self.assertEqual(selected.size, 0)
+
+    def test_many_candidates(self) -> None:
+        """ Test more candidates than the IoU matrix is built for give the same selection, with and without classes. """
+        rng = np.random.default_rng(1)
+        corners = rng.uniform(0, 400, (3000, 2))
+        boxes = np.concatenate([corners, corners + rng.uniform(5, 40, (3000, 2))], axis=1).astype(np.float32)
+        boxes[:20, 2:] = boxes[:20, :2]  # empty boxes
+        scores = rng.uniform(0.2, 1, 3000).astype(np.float32)
+        class_ids = rng.integers(0, 12, 3000)
+
+        for classes in (None, class_ids):
+            for max_output_size in (100, 3000):
+                expected = non_max_suppression(boxes, scores, max_output_size, 0.3, 0.1, classes, max_candidates=3000)
+                selected = non_max_suppression(boxes, scores, max_output_size, 0.3, 0.1, classes, max_candidates=1000)
+                np.testing.assert_array_equal(selected, expected)
+        self.assertGreater(len(expected), 1000)
+
+    @unittest.skipUnless(HAS_TENSORFLOW, "TensorFlow is not installed")
+    def test_many_candidates_match_tensorflow(self) -> None:
+        """ Test the selection among more than 1000 candidates is the one of tf.image.non_max_suppression. """
+        import tensorflow as tf
+
+        rng = np.random.default_rng(2)
+        corners = rng.uniform(0, 400, (3000, 2))
+        boxes = np.concatenate([corners, corners + rng.uniform(5, 40, (3000, 2))], axis=1).astype(np.float32)
+        scores = rng.uniform(0, 1, 3000).astype(np.float32)
+
+        expected = tf.image.non_max_suppression(boxes, scores, 3000, iou_threshold=0.3, score_threshold=0.1).numpy()
+        selected = non_max_suppression(boxes, scores, 3000, 0.3, 0.1)
+        np.testing.assert_array_equal(selected, expected)
+
+    def test_raw_output_matches_boxes_and_scores(self) -> None:
+        """ Test NMS on the raw model output selects the same detections as on decoded boxes and scores. """
+        rng = np.random.default_rng(0)
+        preds = np.zeros((1, 16, 2835), dtype=np.float16)
+        preds[0, 0] = rng.uniform(0, 480, 2835)
+        preds[0, 1] = rng.uniform(0, 288, 2835)
+        preds[0, 2:4] = rng.uniform(8, 40, (2, 2835))
+        confident = rng.choice(2835, 200, replace=False)
+        preds[0, 4:, confident] = rng.uniform(0, 1, (200, 12))
+        args = (1280, 720, 1920, 1080, [0, 0, 9, 9], [100, 50])
+
+        expected = process_boxes_and_scores(*get_boxes_and_scores(preds, *args))
+
+        np.testing.assert_array_equal(get_detections(preds, *args), expected)
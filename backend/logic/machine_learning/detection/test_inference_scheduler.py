@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import types
+import unittest
+import numpy as np
+
+from logic.machine_learning.detection.inference_scheduler import InferenceScheduler
+
+
+class FakeSession:
+    """ A session that echoes the mean of each frame, and can be held inside a model run. """
+
+    def __init__(self, batch_size="batch"):
+        self.batch_size = batch_size
+        self.released = threading.Event()
+        self.released.set()
+        self.started = threading.Event()
+        self.calls = []
+
+    def get_inputs(self):
+        return [types.SimpleNamespace(name="images", shape=[self.batch_size, 3, 4, 4])]
+
+    def run(self, outputs, feeds):
+        self.started.set()
+        self.released.wait(timeout=5.0)
+        batch = feeds["images"]
+        self.calls.append(len(batch))
+        return [batch.mean(axis=(1, 2, 3)).reshape(-1, 1, 1)]
+
+
+def make_frame(value: float) -> np.ndarray:
+    """ A preprocessed (1, 3, H, W) frame filled with one value. """
+    return np.full((1, 3, 4, 4), value, dtype=np.float32)
+
+
+class TestInferenceScheduler(unittest.IsolatedAsyncioTestCase):
+    """ Unit tests for the InferenceScheduler class. """
+
+    async def test_batches_frames(self) -> None:
+        """ Test that frames pending together run as one batch and each gets its own prediction. """
+        session = FakeSession()
+        scheduler = InferenceScheduler(session, max_wait=0.5, expected_requests=lambda: 3)
+
+        results = await asyncio.gather(*(scheduler.run(make_frame(value)) for value in (1.0, 2.0, 3.0)))
+
+        self.assertEqual([float(result[0, 0, 0]) for result in results], [1.0, 2.0, 3.0])
+        self.assertEqual(session.calls, [3])
+
+    async def test_cancelled_request(self) -> None:
+        """ Test that cancelled callers, queued or in a running batch, do not stop the worker. """
+        session = FakeSession()
+        session.released.clear()
+        scheduler = InferenceScheduler(session, max_wait=0.0, expected_requests=lambda: 1)
+
+        running = asyncio.ensure_future(scheduler.run(make_frame(1.0)))
+        await asyncio.get_running_loop().run_in_executor(None, session.started.wait, 5.0)
+        queued = asyncio.ensure_future(scheduler.run(make_frame(2.0)))
+        await asyncio.sleep(0)
+
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+        session.released.set()
+
+        result = await asyncio.wait_for(scheduler.run(make_frame(3.0)), timeout=2.0)
+        self.assertEqual(float(result[0, 0, 0]), 3.0)
+        self.assertTrue(scheduler._thread.is_alive())
+        self.assertEqual(session.calls, [1, 1])
+
+    async def test_batch_one_model(self) -> None:
+        """ Test that frames of a batch-1 export run right away on the CPU pool, without the worker. """
+        session = FakeSession(batch_size=1)
+        scheduler = InferenceScheduler(session, max_wait=5.0, expected_requests=lambda: 4)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(scheduler.run(make_frame(value)) for value in (1.0, 2.0))), timeout=2.0
+        )
+
+        self.assertEqual([float(result[0, 0, 0]) for result in results], [1.0, 2.0])
+        self.assertIsNone(scheduler._thread)
+        self.assertEqual(session.calls, [1, 1])
+        self.assertEqual(scheduler.mean_batch_size(), 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
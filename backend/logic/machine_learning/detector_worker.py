@@ -0,0 +1,181 @@
+import asyncio
+import time
+import chess
+import numpy as np
+
+from multiprocessing.queues import Queue
+from typing import Dict, Optional, Tuple
+from logic.api.entity.frame_grabber import GrabbedFrame
+from logic.machine_learning.run_video import process_video
+from logic.machine_learning.board_state.frame_sampler import AdaptiveSampler, SamplerConfig
+from logic.machine_learning.board_state.square_gate import SquareChangeGate
+from logic.machine_learning.board_state.board_tracker import BoardTracker
+from logic.machine_learning.utilities.model_registry import model_registry
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+from logic.machine_learning.utilities.shared_frames import SharedFrameRing
+from logic.machine_learning.utilities.constants import PIECES_MODEL, XCORNERS_MODEL, SHARED_FRAME_POLL_S
+
+
+class ShadowGame:
+    """
+    Copy of a board's game kept by a detector worker process, which has no access to the board storage.
+    """
+
+    def __init__(self, fen: str):
+        """
+        Args:
+            fen (str): Position the game starts from.
+        """
+        self.chess_board = chess.Board(fen)
+        self.move_history = []
+
+    def reset(self, fen: str) -> None:
+        """
+        Resets the game to a position, clearing the move history.
+
+        Args:
+            fen (str): Position to reset to.
+        """
+        self.chess_board.set_fen(fen)
+        self.move_history = []
+
+
+class SharedFrameReader:
+    """
+    Frame provider of a detector worker, reading a board's frames from a shared memory ring.
+
+    Offers the ``acquire``/``release`` interface of a FrameSubscription, so ``process_video``
+    runs unchanged. Every frame is copied once into a buffer owned by the reader.
+    """
+
+    def __init__(self, ring: SharedFrameRing):
+        """
+        Args:
+            ring (SharedFrameRing): The ring the API process writes the board's frames to.
+        """
+        self.ring = ring
+        self.buffer = np.empty(ring.shape, dtype=np.uint8)
+        self.last_seq = -1
+        self.running = True
+        self.frames_read = 0
+        self.frames_torn = 0
+
+    @property
+    def active(self) -> bool:
+        """ Whether the reader is still delivering frames. """
+        return self.running
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[GrabbedFrame]:
+        """
+        Copies the next frame out of the ring, polling until one arrives.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a frame, None to wait indefinitely.
+
+        Returns:
+            Optional[GrabbedFrame]: The frame, valid until the next call, or None on timeout or after ``close``.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.running:
+            seq = self.ring.read(self.buffer, self.last_seq)
+            if seq is not None:
+                self.last_seq = seq
+                self.frames_read += 1
+                return GrabbedFrame(seq, 0, self.buffer)
+            if self.ring.latest_seq > self.last_seq:
+                self.frames_torn += 1
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(SHARED_FRAME_POLL_S)
+        return None
+
+    def release(self, frame: GrabbedFrame) -> None:
+        """ Frames are copies owned by the reader, nothing to give back. """
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Frames read from the ring and copies discarded because the writer overtook them.
+        """
+        return {"read": self.frames_read, "torn": self.frames_torn}
+
+
+async def serve(board_fens: Dict[int, str], commands: Queue, events: Queue, sampler_configs: Optional[Dict[int, SamplerConfig]] = None) -> None:
+    """
+    Runs the detectors of a worker process until it is told to stop.
+
+    The API process sends ``("attach", board_id, ring_name, shape, slots)`` once the first frame
+    of a board is in shared memory, ``("reset", board_id, fen, generation)`` when a game is reset
+    and ``("stop",)`` on shutdown. Detected moves are returned as
+    ``("move", board_id, generation, san, fen_before, fen_after)``, tagged with the generation of
+    the last reset so the API process can drop moves of a game that was reset since.
+
+    Args:
+        board_fens (Dict[int, str]): Starting position of every board handled by the worker.
+        commands (Queue): Commands from the API process.
+        events (Queue): Move events for the API process.
+        sampler_configs (Optional[Dict[int, SamplerConfig]]): Frame sampling settings of every board.
+    """
+    sampler_configs = sampler_configs or {}
+    detector_runtime.attach(asyncio.get_running_loop())
+    await asyncio.to_thread(model_registry.load_all)
+    piece_session = model_registry.get_session(PIECES_MODEL)
+    corner_session = model_registry.get_session(XCORNERS_MODEL)
+
+    games = {board_id: ShadowGame(fen) for board_id, fen in board_fens.items()}
+    # Kept per board, so a reset also clears the evidence and timers of the previous game
+    trackers = {board_id: BoardTracker(board_id) for board_id in board_fens}
+    gates = {board_id: SquareChangeGate() for board_id in board_fens}
+    generations = {board_id: 0 for board_id in board_fens}
+    readers: Dict[int, SharedFrameReader] = {}
+
+    async def on_move(board_id: int, move: str, game: ShadowGame) -> None:
+        game.move_history.append(move)
+        before = game.chess_board.copy(stack=1)
+        before.pop()
+        events.put(("move", board_id, generations[board_id], move, before.fen(), game.chess_board.fen()))
+
+    try:
+        while True:
+            command: Tuple = await asyncio.to_thread(commands.get)
+            if command[0] == "attach":
+                _, board_id, name, shape, slots = command
+                reader = SharedFrameReader(SharedFrameRing.attach(name, shape, slots))
+                readers[board_id] = reader
+                detector_runtime.spawn(board_id, process_video(
+                    piece_session, corner_session, reader, board_id, games[board_id], on_move,
+                    show=False, sampler=AdaptiveSampler(sampler_configs.get(board_id)),
+                    gate=gates[board_id], tracker=trackers[board_id]
+                ))
+            elif command[0] == "reset":
+                _, board_id, fen, generation = command
+                generations[board_id] = generation
+                games[board_id].reset(fen)
+                trackers[board_id].reset_state()
+                gates[board_id].reset()
+            elif command[0] == "stop":
+                break
+    finally:
+        # Let every detector leave its frame before the shared memory is unmapped
+        for reader in readers.values():
+            reader.running = False
+        detectors = [asyncio.wrap_future(future) for future in detector_runtime.detectors.values()]
+        if detectors:
+            await asyncio.wait(detectors, timeout=5.0)
+        detector_runtime.stop()
+        for reader in readers.values():
+            reader.ring.close()
+
+
+def run_worker(board_fens: Dict[int, str], commands: Queue, events: Queue, sampler_configs: Optional[Dict[int, SamplerConfig]] = None) -> None:
+    """
+    Entry point of a detector worker process.
+
+    Args:
+        board_fens (Dict[int, str]): Starting position of every board handled by the worker.
+        commands (Queue): Commands from the API process.
+        events (Queue): Move events for the API process.
+        sampler_configs (Optional[Dict[int, SamplerConfig]]): Frame sampling settings of every board.
+    """
+    asyncio.run(serve(board_fens, commands, events, sampler_configs))
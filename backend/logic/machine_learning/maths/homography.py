@@ -0,0 +1,141 @@
+import numpy as np
+
+from typing import Tuple
+from numpy.typing import ArrayLike
+
+
+def get_perspective_transform(target: ArrayLike, keypoints: ArrayLike) -> np.ndarray:
+    """
+    Computes the perspective transformation matrix that maps the xy in `keypoints` to the xy in `target`.
+
+    Args:
+        target (ArrayLike): (4, 2) points the keypoints are mapped to.
+        keypoints (ArrayLike): (4, 2) points that are mapped.
+
+    Returns:
+        np.ndarray: The 3x3 perspective transformation matrix.
+
+    Raises:
+        np.linalg.LinAlgError: If three of the keypoints lie on a line.
+    """
+    transforms, solved = get_perspective_transforms(target, np.asarray(keypoints, dtype=np.float64)[None])
+    if not solved[0]:
+        raise np.linalg.LinAlgError("Singular matrix")
+    return transforms[0]
+
+
+def get_perspective_transforms(target: ArrayLike, keypoints: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the perspective transformation matrices that map each set of `keypoints` to `target`.
+
+    Each transform has 8 unknowns, the last entry is fixed to 1. Every point pair gives two linear
+    equations, u * (g * x + h * y + 1) = a * x + b * y + c and the same for v, so the 8x8 systems
+    of all sets are solved in one batch.
+
+    Args:
+        target (ArrayLike): (4, 2) points, shared by all sets, or (Q, 4, 2) points, one set per transform.
+        keypoints (ArrayLike): (Q, 4, 2) points that are mapped.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (Q, 3, 3) transformation matrices and a (Q,) mask of the sets
+            that could be solved. The matrices of sets that could not be solved are the identity.
+    """
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    num_sets = len(keypoints)
+    target = np.broadcast_to(np.asarray(target, dtype=np.float64), keypoints.shape)
+    x, y = keypoints[..., 0], keypoints[..., 1]
+    u, v = target[..., 0], target[..., 1]
+    zeros, ones = np.zeros_like(x), np.ones_like(x)
+
+    A = np.empty((num_sets, 8, 8))
+    A[:, 0::2] = np.stack([x, y, ones, zeros, zeros, zeros, -u * x, -u * y], axis=2)
+    A[:, 1::2] = np.stack([zeros, zeros, zeros, x, y, ones, -v * x, -v * y], axis=2)
+    B = np.empty((num_sets, 8))
+    B[:, 0::2], B[:, 1::2] = u, v
+
+    solved = np.ones(num_sets, dtype=bool)
+    try:
+        solution = np.linalg.solve(A, B[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        # One singular set fails the whole batch, solve them one by one instead
+        solution = np.zeros((num_sets, 8))
+        solution[:, [0, 4]] = 1
+        for i in range(num_sets):
+            try:
+                solution[i] = np.linalg.solve(A[i], B[i])
+            except np.linalg.LinAlgError:
+                solved[i] = False
+
+    return np.concatenate([solution, np.ones((num_sets, 1))], axis=1).reshape(num_sets, 3, 3), solved
+
+
+def fit_perspective_transform(target: ArrayLike, keypoints: ArrayLike) -> np.ndarray:
+    """
+    Computes the perspective transformation matrix that best maps four or more `keypoints` to `target`.
+
+    The equations of ``get_perspective_transform`` are stacked for every point pair and solved in
+    the least squares sense, after moving both point sets to their centroid and scaling them to an
+    average distance of sqrt(2) to keep the system well conditioned.
+
+    Args:
+        target (ArrayLike): (N, 2) points the keypoints are mapped to.
+        keypoints (ArrayLike): (N, 2) points that are mapped, N >= 4.
+
+    Returns:
+        np.ndarray: The 3x3 perspective transformation matrix.
+    """
+    def normalization(points: np.ndarray) -> np.ndarray:
+        centroid = points.mean(axis=0)
+        scale = np.sqrt(2) / max(np.linalg.norm(points - centroid, axis=1).mean(), 1e-12)
+        return np.array([[scale, 0, -scale * centroid[0]], [0, scale, -scale * centroid[1]], [0, 0, 1]])
+
+    keypoints = np.asarray(keypoints, dtype=np.float64)
+    target = np.asarray(target, dtype=np.float64)
+    source_norm, target_norm = normalization(keypoints), normalization(target)
+    x, y = perspective_transform(keypoints, source_norm).T
+    u, v = perspective_transform(target, target_norm).T
+    zeros, ones = np.zeros_like(x), np.ones_like(x)
+
+    A = np.empty((2 * len(x), 8))
+    A[0::2] = np.stack([x, y, ones, zeros, zeros, zeros, -u * x, -u * y], axis=1)
+    A[1::2] = np.stack([zeros, zeros, zeros, x, y, ones, -v * x, -v * y], axis=1)
+    B = np.empty(2 * len(x))
+    B[0::2], B[1::2] = u, v
+
+    solution = np.linalg.lstsq(A, B, rcond=None)[0]
+    transform = invert_transform(target_norm) @ np.append(solution, 1).reshape(3, 3) @ source_norm
+    return transform / transform[2, 2]
+
+
+def perspective_transform(src: ArrayLike, transform: np.ndarray) -> np.ndarray:
+    """
+    Applies one or many perspective transformations to a set of 2D points.
+
+    Args:
+        src (ArrayLike): (N, 2) points, or (N, 3) points already in homogeneous coordinates.
+        transform (np.ndarray): A 3x3 matrix, or (Q, 3, 3) matrices applied to the same points.
+
+    Returns:
+        np.ndarray: (N, 2) transformed points, or (Q, N, 2) with one set per matrix. Points mapped to
+            infinity hold inf or nan.
+    """
+    src = np.asarray(src, dtype=np.float64)
+    if src.shape[-1] == 2:
+        src = np.concatenate([src, np.ones((len(src), 1))], axis=1)
+
+    warped = np.einsum("...ij,nj->...ni", transform, src)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return warped[..., :2] / warped[..., 2:]
+
+
+def invert_transform(transform: np.ndarray) -> np.ndarray:
+    """
+    Inverts one or many perspective transformations.
+
+    Args:
+        transform (np.ndarray): A 3x3 matrix, or (Q, 3, 3) matrices.
+
+    Returns:
+        np.ndarray: The inverse matrices, in the same shape.
+    """
+    return np.linalg.inv(transform)
@@ -1,55 +1,63 @@
 import numpy as np
-from scipy.spatial import Delaunay
-from typing import List, Tuple
+from scipy.spatial import Delaunay, cKDTree
+from typing import List, Optional, Tuple
+from logic.machine_learning.maths.homography import get_perspective_transforms, perspective_transform, fit_perspective_transform
+from logic.machine_learning.utilities.constants import (
+    RANSAC_INLIER_TOLERANCE, RANSAC_HYPOTHESIS_TOLERANCE, RANSAC_CONFIDENCE, RANSAC_MAX_HYPOTHESES, RANSAC_BATCH_SIZE, RANSAC_MIN_INLIERS,
+    RANSAC_REFINED_PER_BATCH, RANSAC_REFINEMENTS, RANSAC_SEED
+)
 
 x = list(range(7))
 y = list(range(7))
-GRID = [[(xx, yy) for xx in x] for yy in y]
+GRID = np.array([[xx, yy] for yy in y for xx in x], dtype=np.float64)
 IDEAL_QUAD = [[0, 1], [1, 1], [1, 0], [0, 0]]
 
+# Warped x-corners outside this range are far beyond the grid, and the quads are kept this far
+# apart in the KD-tree, so a grid point only ever finds the x-corners of its own quad
+WARP_LIMIT = 1e3
+QUAD_SEPARATION = 1e4
 
-def get_quads(x_corners: List[List[Tuple[float, float]]]) -> List[List[List[Tuple[float, float]]]]:
+
+def get_quads(x_corners: List[List[Tuple[float, float]]]) -> np.ndarray:
     """
     Finds quads from a set of x_corners using Delaunay triangulation.
 
+    Every pair of triangles sharing an edge forms one quad. The pairs are read from the neighbours
+    of the triangulation, each shared edge once, so no quad is repeated. The vertices of a quad are
+    in order around it, with the orientation of the triangulation.
+
     Args:
         x_corners: A list of lists, where each inner list represents an (x, y) coordinate.
 
     Returns:
-        A list of lists of lists, where each inner list of lists represents a quad.
+        A (Q, 4, 2) array, where each entry holds the four corners of a quad.
     """
-    points: np.ndarray = np.array(x_corners)
+    points: np.ndarray = np.asarray(x_corners, dtype=np.float64)
+    if len(points) < 4:
+        return np.empty((0, 4, 2))
+
     delaunay = Delaunay(points)
     triangles: np.ndarray = delaunay.simplices
-    quads: List[List[List[Tuple[float, float]]]] = []
-
-    for i in range(0, len(triangles), 1):
-        t1, t2, t3 = triangles[i]
-        quad: List[int] = [t1, t2, t3, -1]
-
-        for j in range(0, len(triangles), 1):
-            if i == j:
-                continue
+    neighbors: np.ndarray = delaunay.neighbors
 
-            j_tri = triangles[j]
-            cond1 = (t1 in j_tri and t2 in j_tri)
-            cond2 = (t2 in j_tri and t3 in j_tri)
-            cond3 = (t3 in j_tri and t1 in j_tri)
+    # neighbors[t, k] is the triangle across the edge opposite vertex k of t, or -1 on the hull.
+    # Keeping the neighbours with a higher index visits every shared edge once.
+    triangle, k = np.nonzero(neighbors > np.arange(len(triangles))[:, None])
+    other_triangle = neighbors[triangle, k]
 
-            if cond1 or cond2 or cond3:
-                other_point: int = None
-                for point in j_tri:
-                    if point not in quad:
-                        other_point = point
-                        break
-                if other_point is not None:
-                    quad[3] = other_point
-                    break
+    # The vertex of the other triangle that is not on the shared edge
+    opposite = np.argmax(neighbors[other_triangle] == triangle[:, None], axis=1)
+    other_point = triangles[other_triangle, opposite]
 
-        if quad[3] != -1:
-            quads.append([x_corners[x] for x in quad])
+    # Walk around the quad: the shared edge runs between vertices k + 1 and k + 2
+    quads = np.stack([
+        triangles[triangle, (k + 2) % 3],
+        triangles[triangle, k],
+        triangles[triangle, (k + 1) % 3],
+        other_point
+    ], axis=1)
 
-    return quads
+    return points[quads]
 
 
 def score_quad(quad: List[Tuple[float, float]], x_corners: List[Tuple[float, float]]) -> Tuple[float, np.ndarray, Tuple[float, float]]:
@@ -61,131 +69,206 @@ def score_quad(quad: List[Tuple[float, float]], x_corners: List[Tuple[float, flo
     
     @return: A tuple containing the score, transformation matrix, and best offset.
     """
-    perspective_matrix: np.ndarray = get_perspective_transform(IDEAL_QUAD, quad)
-    
-    warped_x_corners: List[Tuple[float, float]] = perspective_transform(x_corners, perspective_matrix)
-    offset: Tuple[float, float] = find_offset(warped_x_corners)
-    score: float = calculate_offset_score(warped_x_corners, offset)
-    
-    return score, perspective_matrix, offset
+    scores, transforms, offsets = score_quads(np.asarray(quad, dtype=np.float64)[None], x_corners)
+    return float(scores[0]), transforms[0], offsets[0].tolist()
 
 
-def get_perspective_transform(target: List[Tuple[float, float]], keypoints: List[Tuple[float, float]]) -> np.ndarray:
-    """
-    Computes the perspective transform matrix that warps the `keypoints` to the `target`.
-    
-    @param target: List of 4 points (u, v) representing the target coordinates.
-    @param keypoints: List of 4 points (x, y) representing the original coordinates.
-    
-    @return: A 3x3 numpy array representing the perspective transform matrix.
+def score_quads(quads: np.ndarray, x_corners: List[Tuple[float, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    A: np.ndarray = np.zeros((8, 8))  # Matrix for solving the system
-    B: np.ndarray = np.zeros((8, 1))  # Right-hand side of the equation
-
-    for i in range(4):
-        x, y = keypoints[i]  # Original coordinates
-        u, v = target[i]     # Target coordinates
-        
-        A[i * 2, 0] = x
-        A[i * 2, 1] = y
-        A[i * 2, 2] = 1
-        A[i * 2, 6] = -u * x
-        A[i * 2, 7] = -u * y
-        
-        A[i * 2 + 1, 3] = x
-        A[i * 2 + 1, 4] = y
-        A[i * 2 + 1, 5] = 1
-        A[i * 2 + 1, 6] = -v * x
-        A[i * 2 + 1, 7] = -v * y
-        
-        B[i * 2, 0] = u
-        B[i * 2 + 1, 0] = v
-
-    # Solving for the transform matrix
-    solution: np.ndarray = np.linalg.solve(A, B)
-    
-    # Adding the last element (1) to form a 3x3 matrix
-    transform: np.ndarray = np.append(solution, 1).reshape((3, 3))
-
-    return transform
+    Scores all quads at once, as ``score_quad`` does for one.
 
+    The homographies of all quads are solved in one batch and all x-corners are warped by all of
+    them at once. The warped x-corners of every quad go into a single KD-tree, so the
+    assignment cost of a grid offset is one nearest-neighbour query for all quads. The offset
+    search runs the binary search of ``find_offset`` for every quad in lockstep.
 
+    @param quads: (Q, 4, 2) array of quads, e.g. from ``get_quads``.
+    @param x_corners: List of all corner points detected from the grid.
 
-def perspective_transform(src: List[Tuple[float, float]], transform: np.ndarray) -> List[Tuple[float, float]]:
+    @return: (Q,) scores, (Q, 3, 3) transformation matrices and (Q, 2) offsets. Quads whose
+        transform cannot be solved, e.g. with three points on a line, score -inf.
     """
-    Applies a perspective transformation to a set of points.
-    
-    @param src: List of points (x, y) to be transformed.
-    @param transform: 3x3 transformation matrix.
-    
-    @return: List of transformed points (x', y') after perspective division.
+    quads = np.asarray(quads, dtype=np.float64)
+    num_quads = len(quads)
+    transforms, solved = get_perspective_transforms(IDEAL_QUAD, quads)
+
+    points = np.asarray(x_corners, dtype=np.float64)
+    warped = perspective_transform(points, transforms).reshape(-1, 2)
+    quad_axis = np.repeat(np.arange(num_quads) * QUAD_SEPARATION, len(points))
+
+    # One tree over the x-corners of all quads, the quad index is a third coordinate. X-corners
+    # warped far beyond the grid are never the nearest one and are left out.
+    near = (np.abs(warped) < WARP_LIMIT).all(axis=1)
+    tree = cKDTree(np.column_stack([quad_axis[near], warped[near]]))
+
+    def assignment_costs(shifts: np.ndarray) -> np.ndarray:
+        """ Sum of the distances from each shifted grid point to its nearest x-corner, for (Q, S, 2) shifts. """
+        grids = GRID[None, None] + shifts[:, :, None, :]
+        grid_axis = np.broadcast_to(np.arange(num_quads)[:, None, None] * QUAD_SEPARATION, grids.shape[:3])
+        distances, _ = tree.query(np.column_stack([grid_axis.reshape(-1), grids.reshape(-1, 2)]))
+        return distances.reshape(grids.shape[:3]).sum(axis=2)
+
+    # The binary search of find_offset along x and y, with the other coordinate left at zero
+    low = np.full((num_quads, 2), -7)
+    high = np.full((num_quads, 2), 1)
+    while (high - low > 1).any():
+        mid = (high + low) // 2
+        shifts = np.zeros((num_quads, 4, 2))
+        shifts[:, 0, 0], shifts[:, 1, 0] = mid[:, 0], mid[:, 0] + 1
+        shifts[:, 2, 1], shifts[:, 3, 1] = mid[:, 1], mid[:, 1] + 1
+        costs = assignment_costs(shifts).reshape(num_quads, 2, 2)
+
+        # A higher score is a lower cost
+        go_low = costs[:, :, 0] < costs[:, :, 1]
+        high = np.where(go_low, mid, high)
+        low = np.where(go_low, low, mid)
+
+    offsets = low + 1
+    scores = 1 / (1 + assignment_costs(offsets[:, None, :].astype(np.float64))[:, 0])
+    scores[~solved] = -np.inf
+
+    return scores, transforms, offsets
+
+
+def get_lattice_windows(warped: np.ndarray, tolerance: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    if len(src[0]) == 2:
-        # Add a third coordinate with value 1 for homogeneous coordinates
-        src = [[x[0], x[1], 1] for x in src]
-    
-    src_array: np.ndarray = np.array(src)
-    warped_src: np.ndarray = np.dot(src_array, transform.T)
-    
-    for i in range(warped_src.shape[0]):
-        x: float = warped_src[i, 0]
-        y: float = warped_src[i, 1]
-        w: float = warped_src[i, 2]
-        warped_src[i, 0] = x / w
-        warped_src[i, 1] = y / w
-    
-    warped_src_array: np.ndarray = warped_src[:, :2]  # Get only x, y coordinates
-    return warped_src_array.tolist()  # Return the transformed points as a list of tuples
+    Counts, for every 7x7 window of the lattice around the quad, the lattice points holding an inlier.
 
+    A quad spanning two squares also maps every x-corner of the board onto the lattice, but onto a
+    sheared copy of the board that no window holds. The windows are therefore also scored by the
+    points they hold minus the points they leave out.
 
+    @param warped: (B, N, 2) x-corners warped by B transforms, in squares of the ideal quad.
+    @param tolerance: Distance, in squares, from a lattice point within which an x-corner is an inlier.
 
-def find_offset(warped_xcorners: List[Tuple[float, float]]) -> List[int]:
+    @return: (B, 7, 7) counts, where window [y, x] starts at lattice point (x - 6, y - 6), the
+        (B, 7, 7) scores of the windows and the (B, N) mask of the inliers.
     """
-    Finds the best offset to align the warped grid with the original grid.
-    
-    @param warped_xcorners: List of corner points after perspective transformation.
-    
-    @return: A list representing the best offset in the x and y directions.
+    lattice = np.rint(warped)
+    with np.errstate(invalid="ignore"):
+        inlier = np.linalg.norm(warped - lattice, axis=2) < tolerance
+        # Lattice points further than a board from the quad cannot be on the same board
+        inlier &= (np.abs(lattice) <= 6).all(axis=2)
+
+    # A transform squeezing many x-corners onto one lattice point counts it once
+    cells = np.where(inlier[..., None], lattice + 6, 0).astype(np.intp)
+    flat = np.arange(len(warped))[:, None] * 169 + cells[..., 1] * 13 + cells[..., 0]
+    occupied = np.bincount(flat[inlier], minlength=len(warped) * 169).reshape(-1, 13, 13) > 0
+
+    # Sum over every 7x7 window through the summed-area table
+    table = np.pad(occupied.cumsum(axis=1).cumsum(axis=2), ((0, 0), (1, 0), (1, 0)))
+    windows = table[:, 7:, 7:] - table[:, :-7, 7:] - table[:, 7:, :-7] + table[:, :-7, :-7]
+    scores = 2 * windows - table[:, -1:, -1:]
+    return windows, scores, inlier
+
+
+def refine_lattice_fit(
+    points: np.ndarray, transform: np.ndarray, tolerance: float, refinements: int
+) -> Tuple[int, int, np.ndarray, np.ndarray]:
     """
-    best_offset: List[int] = [0, 0]
-    
-    for i in range(2):  # Iterate over x and y dimensions
-        low: int = -7
-        high: int = 1
-        scores: dict[int, float] = {}  # Dictionary to store scores for different shifts
-        
-        while (high - low) > 1:
-            mid: int = (high + low) // 2
-            for x in [mid, mid + 1]:
-                if x not in scores:
-                    shift: List[int] = [0, 0]
-                    shift[i] = x
-                    scores[x] = calculate_offset_score(warped_xcorners, shift)
-            
-            if scores[mid] > scores[mid + 1]:
-                high = mid
-            else:
-                low = mid
-        
-        best_offset[i] = low + 1
-
-    return best_offset
-
-
-
-def cross_distance(a: List[Tuple[float, float]], b: List[Tuple[float, float]]) -> np.ndarray:
+    Refits a transform to the inliers of its best 7x7 window a few times. A single square
+    extrapolates poorly to the far side of the board, each refit picks up the inliers the better
+    fit reveals.
+
+    @param points: (N, 2) x-corners.
+    @param transform: The transform of a quad, mapping the x-corners onto the lattice.
+    @param tolerance: Distance, in squares, from a lattice point within which an x-corner is an inlier.
+    @param refinements: Least squares refits.
+
+    @return: A tuple (inliers, score, transform, offset): the number of lattice points of the best
+        window holding an x-corner, the score of that window, the refitted transform and the
+        (x, y) lattice point the window starts at.
     """
-    Computes the pairwise Euclidean distance between two sets of points.
-    
-    @param a: List of points (x, y) in the first set.
-    @param b: List of points (x, y) in the second set.
-    
-    @return: A numpy array of distances between each pair of points.
+    for refinement in range(refinements + 1):
+        warped = perspective_transform(points, transform)
+        windows, scores, inlier = get_lattice_windows(warped[None], tolerance)
+        oy, ox = np.unravel_index(int(np.argmax(windows[0])), (7, 7))
+        offset = np.array([ox - 6, oy - 6])
+        if refinement == refinements:
+            break
+
+        # Refit on the inliers of the best window, on at least two ranks and two files
+        lattice = np.rint(warped)
+        inlier = inlier[0] & ((lattice >= offset) & (lattice <= offset + 6)).all(axis=1)
+        if not all(len(np.unique(lattice[inlier, axis])) >= 2 for axis in range(2)):
+            break
+        transform = fit_perspective_transform(lattice[inlier], points[inlier])
+
+    return int(windows[0, oy, ox]), int(scores[0, oy, ox]), transform, offset
+
+
+def fit_lattice_ransac(
+    quads: np.ndarray,
+    x_corners: List[Tuple[float, float]],
+    tolerance: float = RANSAC_INLIER_TOLERANCE,
+    hypothesis_tolerance: float = RANSAC_HYPOTHESIS_TOLERANCE,
+    confidence: float = RANSAC_CONFIDENCE,
+    max_hypotheses: int = RANSAC_MAX_HYPOTHESES,
+    batch_size: int = RANSAC_BATCH_SIZE,
+    refined_per_batch: int = RANSAC_REFINED_PER_BATCH,
+    refinements: int = RANSAC_REFINEMENTS,
+    min_inliers: int = RANSAC_MIN_INLIERS,
+    seed: int = RANSAC_SEED
+) -> Optional[Tuple[np.ndarray, np.ndarray, int, int]]:
     """
-    a = np.array(a)
-    b = np.array(b)
-    dist = np.sqrt(np.sum((a[:, np.newaxis, :] - b[np.newaxis, :, :])**2, axis=2))
-    return dist
+    Fits the 7x7 lattice of x-corners by sampling quads instead of scoring all of them.
+
+    Each sampled quad is taken as one square of the lattice. All x-corners are warped by its
+    homography, and those within ``hypothesis_tolerance`` of a lattice point are inliers. The
+    7x7 window with the most lattice points holding an inlier scores the quad, less the lattice
+    points left outside the window. The best quads of each batch are refitted to their inliers. Quads are tried in
+    seeded random order until enough have been tried to find a good one with the given
+    ``confidence``, at most ``max_hypotheses``.
+
+    @param quads: (Q, 4, 2) array of quads, e.g. from ``get_quads``.
+    @param x_corners: List of all corner points detected from the grid.
+    @param tolerance: Distance, in squares, from a lattice point within which an x-corner is an inlier.
+    @param hypothesis_tolerance: The tolerance before refitting, wider since one square extrapolates poorly.
+    @param confidence: Probability of having tried a quad of the board before stopping.
+    @param max_hypotheses: Upper bound of the quads tried, bounding the latency.
+    @param batch_size: Quads scored at once.
+    @param refined_per_batch: Best quads of each batch that are refitted.
+    @param refinements: Least squares refits of each of them.
+    @param min_inliers: Lattice points with an inlier needed to accept the fit.
+    @param seed: Seed of the sampling order, so the same x-corners give the same fit.
+
+    @return: The transformation matrix, the offset of the grid, the number of lattice points with an
+        inlier and the number of quads tried, or None if no quad reached ``min_inliers``.
+    """
+    points = np.asarray(x_corners, dtype=np.float64)
+    order = np.random.default_rng(seed).permutation(len(quads))[:max_hypotheses]
+    required = len(order)
+
+    best_inliers, best_score, best_transform, best_offset = 0, 0, None, None
+    tried = 0
+    while tried < required:
+        batch = quads[order[tried:tried + batch_size]]
+        tried += len(batch)
+
+        transforms, solved = get_perspective_transforms(IDEAL_QUAD, batch)
+        _, scores, _ = get_lattice_windows(perspective_transform(points, transforms), hypothesis_tolerance)
+        scores = np.where(solved, scores.max(axis=(1, 2)), 0)
+
+        # The first of equally good quads wins, as in the exhaustive search
+        for quad in np.argsort(-scores, kind="stable")[:refined_per_batch]:
+            if scores[quad] < min_inliers:
+                break
+            inliers, score, transform, offset = refine_lattice_fit(points, transforms[quad], tolerance, refinements)
+            if score > best_score:
+                best_inliers, best_score, best_transform, best_offset = inliers, score, transform, offset
+
+        # Adaptive stop: the share of x-corners the fit explains bounds how many quads must be tried
+        if best_score >= min(49, len(points)):
+            break
+        ratio = best_score / len(points)
+        if ratio > 0:
+            needed = np.log(1 - confidence) / np.log(1 - ratio ** 4)
+            required = min(required, max(int(np.ceil(needed)), tried))
+
+    if best_transform is None or best_inliers < min_inliers:
+        return None
+
+    return best_transform, best_offset, best_inliers, tried
 
 
 def euclidean_distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
@@ -210,26 +293,6 @@ def euclidean_distance(a: Tuple[float, float], b: Tuple[float, float]) -> float:
 
 
 
-def calculate_offset_score(warped_x_corners: List[Tuple[float, float]], shift: List[int]) -> float:
-    """
-    Calculates the alignment score for the warped grid with a given shift.
-    
-    @param warped_x_corners: List of points after perspective transformation.
-    @param shift: Offset to apply to the grid.
-    
-    @return: A score representing how well the warped grid aligns with the shifted grid.
-    """
-    # `grid` is a numpy array of shape (num_points, 2) after applying the shift
-    grid: np.ndarray = np.array([[x[0] + shift[0], x[1] + shift[1]] for sublist in GRID for x in sublist])
-    dist: np.ndarray = cross_distance(grid, warped_x_corners)
-    
-    # `assignment_cost` is the sum of the minimum distances for each point in `grid`
-    assignment_cost: float = sum(min(dist[i]) for i in range(len(dist)))
-    
-    score: float = 1 / (1 + assignment_cost) 
-    return score
-
-
 def clamp(x: float, min_val: float, max_val: float) -> float:
     # Clamp x so that min_val <= x <= max_val
     return max(min_val, min(x, max_val))
@@ -0,0 +1,95 @@
+import unittest
+import cv2
+import numpy as np
+from logic.machine_learning.maths.homography import (
+    get_perspective_transform, get_perspective_transforms, fit_perspective_transform, perspective_transform,
+    invert_transform
+)
+
+TRIALS = 200
+
+
+def random_quads(rng: np.random.Generator, count: int) -> np.ndarray:
+    """ Convex quads: a jittered square, scaled and moved somewhere in a 480x288 frame. """
+    square = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float64)
+    jitter = rng.uniform(-0.2, 0.2, (count, 4, 2))
+    scale = rng.uniform(20, 200, (count, 1, 1))
+    offset = rng.uniform(0, 280, (count, 1, 2))
+    return (square + jitter) * scale + offset
+
+
+class TestHomography(unittest.TestCase):
+    """ Property tests of the homography functions against OpenCV. """
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.sources = random_quads(rng, TRIALS)
+        self.targets = random_quads(rng, TRIALS)
+
+    def test_matches_opencv(self) -> None:
+        """ Test that the transforms equal cv2.getPerspectiveTransform, one at a time and in a batch. """
+        transforms, solved = get_perspective_transforms(self.targets, self.sources)
+        self.assertTrue(solved.all())
+        for source, target, batched in zip(self.sources, self.targets, transforms):
+            expected = cv2.getPerspectiveTransform(source.astype(np.float32), target.astype(np.float32))
+            np.testing.assert_allclose(get_perspective_transform(target, source), expected, rtol=1e-3, atol=1e-6)
+            np.testing.assert_allclose(batched, get_perspective_transform(target, source), rtol=1e-9, atol=1e-12)
+
+    def test_maps_keypoints_to_target(self) -> None:
+        """ Test that every transform sends its keypoints onto the target, as cv2.perspectiveTransform does. """
+        transforms, _ = get_perspective_transforms(self.targets, self.sources)
+        for source, target, transform in zip(self.sources, self.targets, transforms):
+            np.testing.assert_allclose(perspective_transform(source, transform), target, atol=1e-6)
+            expected = cv2.perspectiveTransform(source[None], transform)[0]
+            np.testing.assert_allclose(perspective_transform(source, transform), expected, atol=1e-6)
+
+    def test_batched_apply_and_invert(self) -> None:
+        """ Test that many transforms apply to the same points at once and invert back. """
+        points = np.random.default_rng(1).uniform(0, 300, (30, 2))
+        transforms, _ = get_perspective_transforms(self.targets[0], self.sources)
+
+        warped = perspective_transform(points, transforms)
+        self.assertEqual(warped.shape, (TRIALS, 30, 2))
+        np.testing.assert_allclose(warped[7], perspective_transform(points, transforms[7]))
+
+        inverses = invert_transform(transforms)
+        for transform_points, inverse in zip(warped, inverses):
+            np.testing.assert_allclose(perspective_transform(transform_points, inverse), points, atol=1e-6)
+
+    def test_homogeneous_input(self) -> None:
+        """ Test that points already in homogeneous coordinates are accepted. """
+        transform = get_perspective_transform(self.targets[0], self.sources[0])
+        homogeneous = np.concatenate([self.sources[0] * 2, np.full((4, 1), 2.0)], axis=1)
+        np.testing.assert_allclose(perspective_transform(homogeneous, transform), self.targets[0], atol=1e-6)
+
+    def test_singular(self) -> None:
+        """ Test that keypoints with three points on a line cannot be solved. """
+        line = np.array([[0, 0], [10, 0], [20, 0], [30, 0]], dtype=np.float64)
+        with self.assertRaises(np.linalg.LinAlgError):
+            get_perspective_transform(self.targets[0], line)
+
+        transforms, solved = get_perspective_transforms(self.targets[:3], np.stack([self.sources[0], line, self.sources[2]]))
+        np.testing.assert_array_equal(solved, [True, False, True])
+        np.testing.assert_array_equal(transforms[1], np.eye(3))
+
+
+    def test_fit_matches_opencv(self) -> None:
+        """ Test that the least squares fit is exact on four points and is as close as cv2.findHomography on noisy ones. """
+        rng = np.random.default_rng(2)
+        for source, target in zip(self.sources[:20], self.targets[:20]):
+            np.testing.assert_allclose(
+                fit_perspective_transform(target, source), get_perspective_transform(target, source), rtol=1e-6, atol=1e-9
+            )
+
+            transform = get_perspective_transform(target, source)
+            points = rng.uniform(source.min(axis=0), source.max(axis=0), (30, 2))
+            exact = perspective_transform(points, transform)
+            mapped = exact + rng.normal(0, 0.5, (30, 2))
+            fitted = perspective_transform(points, fit_perspective_transform(mapped, points))
+            expected = perspective_transform(points, cv2.findHomography(points, mapped, 0)[0])
+            np.testing.assert_allclose(fitted, expected, atol=0.5)
+            self.assertLess(np.abs(fitted - exact).mean(), 1.05 * np.abs(expected - exact).mean() + 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+import numpy as np
+from scipy.spatial import Delaunay
+from logic.machine_learning.maths.quad_transformation import get_quads, score_quad, score_quads, fit_lattice_ransac
+from logic.machine_learning.detection.corners_detection import find_board_corners_from_xcorners
+from logic.machine_learning.utilities.constants import CORNER_FIT_RANSAC
+
+
+def to_image(grid: np.ndarray) -> np.ndarray:
+    """ Maps board grid coordinates, in squares, onto a board sheared in the image. """
+    return grid * [30, 22] + grid[:, ::-1] * [3, 0] + [150, 40]
+
+
+def make_xcorners(outliers: int = 0) -> np.ndarray:
+    """ The 7x7 x-corners of the board, with a few outliers. """
+    rng = np.random.default_rng(0)
+    grid = np.stack(np.meshgrid(np.arange(1, 8), np.arange(1, 8)), axis=-1).reshape(-1, 2).astype(np.float64)
+    points = to_image(grid) + rng.normal(0, 0.3, (49, 2))
+    return np.concatenate([points, rng.uniform([0, 0], [480, 288], (outliers, 2))])
+
+
+def signed_area(quad: np.ndarray) -> float:
+    """ Shoelace area of a polygon, positive for the orientation of the triangulation. """
+    x, y = quad[:, 0], quad[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+class TestGetQuads(unittest.TestCase):
+    """ Unit tests for the get_quads function. """
+
+    def test_one_quad_per_shared_edge(self) -> None:
+        """ Test that every pair of adjacent triangles gives exactly one quad. """
+        x_corners = make_xcorners(outliers=10)
+        delaunay = Delaunay(x_corners)
+        shared_edges = int((delaunay.neighbors >= 0).sum()) // 2
+
+        quads = get_quads(x_corners)
+        self.assertEqual(quads.shape, (shared_edges, 4, 2))
+        pairs = {frozenset([frozenset(map(tuple, quad[[0, 1, 2]])), frozenset(map(tuple, quad[[2, 3, 0]]))]) for quad in quads}
+        self.assertEqual(len(pairs), shared_edges)
+
+    def test_quads_are_ordered(self) -> None:
+        """ Test that the vertices of each quad run around it and do not cross. """
+        for quad in get_quads(make_xcorners(outliers=10)):
+            # Both triangles on either side of a diagonal keep the orientation of the quad
+            self.assertGreater(signed_area(quad), 0)
+            self.assertGreater(signed_area(quad[[0, 1, 2]]), 0)
+            self.assertGreater(signed_area(quad[[2, 3, 0]]), 0)
+
+    def test_too_few_points(self) -> None:
+        """ Test that fewer than four x-corners give no quads. """
+        self.assertEqual(len(get_quads([[0, 0], [10, 0], [0, 10]])), 0)
+
+    def test_board_corners(self) -> None:
+        """ Test that the board corners are found one square outside the x-corner grid, within a quarter square. """
+        corners = np.array(find_board_corners_from_xcorners(make_xcorners()))
+        for point in to_image(np.array([[0, 0], [8, 0], [8, 8], [0, 8]], dtype=np.float64)):
+            self.assertLess(np.linalg.norm(corners - point, axis=1).min(), 7.5)
+
+
+
+class TestScoreQuads(unittest.TestCase):
+    """ Unit tests for the batched quad scoring. """
+
+    def setUp(self) -> None:
+        self.x_corners = make_xcorners(outliers=10)
+        self.quads = get_quads(self.x_corners)
+
+    def test_scores_match_single_quads(self) -> None:
+        """ Test that scoring all quads at once gives the scores and offsets of scoring each one. """
+        scores, _, offsets = score_quads(self.quads, self.x_corners)
+        for i in range(0, len(self.quads), 7):
+            score, _, offset = score_quad(self.quads[i], self.x_corners)
+            self.assertAlmostEqual(scores[i], score)
+            self.assertEqual(list(offsets[i]), offset)
+
+    def test_grid_quad_scores_best(self) -> None:
+        """ Test that a quad of four neighbouring x-corners beats the quads reaching outliers. """
+        scores, _, _ = score_quads(self.quads, self.x_corners)
+        best = self.quads[np.argmax(scores)]
+        grid = self.x_corners[:49]
+        self.assertTrue(all(np.linalg.norm(grid - point, axis=1).min() < 1e-9 for point in best))
+
+    def test_singular_quad(self) -> None:
+        """ Test that a quad with three points on a line scores -inf instead of failing the batch. """
+        singular = np.array([[[0, 0], [10, 0], [20, 0], [30, 0]]], dtype=np.float64)
+        scores, _, _ = score_quads(np.concatenate([singular, self.quads[:3]]), self.x_corners)
+        self.assertEqual(scores[0], -np.inf)
+        self.assertTrue(np.isfinite(scores[1:]).all())
+
+
+
+class TestFitLatticeRansac(unittest.TestCase):
+    """ Unit tests for the RANSAC board fitting. """
+
+    def test_board_corners_with_outliers(self) -> None:
+        """ Test that the board is found among many false x-corners, closer than by a single quad. """
+        corners = find_board_corners_from_xcorners(make_xcorners(outliers=40), CORNER_FIT_RANSAC)
+        for point in to_image(np.array([[0, 0], [8, 0], [8, 8], [0, 8]], dtype=np.float64)):
+            self.assertLess(np.linalg.norm(corners - point, axis=1).min(), 2.0)
+
+    def test_deterministic(self) -> None:
+        """ Test that the same x-corners always give the same fit. """
+        x_corners = make_xcorners(outliers=40)
+        quads = get_quads(x_corners)
+        first, second = fit_lattice_ransac(quads, x_corners), fit_lattice_ransac(quads, x_corners)
+        np.testing.assert_array_equal(first[0], second[0])
+        np.testing.assert_array_equal(first[1], second[1])
+
+    def test_stops_early(self) -> None:
+        """ Test that a clean board stops the search before every quad is tried. """
+        x_corners = make_xcorners()
+        quads = get_quads(x_corners)
+        _, _, inliers, tried = fit_lattice_ransac(quads, x_corners, batch_size=8)
+        self.assertEqual(inliers, 49)
+        self.assertLess(tried, len(quads))
+
+    def test_bounded(self) -> None:
+        """ Test that no more than max_hypotheses quads are tried, however many x-corners there are. """
+        x_corners = np.random.default_rng(0).uniform([0, 0], [480, 288], (300, 2))
+        quads = get_quads(x_corners)
+        fit = fit_lattice_ransac(quads, x_corners, max_hypotheses=32, min_inliers=0)
+        self.assertLessEqual(fit[3], 32)
+
+    def test_unknown_method(self) -> None:
+        """ Test that an unknown fitting method is rejected. """
+        with self.assertRaises(ValueError):
+            find_board_corners_from_xcorners(make_xcorners(), "guess")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,90 +1,8 @@
 import numpy as np
-import tensorflow as tf
 
 from typing import List, Tuple
-from logic.machine_learning.utilities.constants import SQUARE_SIZE, BOARD_SIZE
-
-def perspective_transform(src: List[List[float]], transform: np.ndarray) -> List[List[float]]:
-    """
-    Applies a perspective transformation to a set of 2D points using a 3x3 transformation matrix.
-
-    This function takes a list or array of 2D points (in Cartesian coordinates), 
-    converts them to homogeneous coordinates (3D) (if necessary), applies the perspective 
-    transformation using the provided matrix, and then returns the transformed points 
-    in 2D space after normalizing back from homogeneous coordinates (3D).
-
-    Args:
-        src (list of list of floats): A list of 2D points (each as [x, y]) to be transformed.
-        transform (np.ndarray): A 3x3 perspective transformation matrix that is used to transform the points.
-
-    Returns:
-        list: A list of transformed 2D points after applying the perspective transformation.
-    """
-    
-    # Step 1: Check if the input points are 2D (i.e., [x, y]). 
-    # If so, add a homogeneous coordinate (1) to make them 3D points [x, y, 1].
-    if len(src[0]) == 2:
-        src = [x + [1] for x in src]
-
-    # Step 2: Apply the perspective transformation using matrix multiplication.
-    # The 'src' points are multiplied with the transpose of the transformation matrix.
-    warped_src = np.dot(src, transform.T)
-    # The result of np.dot is in homogeneous coordinates (x', y', w).
-
-    # Step 3: Normalize the transformed points by dividing by the 'w' coordinate.
-    # This step converts the points back to Cartesian coordinates.
-    warped_src /= warped_src[:, 2].reshape(-1, 1) 
-    # We divide each point's [x', y', w] by w to normalize and get [x' / w, y' / w, 1].
-
-    # Step 4: Return the 2D transformed points (excluding the homogeneous coordinate).
-    return warped_src[:, :2].tolist()  
-
-
-
-def get_perspective_transform(target: List[Tuple[float, float]], keypoints: List[Tuple[float, float]]) -> np.ndarray:
-    """
-    Computes the perspective transformation matrix that maps the xy in `keypoints` to the xy in `target`.
-
-    This function uses the method of solving a system of linear equations derived from the perspective transformation.
-    
-    Args:
-    - target (list of tuples): The target points that we want to map the keypoints to. 
-      These are usually the coordinates of a square or a rectangle.
-    - keypoints (list of tuples): The source points that we are transforming from. These could be the corners of a chessboard or another object.
-
-    Returns:
-    - numpy.ndarray: The 3x3 perspective transformation matrix.
-    
-    The perspective transformation matrix allows for transforming points from the `keypoints` plane to the `target` plane.
-    """
-    
-    # Initialize matrix A (coefficients) and vector B (constants) for the system of linear equations
-    A = np.zeros((8, 8))  
-    B = np.zeros((8, 1))  
-
-    # For each of the four points, fill in the corresponding row of A and B
-    for i in range(4):
-        x, y = keypoints[i]   
-        u, v = target[i]     
-
-        # Populate the matrix A based on the equations derived from the perspective transformation
-        A[i * 2] = [x, y, 1, 0, 0, 0, -u * x, -u * y]   # First equation (mapping x to u)
-        A[i * 2 + 1] = [0, 0, 0, x, y, 1, -v * x, -v * y]   # Second equation (mapping y to v)
-
-        # Populate the constants vector B with the target coordinates
-        B[i * 2] = u
-        B[i * 2 + 1] = v
-    
-    # Solve the system of equations A * solution = B using numpy's linear solver
-    # This returns the transformation parameters (flattened into a 1D array)
-    solution = np.linalg.solve(A, B).flatten() 
-
-    # Reshape the solution into a 3x3 matrix (perspective transformation matrix)
-    transform = np.vstack([solution.reshape(8, 1), [[1]]]).reshape(3, 3)
-
-    return transform
-
-
+from logic.machine_learning.utilities.constants import SQUARE_SIZE, BOARD_SIZE, MODEL_WIDTH, MODEL_HEIGHT
+from logic.machine_learning.maths.homography import get_perspective_transform, perspective_transform, invert_transform
 
 def get_inv_transform(keypoints: List[Tuple[float, float]]) -> np.ndarray:
     """
@@ -137,13 +55,13 @@ def get_inv_transform(keypoints: List[Tuple[float, float]]) -> np.ndarray:
     transform: np.ndarray = get_perspective_transform(target, keypoints)
     
     # Compute the inverse of the transformation matrix to reverse the transformation
-    inv_transform: np.ndarray = np.linalg.inv(transform)
+    inv_transform: np.ndarray = invert_transform(transform)
     
     return inv_transform
 
 
 
-def transform_centers(inv_transform: np.ndarray) -> List[List[float]]:
+def transform_centers(inv_transform: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
     """
     Transforms the centers of an 8x8 chessboard grid from their positions in a perfect square 
     to their corresponding positions in the distorted image using the provided inverse perspective transformation.
@@ -156,14 +74,16 @@ def transform_centers(inv_transform: np.ndarray) -> List[List[float]]:
     - inv_transform (numpy.ndarray): The inverse perspective transformation matrix.
 
     Returns:
-    - centers (list): The transformed center coordinates in the distorted space.
+    - centers (np.ndarray): The (64, 2) transformed center coordinates in the distorted space.
+    - centers3D (np.ndarray): The same centers as a (1, 64, 2) array.
     """
-    x: List[float] = [0.5 + i for i in range(8)]
-    y: List[float] = [7.5 - i for i in range(8)]
-    centers_in_perfect_square: List[List[float]] = [[xx * SQUARE_SIZE, yy * SQUARE_SIZE, 1] for yy in y for xx in x]
+    x: np.ndarray = np.arange(8) + 0.5
+    y: np.ndarray = 7.5 - np.arange(8)
+    xx, yy = np.meshgrid(x, y)
+    centers_in_perfect_square: np.ndarray = np.stack([xx.ravel(), yy.ravel()], axis=1) * SQUARE_SIZE
     
-    centers: List[List[float]] = perspective_transform(centers_in_perfect_square, inv_transform)    
-    centers3D = np.expand_dims(np.array(centers), axis=0)
+    centers: np.ndarray = perspective_transform(centers_in_perfect_square, inv_transform)
+    centers3D = np.expand_dims(centers, axis=0)
     
     return centers, centers3D
 
@@ -184,24 +104,76 @@ def transform_boundary(inv_transform: np.ndarray):
       that maps points from the ideal (square) grid space back to the distorted input space.
 
     Returns:
-    - boundary (List[List[float]]): A list of 4 points (in [x, y]) representing the transformed boundary 
-      corners of the chessboard in the distorted space.
-    - boundary3D (tf.Tensor): A 3D tensor (shape: [1, 4, 2]) containing the same boundary points 
-      as a TensorFlow tensor, which can be directly used for further processing (e.g., masks or overlays).
+    - boundary (np.ndarray): A (4, 2) array of the transformed boundary corners of the chessboard
+      in the distorted space.
+    - boundary3D (np.ndarray): A 3D array (shape: [1, 4, 2]) containing the same boundary points 
+      as float32, which can be directly used for further processing (e.g., masks or overlays).
     """
 
     # Define a slightly expanded square around the 8x8 grid in perfect square space
     warped_boundary = np.array([
-        [-0.5 * SQUARE_SIZE, -0.5 * SQUARE_SIZE, 1],   # Top-left (outside the board)
-        [-0.5 * SQUARE_SIZE, 8.5 * SQUARE_SIZE, 1],    # Bottom-left
-        [8.5 * SQUARE_SIZE, 8.5 * SQUARE_SIZE, 1],     # Bottom-right
-        [8.5 * SQUARE_SIZE, -0.5 * SQUARE_SIZE, 1]     # Top-right
+        [-0.5 * SQUARE_SIZE, -0.5 * SQUARE_SIZE],   # Top-left (outside the board)
+        [-0.5 * SQUARE_SIZE, 8.5 * SQUARE_SIZE],    # Bottom-left
+        [8.5 * SQUARE_SIZE, 8.5 * SQUARE_SIZE],     # Bottom-right
+        [8.5 * SQUARE_SIZE, -0.5 * SQUARE_SIZE]     # Top-right
     ])
 
     # Apply inverse perspective transformation to map to distorted input space
     boundary = perspective_transform(warped_boundary, inv_transform)
 
-    # Convert to a TensorFlow 3D tensor for further operations (e.g., masking in TF)
-    boundary3D = tf.expand_dims(tf.convert_to_tensor(boundary, dtype=tf.float32), axis=0)
+    # Convert to a 3D array for further operations (e.g., masking)
+    boundary3D = np.expand_dims(boundary.astype(np.float32), axis=0)
 
     return boundary, boundary3D
+
+
+
+def transform_xcorners(inv_transform: np.ndarray) -> np.ndarray:
+    """
+    Transforms the 7x7 inner corners of the chessboard grid, where four squares meet, from the
+    perfect square to the distorted image. These are the points the x-corners model detects.
+
+    Args:
+    - inv_transform (numpy.ndarray): The inverse perspective transformation matrix.
+
+    Returns:
+    - xcorners (np.ndarray): (49, 2) float32 x-corner positions in the distorted space.
+    """
+    ii, jj = np.meshgrid(np.arange(1, 8), np.arange(1, 8))
+    xcorners_in_perfect_square: np.ndarray = np.stack([ii.ravel(), jj.ravel()], axis=1) * SQUARE_SIZE
+
+    return perspective_transform(xcorners_in_perfect_square, inv_transform).astype(np.float32)
+
+
+
+def transform_square_map(inv_transform: np.ndarray) -> np.ndarray:
+    """
+    Rasterizes the squares of the chessboard in the distorted image: every pixel of the model
+    input holds the index of the square it shows, in the order of `transform_centers`.
+
+    Each pixel center is mapped back to the perfect square. Pixels in the padding of
+    `transform_boundary` belong to the nearest edge square, pixels outside of it hold -1.
+
+    Args:
+    - inv_transform (numpy.ndarray): The inverse perspective transformation matrix.
+
+    Returns:
+    - square_map (np.ndarray): (MODEL_HEIGHT, MODEL_WIDTH) int8 square indices, -1 off the board.
+    """
+    xx, yy = np.meshgrid(np.arange(MODEL_WIDTH) + 0.5, np.arange(MODEL_HEIGHT) + 0.5)
+    pixels = np.stack([xx.ravel(), yy.ravel(), np.ones(xx.size)], axis=1)
+
+    transform = invert_transform(inv_transform)
+    perfect_square = perspective_transform(pixels, transform) / SQUARE_SIZE
+    on_board = np.all((perfect_square >= -0.5) & (perfect_square < 8.5), axis=1)
+
+    # Pixels beyond the horizon of the board plane are mirrored onto it, keep the side the board is on
+    board_side = np.sign((inv_transform @ [4 * SQUARE_SIZE, 4 * SQUARE_SIZE, 1])[2])
+    on_board &= np.sign(pixels @ transform[2]) == board_side
+
+    with np.errstate(invalid="ignore"):
+        cols = np.clip(np.floor(perfect_square[:, 0]), 0, 7)
+        rows = 7 - np.clip(np.floor(perfect_square[:, 1]), 0, 7)
+        squares = np.where(on_board, rows * 8 + cols, -1)
+
+    return squares.astype(np.int8).reshape(MODEL_HEIGHT, MODEL_WIDTH)
@@ -1,70 +1,143 @@
 import cv2, onnxruntime as ort
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from logic.machine_learning.detection.run_detections import get_board_corners
-from logic.machine_learning.board_state.map_pieces import get_payload
-import logic.api.services.board_storage as storage
+from logic.machine_learning.detection.corners_detection import run_xcorners_model
+from logic.machine_learning.board_state.board_tracker import BoardTracker
+from logic.machine_learning.board_state.frame_sampler import AdaptiveSampler
+from logic.machine_learning.board_state.square_gate import SquareChangeGate
+from logic.machine_learning.board_state.drift_monitor import DriftMonitor
+from logic.machine_learning.utilities.model_registry import model_registry
+from logic.machine_learning.utilities.detector_runtime import detector_runtime
+from logic.machine_learning.utilities.preprocess import Letterbox
+from logic.machine_learning.view.display import frame_display
+from logic.machine_learning.utilities.constants import (
+    PIECES_MODEL, XCORNERS_MODEL, FRAME_WAIT_TIMEOUT_S
+)
+from logic.api.entity.frame_source import FrameSubscription
 from logic.api.services import board_storage
 import asyncio
 
+async def send_move_to_clients(board_id: int, move: str, game_ref) -> None:
+    from logic.api.services.board_service import BoardService
+    await BoardService().send_move(board_id, move)
+
 async def process_video(
     piece_model_session: ort.InferenceSession,
     corner_ort_session: ort.InferenceSession,
-    video: cv2.VideoCapture,
-    board_id: int
+    frames: FrameSubscription,
+    board_id: int,
+    game_ref = None,
+    on_move: Callable[[int, str, object], Awaitable[None]] = send_move_to_clients,
+    show: bool = True,
+    sampler: Optional[AdaptiveSampler] = None,
+    gate: Optional[SquareChangeGate] = None,
+    tracker: Optional[BoardTracker] = None,
+    drift: Optional[DriftMonitor] = None
 ) -> None:
+    """
+    Runs the detection loop of one board.
 
-    cap = video 
-    if not cap.isOpened():
-        print("Error: Cannot open camera.")
-        return
+    Args:
+        piece_model_session (ort.InferenceSession): Session of the pieces model.
+        corner_ort_session (ort.InferenceSession): Session of the x-corners model.
+        frames (FrameSubscription): Frame provider of the board, a FrameSubscription or a shared memory reader.
+        board_id (int): Board ID.
+        game_ref: Game the moves are played on. Defaults to the board in storage.
+        on_move (Callable[[int, str, object], Awaitable[None]]): Called with each detected move.
+        show (bool): Whether to show the debug window.
+        sampler (Optional[AdaptiveSampler]): Decides which frames are processed, a default sampler if omitted.
+        gate (Optional[SquareChangeGate]): Decides when the pieces model runs, a default gate if omitted.
+        tracker (Optional[BoardTracker]): Detection state of the board, a new tracker if omitted.
+        drift (Optional[DriftMonitor]): Decides when the corners are detected again, a default monitor if omitted.
+    """
+    # Detectors share the CPU pool, so every board brings its own input buffers
+    letterbox = Letterbox()
+    sampler = sampler or AdaptiveSampler()
+    gate = gate or SquareChangeGate()
+    tracker = tracker or BoardTracker(board_id)
+    drift = drift or DriftMonitor()
+    geometry_cache = tracker.geometry_cache
+    geometry_cache.add_invalidation_hook(sampler.reset)
+    geometry_cache.add_invalidation_hook(drift.reset)
 
-    frame_counter = 0
-    board_corners_ref: Optional[list] = None
-    from logic.api.services.board_service import BoardService
+    try:
+        while True:
+            # Frames are shared with the other subscribers of the board's source and are read-only
+            grabbed = await asyncio.to_thread(frames.acquire, FRAME_WAIT_TIMEOUT_S)
+            if grabbed is None:
+                if frames.active:
+                    continue
+                print("Error: Could not read frame.")
+                break
 
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            print("Error: Could not read frame.")
-            break
+            try:
+                frame = grabbed.image
 
-        if frame_counter % 5 == 0:
-            if board_corners_ref is None:
-                board_corners_ref = await get_board_corners(
-                    frame, piece_model_session, corner_ort_session
-                )
-                if board_corners_ref is None:
-                    print("Corners not found.")
+                # Static boards are only looked at a few times per second
+                geometry = geometry_cache.get(frame)
+                roi = geometry.frame_roi if geometry is not None else None
+                if not await detector_runtime.run_cpu(sampler.should_process, frame, roi):
                     continue
 
-            # Check if the board_id is registered before proceeding
-            boards = board_storage.boards
-            if board_id in boards:
-                frame, payload = await get_payload(
-                    piece_model_session, frame, board_corners_ref, board_id
-                )
-                if payload:
-                    move = payload[1]["sans"][0]
-                    print(f"Detected move: {move}")
-                                        
-                    boards = storage.boards
-                    board_service = BoardService()
-                    await board_service.send_move(board_id, move)
-                    
+                # Corners are searched inside the tracked region first, then on the whole frame
+                if geometry is None:
+                    board_corners_ref = await get_board_corners(
+                        frame, piece_model_session, corner_ort_session, letterbox, tracker.roi_keypoints
+                    )
+                    if board_corners_ref is None:
+                        print("Corners not found.")
+                        if tracker.roi_keypoints is not None:
+                            tracker.lose_roi()
+                        continue
+                    geometry = tracker.set_corners(board_corners_ref, frame)
 
-            cv2.imshow("Chess Board Detection", cv2.resize(frame, (1280, 720)))
-            cv2.waitKey(1)
+                # A light x-corners pass now and then tells whether the camera or the board was moved
+                if drift.due():
+                    x_corners = await run_xcorners_model(
+                        frame, corner_ort_session, [], letterbox, tracker.roi_keypoints
+                    )
+                    if drift.check(geometry, x_corners):
+                        print(f"Board {board_id} moved, detecting the corners again.")
+                        geometry_cache.invalidate()
+                        continue
 
-        frame_counter += 1
+                # Check if the board_id is registered before proceeding
+                game = game_ref if game_ref is not None else board_storage.boards.get(board_id)
+                # Only run the pieces model when squares changed and the board has settled
+                if game is not None and await detector_runtime.run_cpu(gate.should_infer, frame, geometry):
+                    frame, payload = await tracker.get_payload(
+                        piece_model_session, frame, game, letterbox, geometry
+                    )
+                    # A move waiting for the greedy delay keeps the model running until it is played
+                    gate.set_pending(tracker.move_pending)
+                    if payload:
+                        move = payload[1]["sans"][0]
+                        print(f"Detected move: {move}")
+                        await on_move(board_id, move, game)
 
-    cap.release()
-    cv2.destroyAllWindows()
+                if show:
+                    # The resized copy is owned by the display thread, the shared frame is released below
+                    frame_display.show("Chess Board Detection", await detector_runtime.run_cpu(cv2.resize, frame, (1280, 720)))
+            finally:
+                frames.release(grabbed)
+    finally:
+        print(f"Frame stats for board {board_id}: {frames.stats()}, sampler: {sampler.stats()}, gate: {gate.stats()}, tracker: {tracker.stats()}, drift: {drift.stats()}")
+        if show:
+            frame_display.close_windows()
 
-async def prepare_to_run_video(board_id: int, video: cv2.VideoCapture):
-    piece_session  = ort.InferenceSession("resources/models/480M_leyolo_pieces.onnx")
-    corner_session = ort.InferenceSession("resources/models/480L_leyolo_xcorners.onnx")
+async def prepare_to_run_video(
+    board_id: int,
+    frames: FrameSubscription,
+    sampler: Optional[AdaptiveSampler] = None,
+    gate: Optional[SquareChangeGate] = None,
+    tracker: Optional[BoardTracker] = None,
+    drift: Optional[DriftMonitor] = None
+):
+    # Sessions are shared by every board, each model is only loaded once per process
+    piece_session  = model_registry.get_session(PIECES_MODEL)
+    corner_session = model_registry.get_session(XCORNERS_MODEL)
 
-    await process_video(piece_session, corner_session, video, board_id)
+    await process_video(piece_session, corner_session, frames, board_id, sampler=sampler, gate=gate, tracker=tracker, drift=drift)
 
 
 # quick manual test
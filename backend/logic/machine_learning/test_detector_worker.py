@@ -0,0 +1,40 @@
+import queue
+import unittest
+import chess
+from unittest.mock import MagicMock, patch
+from logic.machine_learning import detector_worker
+
+
+class TestServe(unittest.IsolatedAsyncioTestCase):
+    """ Unit tests for the command loop of a detector worker process. """
+
+    async def test_reset_clears_tracker(self) -> None:
+        """ Test that a reset command clears the tracker and gate the board's detector runs with. """
+        commands, events = queue.Queue(), queue.Queue()
+        started = []
+
+        async def fake_process_video(*args, gate=None, tracker=None, **kwargs):
+            started.append((gate, tracker))
+            try:
+                tracker.state[12, 0] = 0.9
+                tracker.greedy_move_to_time["e4"] = 0.0
+            finally:
+                commands.put(("reset", 1, chess.STARTING_FEN, 1))
+                commands.put(("stop",))
+
+        with patch.object(detector_worker, "model_registry", MagicMock()), \
+                patch.object(detector_worker, "SharedFrameRing", MagicMock()), \
+                patch.object(detector_worker, "SharedFrameReader", MagicMock()), \
+                patch.object(detector_worker, "process_video", fake_process_video):
+            commands.put(("attach", 1, "ring", (4, 4, 3), 2))
+            await detector_worker.serve({1: chess.STARTING_FEN}, commands, events)
+
+        gate, tracker = started[0]
+        self.assertIsNotNone(tracker)
+        self.assertFalse(tracker.state.any())
+        self.assertEqual(tracker.greedy_move_to_time, {})
+        self.assertIsNone(gate._reference)
+
+
+if __name__ == "__main__":
+    unittest.main()
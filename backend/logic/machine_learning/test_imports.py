@@ -0,0 +1,21 @@
+import subprocess
+import sys
+import unittest
+from benchmarks.reference import BACKEND_DIR, RUNTIME_MODULES
+
+def import_in_subprocess(modules: list) -> str:
+    """ Import the modules in a fresh interpreter and return the names of the heavy modules it loaded. """
+    code = (
+        "import sys\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(','.join(name for name in ('tensorflow', 'keras') if name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+class TestImports(unittest.TestCase):
+    """ Guards the backend import graph against TensorFlow creeping back in. """
+
+    def test_runtime_does_not_import_tensorflow(self) -> None:
+        """ Test the detection pipeline and API boot without importing TensorFlow. """
+        self.assertEqual(import_in_subprocess(RUNTIME_MODULES), "")
@@ -3,6 +3,7 @@ MODEL_WIDTH = 480
 MODEL_HEIGHT = 288
 MARKER_RADIUS = 25
 MARKER_DIAMETER = 2 * MARKER_RADIUS
+PAD_VALUE = 114
 CORNER_KEYS = ["h1", "a1", "a8", "h8"]
 SQUARE_SIZE = 128
 BOARD_SIZE = 8 * SQUARE_SIZE
@@ -30,3 +31,90 @@ def make_label_map():
     return {label: i for i, label in enumerate(LABELS)}
 
 LABEL_MAP = make_label_map()
+
+# ONNX models shared by every board through the model registry
+PIECES_MODEL = "pieces"
+XCORNERS_MODEL = "xcorners"
+MODEL_PATHS = {
+    PIECES_MODEL: "resources/models/480M_leyolo_pieces.onnx",
+    XCORNERS_MODEL: "resources/models/480L_leyolo_xcorners.onnx"
+}
+
+# ONNX Runtime session settings (0 lets ONNX Runtime pick the thread count)
+ORT_INTRA_OP_THREADS = 0
+ORT_INTER_OP_THREADS = 0
+
+# Cross-board inference batching, only used by dynamic-batch exports (the bundled models are batch 1)
+INFERENCE_MAX_BATCH_SIZE = 32
+INFERENCE_MAX_WAIT_S = 0.01
+
+# Non-max suppression of the pieces and x-corners detections
+NMS_IOU_THRESHOLD = 0.3
+NMS_SCORE_THRESHOLD = 0.1
+NMS_MAX_OUTPUT_SIZE = 100
+NMS_MAX_CANDIDATES = 1000
+
+# Camera capture thread, one slot per concurrent subscriber (detector, stream, recorder) plus two
+FRAME_GRABBER_SLOTS = 5
+DETECTOR_MAX_FPS = 6.0
+FRAME_WAIT_TIMEOUT_S = 1.0
+
+# MJPEG video stream, every frame is encoded once and shared by all viewers of a board
+STREAM_JPEG_QUALITY = 80
+STREAM_TARGET_FPS = 15.0
+
+# Websocket fan-out, a client whose queue is full is either disconnected or loses its oldest message
+BROADCAST_QUEUE_SIZE = 64
+BROADCAST_SEND_TIMEOUT_S = 5.0
+BROADCAST_POLICY_DROP = "drop"
+BROADCAST_POLICY_DISCONNECT = "disconnect"
+BROADCAST_POLICY = BROADCAST_POLICY_DISCONNECT
+
+# Worker threads for the CPU work of the detectors (0 = one per CPU core)
+DETECTOR_CPU_WORKERS = 0
+
+# Detector worker processes (0 = run every detector in the API process)
+DETECTOR_BOARDS_PER_WORKER = 0
+SHARED_FRAME_SLOTS = 4
+SHARED_FRAME_POLL_S = 0.005
+
+# Adaptive frame sampling, frames are processed at the active rate while the board moves and at the idle rate otherwise
+SAMPLER_IDLE_FPS = 1.0
+SAMPLER_MOTION_THRESHOLD = 3.0
+SAMPLER_ACTIVE_HOLD_S = 2.0
+SAMPLER_MOTION_SIZE = (64, 64)
+
+# Per-square change gate, the pieces model only runs when squares changed and the board settled
+SQUARE_CHANGE_THRESHOLD = 12.0
+SQUARE_SETTLE_S = 0.5
+SQUARE_ACTIVE_INFERENCES = 5
+SQUARE_PENDING_HOLD_S = 3.0
+SQUARE_REFRESH_S = 10.0
+SQUARE_SAMPLES = 6
+
+# Tracked board region, reused for both models until too few pieces are seen in it
+ROI_MARGIN = 0.1
+ROI_UPDATE_TOLERANCE = 4.0
+ROI_PIECE_SCORE = 0.5
+ROI_MIN_PIECE_RATIO = 0.5
+ROI_LOST_INFERENCES = 3
+
+# Drift check, a light x-corners pass inside the tracked region compared with the cached grid
+DRIFT_CHECK_INTERVAL_S = 5.0
+DRIFT_THRESHOLD = 0.25
+DRIFT_MIN_XCORNERS = 5
+DRIFT_CONFIRMATIONS = 2
+
+# Board fitting on the x-corners, every Delaunay quad or a RANSAC sample of them
+CORNER_FIT_EXHAUSTIVE = "exhaustive"
+CORNER_FIT_RANSAC = "ransac"
+CORNER_FIT_METHOD = CORNER_FIT_EXHAUSTIVE
+RANSAC_INLIER_TOLERANCE = 0.2
+RANSAC_HYPOTHESIS_TOLERANCE = 0.45
+RANSAC_CONFIDENCE = 0.99
+RANSAC_MAX_HYPOTHESES = 128
+RANSAC_BATCH_SIZE = 16
+RANSAC_MIN_INLIERS = 5
+RANSAC_REFINED_PER_BATCH = 3
+RANSAC_REFINEMENTS = 3
+RANSAC_SEED = 0
@@ -0,0 +1,120 @@
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+
+from typing import Any, Callable, Coroutine, Dict, Optional
+from logic.machine_learning.utilities.constants import DETECTOR_CPU_WORKERS
+
+
+class DetectorRuntime:
+    """
+    Runs every detector as a coroutine on the application event loop, with the CPU work on a shared thread pool.
+
+    Detector coroutines live on the same loop as the FastAPI websockets, so moves are broadcast
+    from the loop that owns the connections. Preprocessing, post-processing and move scoring are
+    handed to the pool with ``run_cpu`` and model runs go through the inference scheduler, so the
+    loop only coordinates and never blocks on a frame.
+    """
+
+    def __init__(self, cpu_workers: int = DETECTOR_CPU_WORKERS):
+        """
+        Args:
+            cpu_workers (int): Threads in the CPU pool (0 = one per CPU core).
+        """
+        self.cpu_workers = cpu_workers or os.cpu_count() or 1
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.detectors: Dict[int, concurrent.futures.Future] = {}
+
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """ The CPU pool, created on first use. """
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(self.cpu_workers, thread_name_prefix="detector-cpu")
+            return self._executor
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Sets the event loop the detectors run on.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The application event loop.
+        """
+        self.loop = loop
+
+    def spawn(self, board_id: int, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Schedules a detector coroutine on the attached loop. Safe to call from any thread.
+
+        Args:
+            board_id (int): Board the detector belongs to.
+            coroutine (Coroutine): The detector coroutine.
+
+        Returns:
+            concurrent.futures.Future: Future of the detector, done when the detector stops.
+
+        Raises:
+            RuntimeError: If no event loop is attached.
+        """
+        if self.loop is None:
+            coroutine.close()
+            raise RuntimeError("DetectorRuntime has no event loop attached.")
+
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        # Registered first, a detector that is already done removes itself in the callback
+        self.detectors[board_id] = future
+        future.add_done_callback(functools.partial(self._on_detector_done, board_id))
+        return future
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs a CPU-bound function on the pool without blocking the event loop.
+
+        Args:
+            fn (Callable[..., Any]): The function to run.
+            *args (Any): Positional arguments of the function.
+            **kwargs (Any): Keyword arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def call_in_loop(self, fn: Callable[..., Any], *args: Any) -> None:
+        """
+        Hands a result back to the event loop from a worker thread or process reader.
+
+        Args:
+            fn (Callable[..., Any]): Function to call on the loop.
+            *args (Any): Arguments of the function.
+        """
+        if self.loop is None:
+            raise RuntimeError("DetectorRuntime has no event loop attached.")
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def stop(self) -> None:
+        """ Cancels every detector and shuts the CPU pool down. """
+        for future in self.detectors.values():
+            future.cancel()
+        self.detectors.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_detector_done(self, board_id: int, future: concurrent.futures.Future) -> None:
+        """ Reports detectors that stopped with an error. """
+        if self.detectors.get(board_id) is future:
+            del self.detectors[board_id]
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Detector for board {board_id} stopped: {future.exception()!r}")
+
+
+# Shared by every board of the process
+detector_runtime = DetectorRuntime()
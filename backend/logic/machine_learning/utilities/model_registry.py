@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+import onnxruntime as ort
+
+from typing import Dict, List, Optional
+from logic.machine_learning.utilities.constants import MODEL_PATHS, ORT_INTRA_OP_THREADS, ORT_INTER_OP_THREADS
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def get_rss_bytes() -> Optional[int]:
+    """
+    Returns the resident set size of the current process.
+
+    Returns:
+        Optional[int]: The resident memory in bytes, or None if psutil is not installed.
+    """
+    if psutil is None:
+        return None
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+class ModelRegistry:
+    """
+    Process-wide registry that loads every ONNX model once and shares the session between all detectors.
+
+    ``InferenceSession.run`` is thread-safe, so a single session per model can serve every
+    ``Detector.run`` worker concurrently. Loading is guarded by a lock so two boards starting
+    at the same time never load the same model twice.
+    """
+
+    def __init__(
+        self,
+        model_paths: Dict[str, str] = MODEL_PATHS,
+        intra_op_num_threads: int = ORT_INTRA_OP_THREADS,
+        inter_op_num_threads: int = ORT_INTER_OP_THREADS,
+        graph_optimization_level: ort.GraphOptimizationLevel = ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        providers: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            model_paths (Dict[str, str]): Mapping of model names to ONNX file paths.
+            intra_op_num_threads (int): Threads used inside a single operator (0 = ONNX Runtime default).
+            inter_op_num_threads (int): Threads used to run independent operators (0 = ONNX Runtime default).
+            graph_optimization_level (ort.GraphOptimizationLevel): Graph optimizations applied at load time.
+            providers (Optional[List[str]]): Execution providers, or None to use the ONNX Runtime default.
+        """
+        self.model_paths = dict(model_paths)
+        self.intra_op_num_threads = intra_op_num_threads
+        self.inter_op_num_threads = inter_op_num_threads
+        self.graph_optimization_level = graph_optimization_level
+        self.providers = providers
+
+        self._sessions: Dict[str, ort.InferenceSession] = {}
+        self._stats: Dict[str, Dict[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def make_session_options(self) -> ort.SessionOptions:
+        """
+        Builds the session options shared by every model in the registry.
+
+        Returns:
+            ort.SessionOptions: The configured session options.
+        """
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_num_threads
+        options.inter_op_num_threads = self.inter_op_num_threads
+        options.graph_optimization_level = self.graph_optimization_level
+        return options
+
+    def get_session(self, name: str) -> ort.InferenceSession:
+        """
+        Returns the shared session for a model, loading it on first use.
+
+        Args:
+            name (str): The model name, e.g. ``PIECES_MODEL`` or ``XCORNERS_MODEL``.
+
+        Returns:
+            ort.InferenceSession: The session shared by all callers.
+
+        Raises:
+            KeyError: If the model name is not registered.
+        """
+        session = self._sessions.get(name)
+        if session is not None:
+            return session
+
+        with self._lock:
+            if name not in self._sessions:
+                self._sessions[name] = self._load(name)
+            return self._sessions[name]
+
+    def load_all(self) -> None:
+        """ Loads every registered model so the cost is paid once, before detectors start. """
+        for name in self.model_paths:
+            self.get_session(name)
+
+    def _load(self, name: str) -> ort.InferenceSession:
+        """
+        Loads a model and records its startup time and memory footprint.
+
+        Args:
+            name (str): The model name.
+
+        Returns:
+            ort.InferenceSession: The newly created session.
+        """
+        path = self.model_paths[name]
+
+        rss_before = get_rss_bytes()
+        start_time = time.perf_counter()
+
+        if self.providers is None:
+            session = ort.InferenceSession(path, sess_options=self.make_session_options())
+        else:
+            session = ort.InferenceSession(path, sess_options=self.make_session_options(), providers=self.providers)
+
+        load_time = time.perf_counter() - start_time
+        rss_after = get_rss_bytes()
+
+        self._stats[name] = {
+            "path": path,
+            "load_time_s": load_time,
+            "file_size_bytes": os.path.getsize(path),
+            "rss_delta_bytes": None if rss_before is None else rss_after - rss_before,
+            "providers": session.get_providers()
+        }
+
+        return session
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Returns the load statistics of every model loaded so far.
+
+        Returns:
+            Dict[str, Dict[str, object]]: Per-model load time, file size, memory delta and providers.
+        """
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def report(self) -> str:
+        """
+        Formats the load statistics as a human readable report.
+
+        Returns:
+            str: One line per loaded model.
+        """
+        lines = []
+        for name, stats in self._stats.items():
+            rss = stats["rss_delta_bytes"]
+            memory = "n/a" if rss is None else f"{rss / 2**20:.1f} MiB"
+            lines.append(
+                f"{name}: loaded in {stats['load_time_s'] * 1000:.0f} ms, "
+                f"file {stats['file_size_bytes'] / 2**20:.1f} MiB, memory {memory}, "
+                f"providers {stats['providers']}"
+            )
+        return "\n".join(lines)
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,219 @@
+import chess
+import chess.polyglot
+import numpy as np
+
+from typing import List, Optional, Tuple
+from logic.machine_learning.utilities.move import MoveData, get_piece_idx
+from logic.machine_learning.utilities.constants import LABELS
+
+# Padding value of unused from/to/target slots
+NO_SQUARE = -1
+
+
+class MoveIndex:
+    """
+    Every legal move and reply of a position, stored as flat, padded index arrays.
+
+    Single moves (move1) and move pairs (move1 followed by a legal reply) are kept in the same
+    order ``get_moves_pairs`` produces them, so scoring the arrays selects the same moves as
+    scoring the move-pair dictionaries. SAN strings of replies are only computed on demand.
+
+    Attributes:
+        single_sans (List[str]): SAN of every legal move.
+        single_from (np.ndarray): (M, 1) from-squares of every legal move.
+        single_to (np.ndarray): (M, 1) to-squares of every legal move.
+        single_targets (np.ndarray): (M, 1) label index of the piece on each to-square after the move.
+        pair_move1 (np.ndarray): (P,) index into the single moves of the first move of each pair.
+        pair_from (np.ndarray): (P, 2) combined from-squares of both moves, padded with NO_SQUARE.
+        pair_to (np.ndarray): (P, 2) combined to-squares of both moves, padded with NO_SQUARE.
+        pair_targets (np.ndarray): (P, 2) label index of the pieces on the combined to-squares.
+        reply_from (np.ndarray): (P, 1) from-squares of the reply of each pair.
+        reply_to (np.ndarray): (P, 1) to-squares of the reply of each pair.
+        reply_targets (np.ndarray): (P, 1) label index of the piece on the to-square of the reply.
+        single_state_idx, reply_state_idx, pair_state_idx (np.ndarray): The to-squares and targets
+            flattened into indices of the raveled (64 * 12) state, padded with NO_SQUARE.
+    """
+
+    def __init__(self, board: chess.Board):
+        """
+        Args:
+            board (chess.Board): The position to index. It is left unchanged.
+        """
+        self.fen = board.fen()
+        self.moves: List[chess.Move] = list(board.legal_moves)
+        self.replies: List[chess.Move] = []
+        self.single_sans: List[str] = []
+
+        single_rows: List[Tuple[int, int, int]] = []
+        reply_rows: List[Tuple[int, int, int]] = []
+        pair_rows: List[Tuple[int, int, int, int, int, int]] = []
+        pair_move1: List[int] = []
+
+        for i, move1 in enumerate(self.moves):
+            target1 = get_piece_idx(board, move1)
+            self.single_sans.append(board.san(move1))
+            single_rows.append((move1.from_square, move1.to_square, target1))
+
+            board.push(move1)
+            for move2 in board.legal_moves:
+                target2 = get_piece_idx(board, move2)
+                self.replies.append(move2)
+                reply_rows.append((move2.from_square, move2.to_square, target2))
+                pair_rows.append(combine_squares(move1, target1, move2, target2))
+                pair_move1.append(i)
+            board.pop()
+
+        single = np.array(single_rows, dtype=np.int64).reshape(-1, 3)
+        reply = np.array(reply_rows, dtype=np.int64).reshape(-1, 3)
+        pair = np.array(pair_rows, dtype=np.int64).reshape(-1, 6)
+
+        self.single_from = single[:, 0:1]
+        self.single_to = single[:, 1:2]
+        self.single_targets = single[:, 2:3]
+
+        self.pair_move1 = np.array(pair_move1, dtype=np.int64)
+        self.pair_from = pair[:, 0:2]
+        self.pair_to = pair[:, 2:4]
+        self.pair_targets = pair[:, 4:6]
+
+        self.reply_from = reply[:, 0:1]
+        self.reply_to = reply[:, 1:2]
+        self.reply_targets = reply[:, 2:3]
+
+        self.single_state_idx = get_state_idx(self.single_to, self.single_targets)
+        self.reply_state_idx = get_state_idx(self.reply_to, self.reply_targets)
+        self.pair_state_idx = get_state_idx(self.pair_to, self.pair_targets)
+
+    def __len__(self) -> int:
+        """ Returns the number of legal single moves. """
+        return len(self.moves)
+
+    def single_data(self, i: int) -> MoveData:
+        """
+        Builds the move data of a single move, in the format of ``get_data``.
+
+        Args:
+            i (int): Index of the single move.
+
+        Returns:
+            MoveData: The move data of the move.
+        """
+        return make_move_data([self.single_sans[i]], self.single_from[i], self.single_to[i], self.single_targets[i])
+
+    def pair_data(self, p: int) -> MoveData:
+        """
+        Builds the combined move data of a move pair, in the format of ``combine_data``.
+
+        Args:
+            p (int): Index of the move pair.
+
+        Returns:
+            MoveData: The combined move data, with the SAN of both moves.
+        """
+        i = int(self.pair_move1[p])
+        board = chess.Board(self.fen)
+        board.push(self.moves[i])
+        reply_san = board.san(self.replies[p])
+
+        return make_move_data([self.single_sans[i], reply_san], self.pair_from[p], self.pair_to[p], self.pair_targets[p])
+
+
+def get_state_idx(to_squares: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """
+    Flattens (to-square, target) pairs into indices of the raveled 64 x 12 state.
+
+    Args:
+        to_squares (np.ndarray): Padded to-squares.
+        targets (np.ndarray): Label index of the piece expected on each to-square.
+
+    Returns:
+        np.ndarray: ``to * 12 + target``, keeping NO_SQUARE for padded slots.
+    """
+    return np.where(to_squares == NO_SQUARE, NO_SQUARE, to_squares * len(LABELS) + targets)
+
+
+def combine_squares(move1: chess.Move, target1: Optional[int], move2: chess.Move, target2: Optional[int]) -> Tuple[int, int, int, int, int, int]:
+    """
+    Combines the squares of two sequential moves like ``combine_data``, dropping squares of the first move touched by the second.
+
+    Args:
+        move1 (chess.Move): The first move.
+        target1 (Optional[int]): Label index of the piece of the first move.
+        move2 (chess.Move): The reply.
+        target2 (Optional[int]): Label index of the piece of the reply.
+
+    Returns:
+        Tuple[int, int, int, int, int, int]: (from_a, from_b, to_a, to_b, target_a, target_b), padded with NO_SQUARE.
+    """
+    bad_squares = (move2.from_square, move2.to_square)
+
+    from_squares = [sq for sq in (move1.from_square,) if sq not in bad_squares] + [move2.from_square]
+    to_squares = [move2.to_square]
+    targets = [target2]
+    if move1.to_square not in bad_squares:
+        to_squares.insert(0, move1.to_square)
+        targets.insert(0, target1)
+
+    from_squares += [NO_SQUARE] * (2 - len(from_squares))
+    to_squares += [NO_SQUARE] * (2 - len(to_squares))
+    targets += [NO_SQUARE] * (2 - len(targets))
+
+    return (*from_squares, *to_squares, *targets)
+
+
+def make_move_data(sans: List[str], from_squares: np.ndarray, to_squares: np.ndarray, targets: np.ndarray) -> MoveData:
+    """
+    Converts padded index rows back to a move data dictionary.
+
+    Args:
+        sans (List[str]): SAN of the moves.
+        from_squares (np.ndarray): Padded from-squares.
+        to_squares (np.ndarray): Padded to-squares.
+        targets (np.ndarray): Padded target label indices.
+
+    Returns:
+        MoveData: The move data without padding.
+    """
+    valid_to = to_squares != NO_SQUARE
+    return {
+        "sans": sans,
+        "from_": [int(sq) for sq in from_squares if sq != NO_SQUARE],
+        "to": [int(sq) for sq in to_squares[valid_to]],
+        "targets": [int(t) for t in targets[valid_to]]
+    }
+
+
+class MoveIndexCache:
+    """
+    Keeps the move index of the latest position of a board and rebuilds it only when the position changes.
+
+    Positions are keyed by their Zobrist hash, which covers the pieces, side to move, castling
+    rights and en passant square, i.e. everything the legal moves depend on.
+    """
+
+    def __init__(self):
+        self.key: Optional[int] = None
+        self.index: Optional[MoveIndex] = None
+        self.rebuilds = 0
+
+    def get(self, board: chess.Board) -> MoveIndex:
+        """
+        Returns the move index of the board's current position.
+
+        Args:
+            board (chess.Board): The board of the game.
+
+        Returns:
+            MoveIndex: The cached index, rebuilt if the position changed since the last call.
+        """
+        key = chess.polyglot.zobrist_hash(board)
+        if key != self.key or self.index is None:
+            self.index = MoveIndex(board)
+            self.key = key
+            self.rebuilds += 1
+        return self.index
+
+    def invalidate(self) -> None:
+        """ Drops the cached index, e.g. after the game was reset. """
+        self.key = None
+        self.index = None
@@ -1,9 +1,13 @@
+import cv2
+import threading
 import numpy as np
-import tensorflow as tf
 
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from logic.machine_learning.detection.bbox_scores import get_bbox
-from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, PAD_VALUE
+
+# Maps every uint8 pixel value straight to its normalized float16 value
+NORMALIZE_LUT: np.ndarray = (np.arange(256) / 255.0).astype(np.float16)
 
 def preprocess_image(image: np.ndarray) -> np.ndarray:
     """
@@ -27,11 +31,100 @@ def preprocess_image(image: np.ndarray) -> np.ndarray:
     return image[np.newaxis, ...].astype(np.float16)  # Add batch dimension
 
 
+class Letterbox:
+    """
+    Letterboxes frames into preallocated buffers and writes the model input tensor in place.
+
+    The resized frame is written by ``cv2.resize`` directly into the padded canvas, and a single
+    lookup-table gather normalizes, transposes to CHW and casts to float16 into the reusable
+    input tensor, so no intermediate full-frame copies are made per inference.
+    """
+
+    def __init__(self, width: int = MODEL_WIDTH, height: int = MODEL_HEIGHT, pad_value: int = PAD_VALUE):
+        """
+        Args:
+            width (int): Width of the model input.
+            height (int): Height of the model input.
+            pad_value (int): Pixel value of the padded border.
+        """
+        self.width = width
+        self.height = height
+        self.pad_value = pad_value
+        self.canvas = np.full((height, width, 3), pad_value, dtype=np.uint8)
+        self.tensor = np.empty((1, 3, height, width), dtype=np.float16)
+        self._padding: Optional[List[int]] = None
+
+    def __call__(self, image: np.ndarray) -> Tuple[np.ndarray, List[int]]:
+        """
+        Resizes the image to fit the model input while keeping its aspect ratio and pads the rest.
+
+        Args:
+            image (np.ndarray): The uint8 image of shape (H, W, 3) to letterbox.
+
+        Returns:
+            Tuple[np.ndarray, List[int]]:
+                - tensor (np.ndarray): The reused (1, 3, height, width) float16 input tensor.
+                  It is overwritten by the next call on this Letterbox.
+                - padding (List[int]): Padding applied as [left, right, top, bottom].
+        """
+        height, width, _ = image.shape
+        ratio = height / width
+        desired_ratio = self.height / self.width
+        resize_height = self.height
+        resize_width = self.width
+        if ratio > desired_ratio:
+            resize_width = int(self.height / ratio)
+        else:
+            resize_height = int(self.width * ratio)
+
+        dx = self.width - resize_width
+        dy = self.height - resize_height
+        pad_right = dx // 2
+        pad_left = dx - pad_right
+        pad_bottom = dy // 2
+        pad_top = dy - pad_bottom
+        padding = [pad_left, pad_right, pad_top, pad_bottom]
+
+        # The border only has to be repainted when the letterbox layout changes
+        if padding != self._padding:
+            self.canvas.fill(self.pad_value)
+            self._padding = padding
+
+        cv2.resize(
+            image,
+            (resize_width, resize_height),
+            dst=self.canvas[pad_top:pad_top + resize_height, pad_left:pad_left + resize_width],
+            interpolation=cv2.INTER_LINEAR
+        )
+
+        np.take(NORMALIZE_LUT, self.canvas.transpose(2, 0, 1), out=self.tensor[0])
+
+        return self.tensor, padding
+
+
+_letterboxes = threading.local()
+
+
+def get_letterbox() -> Letterbox:
+    """
+    Returns the Letterbox of the calling thread, so detector threads never share input buffers.
+
+    Returns:
+        Letterbox: The thread-local Letterbox.
+    """
+    letterbox = getattr(_letterboxes, "letterbox", None)
+    if letterbox is None:
+        letterbox = Letterbox()
+        _letterboxes.letterbox = letterbox
+    return letterbox
+
+
 def get_input(
     video_ref: np.ndarray, 
     keypoints: Optional[np.ndarray] = None, 
-    padding_ratio: int = 12
-) -> Tuple[int, int, Optional[np.ndarray]]:
+    padding_ratio: int = 12,
+    letterbox: Optional[Letterbox] = None
+) -> Tuple[np.ndarray, int, int, List[int], List[int]]:
     """
     Processes the input video frame by extracting the region of interest (ROI),
     resizing it to match the model's input dimensions, and applying necessary padding.
@@ -40,10 +133,13 @@ def get_input(
         video_ref (np.ndarray): Input video frame represented as a NumPy array of shape (height, width, channels).
         keypoints (Optional[np.ndarray]): Array of keypoints used to determine the bounding box (ROI). Defaults to None.
         padding_ratio (int): Factor to compute padding around the detected bounding box. Defaults to 12.
+        letterbox (Optional[Letterbox]): Buffers to write the input into. Defaults to the Letterbox of the calling thread,
+            detectors sharing a thread pool must pass their own.
 
     Returns:
         Tuple[np.ndarray, int, int, List[int], List[int]]:
-            - image4d (np.ndarray): Preprocessed and padded input ready for the model.
+            - image4d (np.ndarray): Preprocessed and padded input ready for the model. The tensor is
+              reused by the next call with the same Letterbox.
             - width (int): Width of the cropped video region.
             - height (int): Height of the cropped video region.
             - padding (List[int]): Padding applied as [left, right, top, bottom].
@@ -86,34 +182,8 @@ def get_input(
     # Cropping
     video_ref = video_ref[roi[1]:roi[3], roi[0]:roi[2], :]
     
-    # Resizing
+    # Resizing and padding straight into the reusable input tensor
     height, width, _ = video_ref.shape
-    ratio = height / width
-    desired_ratio = MODEL_HEIGHT / MODEL_WIDTH
-    resize_height = MODEL_HEIGHT
-    resize_width = MODEL_WIDTH
-    if ratio > desired_ratio:
-        resize_width = int(MODEL_HEIGHT / ratio)
-    else:
-        resize_height = int(MODEL_WIDTH * ratio)
-    
-    video_ref = tf.image.resize(video_ref, [resize_height, resize_width])
-    
-    # Padding
-    dx = MODEL_WIDTH - video_ref.shape[1]
-    dy = MODEL_HEIGHT - video_ref.shape[0]
-    pad_right = dx // 2
-    pad_left = dx - pad_right
-    pad_bottom = dy // 2
-    pad_top = dy - pad_bottom
-    padding = [pad_left, pad_right, pad_top, pad_bottom]
-    
-    video_ref = tf.pad(
-    video_ref,
-    paddings=[[pad_top, pad_bottom], [pad_left, pad_right], [0, 0]],
-    constant_values=114
-)
-
-    image4d = preprocess_image(video_ref.numpy())
+    image4d, padding = (letterbox or get_letterbox())(video_ref)
     
     return image4d, width, height, padding, roi
@@ -0,0 +1,137 @@
+import numpy as np
+
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+
+# Header of the shared block: latest sequence number followed by the frame shape
+HEADER_FIELDS = 4
+HEADER_BYTES = HEADER_FIELDS * np.dtype(np.int64).itemsize
+
+
+class SharedFrameRing:
+    """
+    Ring buffer of camera frames in shared memory, written by one process and read by another.
+
+    The writer copies each frame into the next slot and only then publishes its sequence number,
+    so a reader always finds a complete frame in the slot of the latest sequence number. A reader
+    copies the frame out and checks afterwards that the writer has not come round to the same slot,
+    which would mean the copy may be torn.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, shape: Tuple[int, int, int], slots: int, owner: bool):
+        """
+        Args:
+            memory (shared_memory.SharedMemory): The shared block holding the header and the slots.
+            shape (Tuple[int, int, int]): Shape (H, W, 3) of every frame.
+            slots (int): Number of frame slots.
+            owner (bool): Whether this process created the block and unlinks it on close.
+        """
+        self.memory = memory
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = owner
+
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=memory.buf)
+        self.frames = np.ndarray((slots, *self.shape), dtype=np.uint8, buffer=memory.buf, offset=HEADER_BYTES)
+
+    @property
+    def name(self) -> str:
+        """ Name of the shared block, used by the other process to attach. """
+        return self.memory.name
+
+    @classmethod
+    def create(cls, shape: Tuple[int, int, int], slots: int) -> "SharedFrameRing":
+        """
+        Creates a new ring in shared memory.
+
+        Args:
+            shape (Tuple[int, int, int]): Shape (H, W, 3) of every frame.
+            slots (int): Number of frame slots, at least 2.
+
+        Returns:
+            SharedFrameRing: The ring, owned by the calling process.
+
+        Raises:
+            ValueError: If fewer than 2 slots are requested.
+        """
+        if slots < 2:
+            raise ValueError("SharedFrameRing needs at least 2 slots.")
+
+        size = HEADER_BYTES + slots * int(np.prod(shape))
+        memory = shared_memory.SharedMemory(create=True, size=size)
+        ring = cls(memory, shape, slots, owner=True)
+        ring.header[0] = -1
+        ring.header[1:] = shape
+        return ring
+
+    @classmethod
+    def attach(cls, name: str, shape: Tuple[int, int, int], slots: int) -> "SharedFrameRing":
+        """
+        Attaches to a ring created by another process.
+
+        Args:
+            name (str): Name of the shared block.
+            shape (Tuple[int, int, int]): Shape (H, W, 3) of every frame.
+            slots (int): Number of frame slots.
+
+        Returns:
+            SharedFrameRing: The ring, left to the creating process to unlink.
+        """
+        memory = shared_memory.SharedMemory(name=name)
+        return cls(memory, shape, slots, owner=False)
+
+    @property
+    def latest_seq(self) -> int:
+        """ Sequence number of the latest complete frame, -1 before the first frame. """
+        return int(self.header[0])
+
+    def write(self, frame: np.ndarray) -> int:
+        """
+        Copies a frame into the next slot and publishes it.
+
+        Args:
+            frame (np.ndarray): A uint8 frame of the ring's shape.
+
+        Returns:
+            int: Sequence number of the frame.
+
+        Raises:
+            ValueError: If the frame does not have the ring's shape.
+        """
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match the ring shape {self.shape}.")
+
+        seq = self.latest_seq + 1
+        np.copyto(self.frames[seq % self.slots], frame)
+        self.header[0] = seq
+        return seq
+
+    def read(self, out: np.ndarray, after_seq: int = -1) -> Optional[int]:
+        """
+        Copies the latest frame into ``out`` if it is newer than ``after_seq``.
+
+        Args:
+            out (np.ndarray): Preallocated uint8 buffer of the ring's shape.
+            after_seq (int): Only read a frame with a higher sequence number.
+
+        Returns:
+            Optional[int]: Sequence number of the frame read, or None if there is no newer frame
+                or the writer overwrote the slot while it was copied.
+        """
+        seq = self.latest_seq
+        if seq <= after_seq:
+            return None
+
+        np.copyto(out, self.frames[seq % self.slots])
+        if self.latest_seq - seq >= self.slots - 1:
+            return None
+        return seq
+
+    def close(self) -> None:
+        """ Detaches from the shared block, unlinking it if this process created it. """
+        del self.header
+        del self.frames
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
@@ -0,0 +1,71 @@
+import asyncio
+import concurrent.futures
+import threading
+import unittest
+from unittest.mock import patch
+
+from logic.machine_learning.utilities.detector_runtime import DetectorRuntime
+
+
+class TestDetectorRuntime(unittest.IsolatedAsyncioTestCase):
+    """ Unit tests for the DetectorRuntime class. """
+
+    def setUp(self) -> None:
+        self.runtime = DetectorRuntime(cpu_workers=2)
+
+    def tearDown(self) -> None:
+        self.runtime.stop()
+
+    async def test_run_cpu_runs_on_pool(self) -> None:
+        """ Test that CPU work runs on a pool thread and returns its result to the loop. """
+        name = await self.runtime.run_cpu(lambda: threading.current_thread().name)
+        self.assertTrue(name.startswith("detector-cpu"))
+        self.assertEqual(await self.runtime.run_cpu(pow, 2, 10), 1024)
+
+    async def test_spawn_requires_loop(self) -> None:
+        """ Test that detectors cannot be spawned before a loop is attached. """
+        async def detector():
+            pass
+
+        with self.assertRaises(RuntimeError):
+            self.runtime.spawn(1, detector())
+
+    async def test_spawn_from_other_thread(self) -> None:
+        """ Test that a detector spawned from another thread runs on the attached loop. """
+        loop = asyncio.get_running_loop()
+        self.runtime.attach(loop)
+        ran_on = []
+
+        async def detector():
+            ran_on.append(asyncio.get_running_loop())
+
+        futures = []
+        thread = threading.Thread(target=lambda: futures.append(self.runtime.spawn(1, detector())))
+        thread.start()
+        thread.join()
+        await asyncio.wait_for(asyncio.wrap_future(futures[0]), timeout=1.0)
+
+        self.assertEqual(ran_on, [loop])
+
+
+    async def test_finished_detector_is_forgotten(self) -> None:
+        """ Test that a detector already done when its callback is added leaves no entry behind. """
+        self.runtime.attach(asyncio.get_running_loop())
+        done = concurrent.futures.Future()
+        done.set_result(None)
+
+        def finished(coroutine, loop):
+            coroutine.close()
+            return done
+
+        async def detector():
+            pass
+
+        with patch("asyncio.run_coroutine_threadsafe", finished):
+            self.runtime.spawn(1, detector())
+
+        self.assertEqual(self.runtime.detectors, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import cv2
+import numpy as np
+from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT, PAD_VALUE
+from logic.machine_learning.utilities.preprocess import Letterbox, get_input
+from benchmarks.reference import HAS_TENSORFLOW, legacy_letterbox, tensorflow_letterbox
+
+class TestPreprocess(unittest.TestCase):
+    """
+    Unit tests for the TensorFlow-free letterbox preprocessing.
+
+    The parity tests compare the uint8 Letterbox with ``legacy_letterbox``. That reference keeps
+    the layout, padding and normalization of the TensorFlow version but resizes with cv2 in float,
+    so they check the letterbox geometry and the rounding of the fused path, not the TensorFlow
+    resize itself. Only ``test_parity_tensorflow`` compares with TensorFlow, where it is installed.
+    """
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.frame = cv2.GaussianBlur(rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8), (5, 5), 0)
+
+    def assert_parity(self, image: np.ndarray) -> None:
+        """ Assert the letterboxed tensor matches the float cv2 reference within one grey level. """
+        tensor, _ = Letterbox()(image)
+        expected = legacy_letterbox(image)
+
+        self.assertEqual(tensor.shape, (1, 3, MODEL_HEIGHT, MODEL_WIDTH))
+        self.assertEqual(tensor.dtype, np.float16)
+        np.testing.assert_allclose(tensor.astype(np.float32), expected.astype(np.float32), atol=1.5 / 255)
+
+    def test_parity_wide_frame(self) -> None:
+        """ Test a frame wider than the model input is padded top and bottom. """
+        self.assert_parity(self.frame)
+
+    def test_parity_tall_crop(self) -> None:
+        """ Test a crop taller than the model input is padded left and right. """
+        self.assert_parity(self.frame[100:600, 300:700])
+
+    def test_parity_with_keypoints(self) -> None:
+        """ Test get_input crops to the keypoints before letterboxing. """
+        keypoints = [[120.0, 60.0], [360.0, 60.0], [360.0, 250.0], [120.0, 250.0]]
+        image4d, width, height, padding, roi = get_input(self.frame, keypoints, letterbox=Letterbox())
+
+        crop = self.frame[roi[1]:roi[3], roi[0]:roi[2]]
+        self.assertEqual((height, width), crop.shape[:2])
+        self.assertEqual(len(padding), 4)
+        np.testing.assert_allclose(image4d.astype(np.float32), legacy_letterbox(crop).astype(np.float32), atol=1.5 / 255)
+
+    @unittest.skipUnless(HAS_TENSORFLOW, "TensorFlow is not installed")
+    def test_parity_tensorflow(self) -> None:
+        """ Test the reference and the letterbox against the original TensorFlow preprocessing. """
+        for image in (self.frame, self.frame[100:600, 300:700]):
+            expected = tensorflow_letterbox(image).astype(np.float32)
+            np.testing.assert_allclose(legacy_letterbox(image).astype(np.float32), expected, atol=0.25 / 255)
+            np.testing.assert_allclose(Letterbox()(image)[0].astype(np.float32), expected, atol=1.5 / 255)
+
+    def test_padding_repainted_on_layout_change(self) -> None:
+        """ Test the border is repainted when the letterbox layout changes between calls. """
+        letterbox = Letterbox()
+        letterbox(self.frame)
+        tensor, padding = letterbox(self.frame[100:600, 300:700])
+
+        self.assertGreater(padding[0], 0)
+        np.testing.assert_array_equal(tensor[0, :, :, 0], np.float16(PAD_VALUE / 255))
+
+    def test_tensor_is_reused(self) -> None:
+        """ Test consecutive calls write into the same input tensor. """
+        letterbox = Letterbox()
+        first, _ = letterbox(self.frame)
+        second, _ = letterbox(self.frame[::2, ::2])
+
+        self.assertIs(first, second)
@@ -0,0 +1,67 @@
+import multiprocessing
+import unittest
+import numpy as np
+from logic.machine_learning.utilities.shared_frames import SharedFrameRing
+
+
+def read_in_child(name, shape, slots, results) -> None:
+    """ Attaches to a ring from another process and reports the latest frame. """
+    ring = SharedFrameRing.attach(name, shape, slots)
+    out = np.empty(shape, dtype=np.uint8)
+    seq = ring.read(out)
+    results.put((seq, int(out[0, 0, 0])))
+    ring.close()
+
+
+class TestSharedFrameRing(unittest.TestCase):
+    """ Unit tests for the SharedFrameRing class. """
+
+    def setUp(self) -> None:
+        self.shape = (6, 8, 3)
+        self.ring = SharedFrameRing.create(self.shape, slots=3)
+
+    def tearDown(self) -> None:
+        self.ring.close()
+
+    def frame(self, value: int) -> np.ndarray:
+        return np.full(self.shape, value, dtype=np.uint8)
+
+    def test_invalid_slots(self) -> None:
+        """ Test that a ring needs at least two slots. """
+        with self.assertRaises(ValueError):
+            SharedFrameRing.create(self.shape, slots=1)
+
+    def test_read_latest_frame(self) -> None:
+        """ Test that the reader gets the latest frame, and only once. """
+        out = np.empty(self.shape, dtype=np.uint8)
+        self.assertIsNone(self.ring.read(out))
+
+        for value in range(5):
+            self.ring.write(self.frame(value))
+
+        seq = self.ring.read(out)
+        self.assertEqual(seq, 4)
+        np.testing.assert_array_equal(out, self.frame(4))
+        self.assertIsNone(self.ring.read(out, seq))
+
+    def test_shape_mismatch(self) -> None:
+        """ Test that frames of another shape are rejected. """
+        with self.assertRaises(ValueError):
+            self.ring.write(np.zeros((6, 9, 3), dtype=np.uint8))
+
+    def test_attach_from_other_process(self) -> None:
+        """ Test that another process reads the frames written by the owner. """
+        self.ring.write(self.frame(7))
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        process = context.Process(target=read_in_child, args=(self.ring.name, self.shape, 3, results))
+        process.start()
+        seq, value = results.get(timeout=30)
+        process.join()
+
+        self.assertEqual((seq, value), (0, 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
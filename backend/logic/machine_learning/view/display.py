@@ -0,0 +1,76 @@
+import queue
+import threading
+import cv2
+import numpy as np
+
+from typing import Optional, Tuple
+
+
+class FrameDisplay:
+    """
+    Shows debug frames from every detector on one dedicated thread.
+
+    HighGUI windows belong to the thread that created them, so ``imshow``, ``waitKey`` and
+    ``destroyAllWindows`` must never run on whichever pool thread happens to be free. Detectors
+    hand their frames over with ``show``, which never blocks: when the display falls behind, the
+    frame is dropped instead of delaying detection.
+    """
+
+    def __init__(self, max_pending: int = 2):
+        """
+        Args:
+            max_pending (int): Frames waiting to be shown before new ones are dropped.
+        """
+        self._frames: queue.Queue[Optional[Tuple[str, np.ndarray]]] = queue.Queue(max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.frames_shown = 0
+        self.frames_dropped = 0
+
+    def show(self, window: str, frame: np.ndarray) -> None:
+        """
+        Queues a frame for a window. The frame must not be changed afterwards.
+
+        Args:
+            window (str): Name of the window.
+            frame (np.ndarray): The BGR frame to show, owned by the display from now on.
+        """
+        self._ensure_started()
+        try:
+            self._frames.put_nowait((window, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close_windows(self) -> None:
+        """ Closes every window, on the display thread. Waits for room in the queue, but not for the windows. """
+        if self._thread is not None:
+            self._frames.put(None)
+
+    def _ensure_started(self) -> None:
+        """ Starts the display thread on first use. """
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="frame-display", daemon=True)
+                self._thread.start()
+
+    def _worker(self) -> None:
+        """ Shows queued frames forever. """
+        while True:
+            item = self._frames.get()
+            try:
+                if item is None:
+                    cv2.destroyAllWindows()
+                    continue
+                window, frame = item
+                cv2.imshow(window, frame)
+                cv2.waitKey(1)
+                self.frames_shown += 1
+            except Exception as e:
+                print(f"Debug display failed: {e!r}")
+
+
+# Shared by every detector of the process, HighGUI only works from a single thread
+frame_display = FrameDisplay()
@@ -1,29 +1,25 @@
 import cv2
 import numpy as np
-import tensorflow as tf
 
 from typing import List, Tuple
 from logic.machine_learning.utilities.constants import MODEL_WIDTH, MODEL_HEIGHT
 
 
-def draw_boxes_with_scores(frame: np.ndarray, boxes: tf.Tensor, scores: tf.Tensor, threshold: float = 0.5) -> None:
+def draw_boxes_with_scores(frame: np.ndarray, boxes: np.ndarray, scores: np.ndarray, threshold: float = 0.5) -> None:
     """
     Draw bounding boxes on a frame for detections with a score above the threshold.
 
     Args:
         frame (np.ndarray): The image/frame to draw on.
-        boxes (np.ndarray or tf.Tensor): Bounding boxes of shape (N, 4), normalized to the model input size.
-        scores (np.ndarray or tf.Tensor): Confidence scores of shape (N, num_classes).
+        boxes (np.ndarray): Bounding boxes of shape (N, 4), normalized to the model input size.
+        scores (np.ndarray): Confidence scores of shape (N, num_classes).
         threshold (float): Minimum score to draw a box.
     """
-    boxes_np = boxes.numpy() if isinstance(boxes, tf.Tensor) else boxes
-    scores_np = scores.numpy() if isinstance(scores, tf.Tensor) else scores
-
     frame_height, frame_width = frame.shape[:2]
     scale_x = frame_width / MODEL_WIDTH
     scale_y = frame_height / MODEL_HEIGHT
 
-    for box, score_arr in zip(boxes_np, scores_np):
+    for box, score_arr in zip(boxes, scores):
         max_score = np.max(score_arr)
         if max_score >= threshold:
             l, t, r, b = box
@@ -102,3 +98,24 @@ def draw_polygon(frame: np.ndarray, polygon: List[Tuple[float, float]]) -> np.nd
     cv2.polylines(frame, scaled_polygon, isClosed=True, color=(0, 0, 255), thickness=2)
 
     return frame
+
+
+def draw_overlay(frame: np.ndarray, centers: List[Tuple[float, float]], boundary: List[Tuple[float, float]], boxes: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Draws the square centers, board boundary and piece detections on a copy of the frame.
+
+    Args:
+        frame (np.ndarray): The shared camera frame, left untouched.
+        centers (List[Tuple[float, float]]): Normalized (x, y) centers of the squares.
+        boundary (List[Tuple[float, float]]): Normalized (x, y) vertices of the board boundary.
+        boxes (np.ndarray): Bounding boxes of shape (N, 4), normalized to the model input size.
+        scores (np.ndarray): Confidence scores of shape (N, num_classes).
+
+    Returns:
+        np.ndarray: The copy with the overlay drawn.
+    """
+    overlay = frame.copy()
+    draw_points(overlay, centers)
+    draw_polygon(overlay, boundary)
+    draw_boxes_with_scores(overlay, boxes, scores)
+    return overlay
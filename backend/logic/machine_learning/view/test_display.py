@@ -0,0 +1,62 @@
+import threading
+import time
+import unittest
+import numpy as np
+from unittest.mock import patch
+from logic.machine_learning.view.display import FrameDisplay
+
+
+class TestFrameDisplay(unittest.TestCase):
+    """ Unit tests for the FrameDisplay class. """
+
+    def test_highgui_runs_on_one_thread(self) -> None:
+        """ Test that frames shown from many threads reach HighGUI from the display thread only. """
+        display = FrameDisplay(max_pending=100)
+        calls = []
+        done = threading.Event()
+
+        def record(name):
+            def call(*args):
+                calls.append((name, threading.current_thread().name))
+                if name == "destroyAllWindows":
+                    done.set()
+            return call
+
+        with patch("logic.machine_learning.view.display.cv2") as cv2:
+            cv2.imshow, cv2.waitKey, cv2.destroyAllWindows = record("imshow"), record("waitKey"), record("destroyAllWindows")
+            frame = np.zeros((4, 4, 3), dtype=np.uint8)
+            threads = [threading.Thread(target=display.show, args=("board", frame)) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            display.close_windows()
+            self.assertTrue(done.wait(timeout=2.0))
+
+        self.assertEqual({thread for _, thread in calls}, {"frame-display"})
+        self.assertEqual([name for name, _ in calls].count("imshow"), 4)
+        self.assertEqual(calls[-1][0], "destroyAllWindows")
+
+    def test_drops_frames_when_behind(self) -> None:
+        """ Test that showing never blocks: frames beyond the queue are dropped. """
+        display = FrameDisplay(max_pending=1)
+        release = threading.Event()
+
+        with patch("logic.machine_learning.view.display.cv2") as cv2:
+            cv2.imshow.side_effect = lambda *args: release.wait(timeout=2.0)
+            frame = np.zeros((4, 4, 3), dtype=np.uint8)
+            for _ in range(5):
+                display.show("board", frame)
+            release.set()
+
+            # Wait for the display thread to show what was kept before HighGUI is restored
+            deadline = time.monotonic() + 2.0
+            while display.frames_shown + display.frames_dropped < 5 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertGreaterEqual(display.frames_dropped, 3)
+        self.assertEqual(display.frames_shown + display.frames_dropped, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()